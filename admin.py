@@ -0,0 +1,43 @@
+"""
+Access control for operator-only endpoints.
+
+Admin routes are off unless ADMIN_TOKEN is set, and then require the token in
+an X-Admin-Token header (or Authorization: Bearer <token>).
+"""
+
+import hmac
+import os
+from functools import wraps
+
+from flask import jsonify, request
+
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+
+def _request_token():
+    token = request.headers.get('X-Admin-Token')
+    if token is None:
+        auth = request.headers.get('Authorization', '')
+        if auth.startswith('Bearer '):
+            token = auth[len('Bearer '):]
+    return token
+
+
+def is_admin():
+    """Whether the current request carries the configured admin token"""
+    if not ADMIN_TOKEN:
+        return False
+    token = _request_token()
+    return token is not None and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+def require_admin(view):
+    """Reject requests without the admin token (404 when no token is configured)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({'error': 'Not found'}), 404
+        if not is_admin():
+            return jsonify({'error': 'Admin token required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1 @@
+"""Benchmark and load-test harnesses for the Diet Planner backend."""
@@ -0,0 +1,142 @@
+"""
+Cheap-route latency while heavy routes are saturated.
+
+Seeds a database, starts serve.py and measures p50/p99 of cheap reads
+(/get_water_progress and /get_saved_meal_plan) from --cheap-clients threads:
+first on their own, then while --heavy-clients threads post multi-week plan
+generations and chat messages back to back. The loaded phase runs once with
+the rate limiter (rate_limit.py) off and once on, and reports how many heavy
+requests were served, limited (429) or turned away busy (503). Heavy clients
+wait out Retry-After like a well-behaved frontend; --ignore-retry-after makes
+them retry at once instead.
+
+    python -m benchmarks.admission --users 200 --heavy-clients 12 --threads 8
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.common import percentile, print_report, running_server, temp_database
+from benchmarks.seed import seed_database
+
+
+def _send(base_url, method, path, body=None):
+    """(status, Retry-After seconds or 0)"""
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method,
+                                 headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            resp.read()
+            return resp.status, 0
+    except urllib.error.HTTPError as e:
+        return e.code, float(e.headers.get('Retry-After') or 0)
+    except OSError:
+        return 'connection error', 0
+
+
+def cheap_request(users, rng):
+    user_id = rng.randint(1, users)
+    if rng.random() < 0.5:
+        return 'GET', f'/get_water_progress/{user_id}', None
+    return 'GET', f'/get_saved_meal_plan/{user_id}', None
+
+
+def heavy_request(users, weeks, rng):
+    user_id = rng.randint(1, users)
+    if rng.random() < 0.5:
+        return 'POST', '/generate_weekly_meal_plan', {'user_id': user_id, 'weeks': weeks}
+    return 'POST', '/chat', {'user_id': user_id, 'message': 'what is for dinner', 'current_day': 'Monday'}
+
+
+def drive(base_url, users, cheap_clients, heavy_clients, weeks, seconds, honor_retry_after=True):
+    """(cheap latencies in ms, {status: count} for cheap, {status: count} for heavy)"""
+    cheap_latencies, cheap_statuses, heavy_statuses = [], {}, {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client(n, heavy):
+        rng = random.Random(n)
+        latencies, statuses = [], {}
+        while time.monotonic() < deadline:
+            method, path, body = heavy_request(users, weeks, rng) if heavy else cheap_request(users, rng)
+            start = time.perf_counter()
+            status, retry_after = _send(base_url, method, path, body)
+            statuses[status] = statuses.get(status, 0) + 1
+            if not heavy and status == 200:
+                latencies.append((time.perf_counter() - start) * 1000)
+            if retry_after and honor_retry_after:
+                time.sleep(max(0, min(retry_after, deadline - time.monotonic())))
+        with lock:
+            cheap_latencies.extend(latencies)
+            totals = heavy_statuses if heavy else cheap_statuses
+            for status, count in statuses.items():
+                totals[status] = totals.get(status, 0) + count
+
+    threads = ([threading.Thread(target=client, args=(n, False)) for n in range(cheap_clients)]
+               + [threading.Thread(target=client, args=(1000 + n, True)) for n in range(heavy_clients)])
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return cheap_latencies, cheap_statuses, heavy_statuses
+
+
+def run_phase(args, db_path, rate_limit, heavy_clients):
+    env = {'CHAT_PRECOMPUTE': '0', 'RATE_LIMIT': '1' if rate_limit else '0'}
+    with running_server('serve', db_path, args.workers, args.threads, env=env) as base_url:
+        honor = not args.ignore_retry_after
+        # Warm-up, which also spends the heavy buckets' initial bursts
+        drive(base_url, args.users, args.cheap_clients, heavy_clients, args.weeks, min(args.seconds, 3), honor)
+        latencies, cheap_statuses, heavy_statuses = drive(base_url, args.users, args.cheap_clients,
+                                                          heavy_clients, args.weeks, args.seconds, honor)
+    report = {
+        'cheap_req_per_s': len(latencies) / args.seconds,
+        'cheap_p50_ms': percentile(latencies, 50),
+        'cheap_p99_ms': percentile(latencies, 99),
+        'cheap_errors': sum(count for status, count in cheap_statuses.items() if status != 200),
+    }
+    if heavy_clients:
+        report.update({
+            'heavy_ok': heavy_statuses.get(200, 0),
+            'heavy_429': heavy_statuses.get(429, 0),
+            'heavy_503': heavy_statuses.get(503, 0),
+            'heavy_other': sum(count for status, count in heavy_statuses.items() if status not in (200, 429, 503)),
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--cheap-clients', type=int, default=2)
+    parser.add_argument('--heavy-clients', type=int, default=12)
+    parser.add_argument('--weeks', type=int, default=4, help='plan length of the heavy plan generations')
+    parser.add_argument('--seconds', type=float, default=15)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--ignore-retry-after', action='store_true', help='heavy clients retry rejections at once')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    db_path = temp_database('diet_admission_')
+    seed_database(db_path, users=args.users, months=1)
+
+    report = {'users': args.users, 'cheap_clients': args.cheap_clients, 'heavy_clients': args.heavy_clients,
+              'workers': args.workers, 'threads': args.threads, 'cpus': os.cpu_count()}
+    phases = (('idle', False, 0), ('saturated_no_limit', False, args.heavy_clients),
+              ('saturated_limited', True, args.heavy_clients))
+    for name, rate_limit, heavy_clients in phases:
+        for key, value in run_phase(args, db_path, rate_limit, heavy_clients).items():
+            report[f'{name}_{key}'] = value
+    print_report('Cheap-route latency under heavy load', report, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Shared helpers for the benchmark harnesses."""
+
+import importlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a list of numbers (pct in 0-100)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def temp_database(prefix='diet_bench_'):
+    """Path to a database file inside a fresh temporary directory"""
+    return os.path.join(tempfile.mkdtemp(prefix=prefix), 'diet_planner.db')
+
+
+def load_app(db_path, **env):
+    """Import app.py against db_path with extra environment settings and create its schema.
+
+    Settings are read by the app at import time, so this must run before anything
+    else imports app in the current process.
+    """
+    os.environ['DIET_PLANNER_DB'] = db_path
+    for key, value in env.items():
+        os.environ[key] = str(value)
+    os.chdir(REPO_ROOT)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    app_module = importlib.import_module('app')
+    app_module.init_db()
+    return app_module
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+DEV_SERVER = ("import app; app.init_db(); app.water_store.rebuild(); "
+              "app.app.run(port={port}, debug=True, use_reloader=False)")
+
+
+@contextmanager
+def running_server(mode, db_path, workers=1, threads=4, env=None, ready_path='/chat_cache_stats', timeout=60):
+    """Run the app in a subprocess against db_path and yield its base URL.
+
+    mode 'dev' is app.run(debug=True) as at the bottom of app.py (without the
+    reloader); 'serve' is serve.py with the given workers and threads.
+    """
+    port = free_port()
+    if mode == 'dev':
+        command = [sys.executable, '-c', DEV_SERVER.format(port=port)]
+    elif mode == 'serve':
+        command = [sys.executable, 'serve.py', '--port', str(port), '--workers', str(workers),
+                   '--threads', str(threads)]
+    else:
+        raise ValueError(f"Unknown server mode: {mode}")
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=dict(os.environ, DIET_PLANNER_DB=db_path, **(env or {})),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"{mode} server exited during startup")
+            try:
+                with urllib.request.urlopen(base_url + ready_path, timeout=1):
+                    break
+            except (urllib.error.URLError, OSError):
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{mode} server did not start")
+                time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+
+def git_commit():
+    """(commit hash, whether the tree has uncommitted changes), or (None, None) outside git"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def print_report(title, report, as_json=False):
+    """Print a flat report dict as aligned text or JSON"""
+    if as_json:
+        print(json.dumps(report, indent=2))
+        return
+    print(title)
+    width = max(len(key) for key in report)
+    for key, value in report.items():
+        if isinstance(value, float):
+            value = f"{value:.3f}"
+        print(f"  {key.ljust(width)}  {value}")
@@ -0,0 +1,286 @@
+"""
+End-to-end HTTP benchmark on a seeded large-scale database.
+
+Seeds a synthetic database (see benchmarks.seed), then replays a weighted mix
+of the requests the frontend makes - login, the reads that follow it, both
+dashboards, available foods, plan generation and saving, meal marks, water taps
+and chat - from client threads for a fixed time against one target:
+
+    client  the Flask test client in this process (no network)
+    dev     app.run(debug=True) in a subprocess
+    serve   serve.py in a subprocess (--workers/--threads)
+
+Per-route throughput and p50/p95/p99 latency are printed and saved as JSON to
+--out (default benchmarks/results/e2e-<target>-<time>-<commit>.json) together
+with the commit and settings; --compare prints the change against an earlier
+result file. With --revalidate each client remembers ETags and sends
+If-None-Match like a browser cache, so unchanged reads come back as 304.
+The rate limiter (rate_limit.py) is off unless --rate-limit is given, so runs
+measure capacity rather than the limits.
+
+    python -m benchmarks.e2e --users 2000 --months 3 --target serve --workers 3
+    python -m benchmarks.e2e --target client --compare benchmarks/results/e2e-client-....json
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+
+from benchmarks.common import REPO_ROOT, git_commit, percentile, running_server, temp_database
+from benchmarks.seed import BENCH_PASSWORD, bench_user_name, seed_database
+
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+CHAT_MESSAGES = ['help', 'what is for dinner', 'recipe for lunch on friday', 'how do I cook oats',
+                 'anything good for blood pressure', 'breakfast ideas']
+
+
+def _today():
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+class Workload:
+    """Weighted request mix; next_request() returns (route name, method, path, json body)"""
+
+    def __init__(self, users, foods_by_meal, sample_plan, seed=0):
+        self.users = users
+        self.foods_by_meal = foods_by_meal
+        self.sample_plan = sample_plan
+        self.routes = [
+            ('login', 4, self.login),
+            ('get_saved_meal_plan', 8, lambda rng, u: ('GET', f'/get_saved_meal_plan/{u}', None)),
+            ('get_consumption_status', 6, lambda rng, u: ('GET', f'/get_consumption_status/{u}', None)),
+            ('get_day_completion_status', 6, lambda rng, u: ('GET', f'/get_day_completion_status/{u}', None)),
+            ('check_reminders', 6, lambda rng, u: ('GET', f'/check_reminders/{u}', None)),
+            ('get_weekly_dashboard', 6, lambda rng, u: ('GET', f'/get_weekly_dashboard/{u}', None)),
+            ('health_dashboard', 6, lambda rng, u: ('GET', f'/health_dashboard/{u}', None)),
+            ('available_foods', 8, lambda rng, u: ('GET', f'/available_foods/{u}', None)),
+            ('generate_weekly_meal_plan', 3, lambda rng, u: ('POST', '/generate_weekly_meal_plan', {'user_id': u})),
+            ('save_meal_plan', 1, lambda rng, u: ('POST', '/save_meal_plan',
+                                                  {'user_id': u, 'meal_plan': self.sample_plan})),
+            ('mark_consumed_for_date', 8, self.mark_meal),
+            ('mark_water_consumed', 12, lambda rng, u: ('POST', '/mark_water_consumed',
+                                                        {'user_id': u, 'glasses': 1, 'consumed_date': _today()})),
+            ('get_water_progress', 6, lambda rng, u: ('GET', f'/get_water_progress/{u}', None)),
+            ('chat', 10, lambda rng, u: ('POST', '/chat', {'user_id': u, 'current_day': 'Monday',
+                                                           'message': rng.choice(CHAT_MESSAGES)})),
+        ]
+        self.names = [name for name, _, _ in self.routes]
+        self.weights = [weight for _, weight, _ in self.routes]
+
+    def login(self, rng, user_id):
+        return 'POST', '/login', {'name': bench_user_name(user_id), 'password': BENCH_PASSWORD}
+
+    def mark_meal(self, rng, user_id):
+        meal_type = rng.choice(list(self.foods_by_meal))
+        foods = rng.sample(self.foods_by_meal[meal_type], min(3, len(self.foods_by_meal[meal_type])))
+        date = (datetime.now() - timedelta(days=rng.randint(0, 6))).strftime('%Y-%m-%d')
+        return 'POST', '/mark_consumed_for_date', {'user_id': user_id, 'meal_type': meal_type,
+                                                   'date': date, 'foods': foods}
+
+    def next_request(self, rng):
+        index = rng.choices(range(len(self.routes)), self.weights)[0]
+        name, _, build = self.routes[index]
+        return (name,) + build(rng, rng.randint(1, self.users))
+
+
+def test_client_sender(app_module):
+    client_local = threading.local()
+
+    def send(method, path, body, headers=None):
+        client = getattr(client_local, 'client', None)
+        if client is None:
+            client = client_local.client = app_module.app.test_client()
+        response = client.open(path, method=method, json=body, headers=headers)
+        response.get_data()
+        return response.status_code, response.headers.get('ETag')
+    return send
+
+
+def http_sender(base_url):
+    def send(method, path, body, headers=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(base_url + path, data=data, method=method,
+                                     headers=dict(headers or {}, **{'Content-Type': 'application/json'}))
+        try:
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                resp.read()
+                return resp.status, resp.headers.get('ETag')
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers.get('ETag')
+    return send
+
+
+def replay(send, workload, clients, seconds, seed=0, revalidate=False):
+    """Drive the workload from client threads; returns {route: ([latency ms], {status: count})}"""
+    results = {name: ([], {}) for name in workload.names}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client(n):
+        rng = random.Random(seed * 1000 + n)
+        local = {name: ([], {}) for name in workload.names}
+        etags = {}
+        while time.monotonic() < deadline:
+            name, method, path, body = workload.next_request(rng)
+            headers = {'If-None-Match': etags[path]} if revalidate and path in etags else None
+            start = time.perf_counter()
+            try:
+                status, etag = send(method, path, body, headers)
+            except OSError:
+                status, etag = 'connection error', None
+            if revalidate and etag and method == 'GET':
+                etags[path] = etag
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            latencies, statuses = local[name]
+            statuses[status] = statuses.get(status, 0) + 1
+            if isinstance(status, int) and status < 400:
+                latencies.append(elapsed_ms)
+        with lock:
+            for name, (latencies, statuses) in local.items():
+                results[name][0].extend(latencies)
+                for status, count in statuses.items():
+                    results[name][1][status] = results[name][1].get(status, 0) + count
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def summarize(results, seconds):
+    def stats(latencies, statuses):
+        total = sum(statuses.values())
+        return {
+            'requests': total,
+            'errors': total - len(latencies),
+            'req_per_s': round(len(latencies) / seconds, 2),
+            'p50_ms': round(percentile(latencies, 50), 3) if latencies else None,
+            'p95_ms': round(percentile(latencies, 95), 3) if latencies else None,
+            'p99_ms': round(percentile(latencies, 99), 3) if latencies else None,
+            'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        }
+    routes = {name: stats(*result) for name, result in results.items()}
+    all_latencies = [ms for latencies, _ in results.values() for ms in latencies]
+    all_statuses = {}
+    for _, statuses in results.values():
+        for status, count in statuses.items():
+            all_statuses[status] = all_statuses.get(status, 0) + count
+    return routes, stats(all_latencies, all_statuses)
+
+
+def print_table(routes, total, previous=None):
+    columns = ('requests', 'errors', 'req_per_s', 'p50_ms', 'p95_ms', 'p99_ms')
+    width = max(len(name) for name in list(routes) + ['total'])
+    print('route'.ljust(width) + ''.join(column.rjust(11) for column in columns))
+    for name, stats in list(routes.items()) + [('total', total)]:
+        cells = []
+        for column in columns:
+            value = stats[column]
+            cells.append(('-' if value is None else f'{value:g}').rjust(11))
+        print(name.ljust(width) + ''.join(cells))
+        old = (previous['routes'].get(name) if name != 'total' else previous['total']) if previous else None
+        if old:
+            changes = []
+            for column in columns[2:]:
+                if stats[column] and old.get(column):
+                    changes.append(f'{(stats[column] - old[column]) / old[column] * 100:+.1f}%'.rjust(11))
+                else:
+                    changes.append('-'.rjust(11))
+            print(' ' * width + ' ' * 22 + ''.join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', choices=('client', 'dev', 'serve'), default='client')
+    parser.add_argument('--db', help='reuse a database seeded by benchmarks.seed instead of seeding one')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--months', type=int, default=3)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--workers', type=int, default=(os.cpu_count() or 1) * 2 + 1)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--revalidate', action='store_true', help='send If-None-Match with remembered ETags')
+    parser.add_argument('--rate-limit', action='store_true', help='keep the rate limiter on (counts 429/503)')
+    parser.add_argument('--out', help='result file (default: benchmarks/results/e2e-<target>-<time>-<commit>.json)')
+    parser.add_argument('--compare', help='earlier result file to compare against')
+    args = parser.parse_args()
+
+    # Read by the app at import time, here and in a server subprocess
+    os.environ['RATE_LIMIT'] = '1' if args.rate_limit else '0'
+    if args.db:
+        from benchmarks.common import load_app
+        app_module = load_app(args.db, CHAT_PRECOMPUTE=0)
+        conn = app_module.get_db()
+        users = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+        conn.close()
+        seed_report = {'db_path': args.db, 'users': users}
+    else:
+        seed_report = seed_database(temp_database('diet_e2e_'), args.users, args.months)
+        users = seed_report['users']
+    import app as app_module
+    import planner
+
+    dataset = app_module.dataset
+    foods_by_meal = {
+        meal_type: [planner.plan_item(food) for food in dataset[dataset['meal'] == meal_type].to_dict('records')]
+        for meal_type in planner.MEAL_TYPES
+    }
+    sample_plan = planner.generate_week(planner.plan_candidates(dataset, planner.new_plan_state(), 'normal', 'veg'),
+                                        planner.new_plan_state())
+    workload = Workload(users, foods_by_meal, sample_plan)
+
+    def run(send):
+        if args.warmup:
+            replay(send, workload, args.clients, args.warmup, seed=args.seed + 1, revalidate=args.revalidate)
+        return replay(send, workload, args.clients, args.seconds, seed=args.seed, revalidate=args.revalidate)
+
+    if args.target == 'client':
+        results = run(test_client_sender(app_module))
+    else:
+        with running_server(args.target, seed_report['db_path'], args.workers, args.threads,
+                            env={'CHAT_PRECOMPUTE': '0'}) as base_url:
+            results = run(http_sender(base_url))
+
+    routes, total = summarize(results, args.seconds)
+    commit, dirty = git_commit()
+    report = {
+        'benchmark': 'e2e',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'dirty': dirty,
+        'config': {key: getattr(args, key) for key in
+                   ('target', 'clients', 'seconds', 'warmup', 'workers', 'threads', 'seed', 'revalidate',
+                    'rate_limit')},
+        'cpus': os.cpu_count(),
+        'seed_data': {key: value for key, value in seed_report.items() if key != 'db_path'},
+        'routes': routes,
+        'total': total,
+    }
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        print(f"Compared with {args.compare} (commit {str(previous.get('commit'))[:10]})")
+    print_table(routes, total, previous)
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"e2e-{args.target}-{datetime.now():%Y%m%d-%H%M%S}-{(commit or 'nogit')[:10]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Chat intent matching throughput.
+
+Compares the compiled single-pass matcher against the linear keyword scans it
+replaced, extended to the same intents (meal, day, condition, foods), on a
+corpus of real-style chat messages.
+
+    python -m benchmarks.intent_matcher --messages 20000
+    python -m benchmarks.intent_matcher --extra-foods 2000   # larger catalogue
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.common import print_report
+
+TEMPLATES = [
+    "Help me cook {day} {meal} foods",
+    "how do i make {food}?",
+    "How to cook {food} for {condition}",
+    "Recipe for {food} and {food2}",
+    "what should I eat for {meal} on {day}",
+    "Healthy cooking tips for {condition}",
+    "can you show me {day}'s {meal} please",
+    "is {food} ok for {condition}? I have it for {meal}",
+    "{meal} ideas with {food}",
+    "help",
+    "hello",
+    "what can you do",
+    "I forgot to buy {food}, what can I make for {meal} instead",
+    "Tell me a quick {meal} recipe, I only have 10 minutes",
+    "my doctor said watch my {condition}, any {meal} tips for {day}?",
+]
+
+MEAL_WORDS = ['breakfast', 'lunch', 'dinner', 'morning meal', 'afternoon snack', 'evening meal']
+DAYS = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'today']
+CONDITIONS = ['diabetes', 'blood pressure', 'heart health', 'weight loss', 'cholesterol', 'bp']
+
+
+def build_corpus(food_names, size, seed=7):
+    rng = random.Random(seed)
+    foods = list(food_names) + ['Boiled Eggs', 'Brown Rice Bowl', 'pizza', 'Tomatoes']
+    corpus = []
+    for _ in range(size):
+        corpus.append(rng.choice(TEMPLATES).format(
+            day=rng.choice(DAYS), meal=rng.choice(MEAL_WORDS), condition=rng.choice(CONDITIONS),
+            food=rng.choice(foods).lower(), food2=rng.choice(foods).lower()
+        ))
+    return corpus
+
+
+def legacy_matcher(food_names):
+    """The previous any(word in message) chains, extended to days, conditions and foods"""
+    from intent_matcher import CONDITION_KEYWORDS, DAY_NAMES, HELP_PHRASES
+    food_list = [name.lower() for name in food_names]
+    help_list = list(HELP_PHRASES)
+
+    def match(message):
+        message_lower = message.lower()
+        meal_type = None
+        if any(word in message_lower for word in ['breakfast', 'morning']):
+            meal_type = 'morning'
+        elif any(word in message_lower for word in ['lunch', 'afternoon']):
+            meal_type = 'afternoon'
+        elif any(word in message_lower for word in ['dinner', 'evening']):
+            meal_type = 'dinner'
+        day = next((d for d in DAY_NAMES if d.lower() in message_lower), None)
+        condition = next((c for c, words in CONDITION_KEYWORDS.items()
+                          if any(word in message_lower for word in words)), None)
+        foods = [name for name in food_list if name in message_lower]
+        return {'meal_type': meal_type, 'day': day, 'condition': condition, 'foods': foods,
+                'is_help': message_lower.strip() in help_list}
+
+    return match
+
+
+def synthetic_foods(count, seed=11):
+    """Made-up two-word dish names standing in for a larger recipe catalogue"""
+    rng = random.Random(seed)
+    styles = ['grilled', 'baked', 'steamed', 'roasted', 'spiced', 'stuffed', 'smoked', 'braised']
+    bases = ['paneer', 'lentil', 'quinoa', 'millet', 'tofu', 'chickpea', 'barley', 'salmon', 'okra', 'squash']
+    return [f"{rng.choice(styles)} {rng.choice(bases)} {n}" for n in range(count)]
+
+
+def throughput(match, corpus, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in corpus:
+            match(message)
+        best = min(best, time.perf_counter() - start)
+    return len(corpus) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--extra-foods', type=int, default=0, help='synthetic foods added to the catalogue')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    from chatbot_new import recipe_store
+    from intent_matcher import IntentMatcher
+
+    names = recipe_store.names() + synthetic_foods(args.extra_foods)
+    corpus = build_corpus(names, args.messages)
+    compiled = IntentMatcher(names)
+    legacy = legacy_matcher(names)
+
+    compiled_rate = throughput(compiled.match, corpus, args.repeat)
+    legacy_rate = throughput(legacy, corpus, args.repeat)
+    print_report('Intent matching', {
+        'messages': len(corpus),
+        'known_foods': len(names),
+        'compiled_msgs_per_sec': compiled_rate,
+        'legacy_scan_msgs_per_sec': legacy_rate,
+        'speedup': compiled_rate / legacy_rate,
+        'compiled_us_per_msg': 1e6 / compiled_rate,
+    }, args.json)
+
+
+if __name__ == '__main__':
+    main()
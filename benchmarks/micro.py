@@ -0,0 +1,262 @@
+"""
+Micro-benchmarks for the pure planning, chat and dashboard functions.
+
+Each case is timed in the style of pytest-benchmark: the number of calls per
+round is calibrated so a round takes a few milliseconds, then rounds repeat for
+--min-time seconds and min/median/mean/stddev per call are reported. Cases are
+parametrized by catalog size (training_dataset.csv scaled up with jittered
+copies) and plan length in days.
+
+    python -m benchmarks.micro                                  # run and print
+    python -m benchmarks.micro --save benchmarks/results/micro-baseline.json
+    python -m benchmarks.micro --compare benchmarks/results/micro-baseline.json --threshold 15
+
+With --compare the exit status is 1 when any case's median is more than
+--threshold percent slower than in the baseline, so the run can gate a change.
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import islice, product
+
+from benchmarks.common import REPO_ROOT, git_commit
+
+# 95 is training_dataset.csv as shipped; larger catalogs are synthetic
+CATALOG_SIZES = (95, 1000, 10000)
+PLAN_DAYS = (7, 28, 84)
+CHAT_MESSAGES = {
+    'meal': 'help me cook monday dinner',
+    'food': 'how do I cook oats',
+    'condition': 'healthy cooking tips for diabetes',
+    'search': 'what helps with blood pressure',
+    'default': 'hello there',
+}
+ROUND_TIME = 0.005
+
+CASES = []
+
+
+def case(name, **params):
+    """Register a case factory; it receives one combination of params and returns the callable to time"""
+    def register(factory):
+        keys = list(params)
+        for values in product(*(params[key] for key in keys)):
+            combination = dict(zip(keys, values))
+            label = ','.join(f'{key}={value}' for key, value in combination.items())
+            CASES.append((f'{name}[{label}]' if label else name, factory, combination))
+        return factory
+    return register
+
+
+# ---------------- Fixtures ----------------
+_catalogs = {}
+
+
+def catalog(size):
+    """Exactly size foods: the first rows of the shipped catalog, or a synthetic one when it is smaller"""
+    if size not in _catalogs:
+        from benchmarks.substitutes import synthetic_catalog
+        import pandas as pd
+        base = pd.read_csv(os.path.join(REPO_ROOT, 'training_dataset.csv'))
+        _catalogs[size] = base.head(size) if size <= len(base) else synthetic_catalog(size)
+    return _catalogs[size]
+
+
+def weekly_plan(size=CATALOG_SIZES[0]):
+    import planner
+    state = planner.new_plan_state()
+    return planner.generate_week(planner.plan_candidates(catalog(size), state, 'normal', 'veg'), state)
+
+
+def dashboard_rows(count, seed=3):
+    rng = random.Random(seed)
+    today = datetime.now().date()
+    rows = set()
+    while len(rows) < count:
+        rows.add(((today - timedelta(days=rng.randint(0, 7))).isoformat(), rng.choice(['morning', 'afternoon', 'dinner'])))
+    return [(date, meal, round(rng.uniform(100, 600), 1)) for date, meal in sorted(rows)]
+
+
+# ---------------- Cases ----------------
+@case('planner.plan_candidates', catalog=CATALOG_SIZES)
+def bench_plan_candidates(catalog_size):
+    import planner
+    foods = catalog(catalog_size)
+    state = planner.new_plan_state()
+    return lambda: planner.plan_candidates(foods, state, 'diabetes', 'veg')
+
+
+@case('planner.generate_plan', catalog=CATALOG_SIZES, days=PLAN_DAYS)
+def bench_generate_plan(catalog_size, days):
+    import planner
+    candidates = planner.plan_candidates(catalog(catalog_size), planner.new_plan_state(), 'normal', 'veg')
+
+    def run():
+        state = planner.new_plan_state(weeks=max(1, days // 7))
+        return list(islice(planner.iter_plan_days(candidates, state), days))
+    return run
+
+
+@case('planner.weekly_meal_plan', catalog=CATALOG_SIZES)
+def bench_weekly_meal_plan(catalog_size):
+    """What /generate_weekly_meal_plan does after loading the user"""
+    import planner
+    foods = catalog(catalog_size)
+
+    def run():
+        state = planner.new_plan_state()
+        return planner.generate_week(planner.plan_candidates(foods, state, 'diabetes', 'veg'), state)
+    return run
+
+
+@case('chat.recipe_response', message=tuple(CHAT_MESSAGES))
+def bench_recipe_response(message):
+    import chatbot_new
+    plan = weekly_plan()
+    text = CHAT_MESSAGES[message]
+    chatbot_new.generate_recipe_response_fixed(text, 'Monday', plan, 'diabetes')  # load recipes and index
+    return lambda: chatbot_new.generate_recipe_response_fixed(text, 'Monday', plan, 'diabetes')
+
+
+@case('chat.default_suggestions')
+def bench_default_suggestions():
+    import chatbot_new
+    plan = weekly_plan()
+    return lambda: chatbot_new.get_default_suggestions('Monday', plan)
+
+
+@case('chat.creative_suggestions', meal=('morning', 'afternoon', 'dinner'))
+def bench_creative_suggestions(meal):
+    import chatbot_new
+    foods = [item['food'] for item in weekly_plan()['Monday'][meal]]
+    return lambda: chatbot_new.get_creative_meal_suggestions(foods, meal)
+
+
+@case('dashboards.weekly', rows=(0, 12, 24))
+def bench_weekly_dashboard(rows):
+    import dashboards
+    data = dashboard_rows(rows)
+    today = datetime.now()
+    return lambda: dashboards.weekly_dashboard(data, today)
+
+
+@case('dashboards.health', rows=(0, 12, 24))
+def bench_health_dashboard(rows):
+    import dashboards
+    data = dashboard_rows(rows)
+    today = datetime.now()
+    return lambda: dashboards.health_dashboard(data, today)
+
+
+# ---------------- Runner ----------------
+def measure(func, min_time):
+    """Per-call timings (seconds) of calibrated rounds, pytest-benchmark style; gc is off as in timeit"""
+    gc.collect()
+    gc.disable()
+    try:
+        return _rounds(func, min_time)
+    finally:
+        gc.enable()
+
+
+def _rounds(func, min_time):
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= ROUND_TIME:
+            break
+        number *= 2 if elapsed < ROUND_TIME / 4 else 1 + int(ROUND_TIME / max(elapsed, 1e-9))
+    rounds = max(5, int(min_time / elapsed))
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return timings, number
+
+
+def run_cases(selected, min_time):
+    results = {}
+    for name, factory, params in selected:
+        func = factory(*params.values())
+        timings, number = measure(func, min_time)
+        results[name] = {
+            'min_us': min(timings) * 1e6,
+            'median_us': statistics.median(timings) * 1e6,
+            'mean_us': statistics.fmean(timings) * 1e6,
+            'stddev_us': statistics.pstdev(timings) * 1e6,
+            'rounds': len(timings),
+            'calls_per_round': number,
+        }
+        print(f"{name:<55} median {results[name]['median_us']:>11.2f} us"
+              f"  min {results[name]['min_us']:>11.2f} us  ({len(timings)} x {number})", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print median changes against a baseline; returns the names of regressed cases"""
+    regressions = []
+    print(f"\nAgainst baseline from commit {str(baseline.get('commit'))[:10]} (threshold +{threshold:g}%):")
+    for name, stats in results.items():
+        old = baseline['cases'].get(name)
+        if not old:
+            print(f"  {name:<55} new case")
+            continue
+        change = (stats['median_us'] - old['median_us']) / old['median_us'] * 100
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"  {name:<55} {old['median_us']:>11.2f} -> {stats['median_us']:>11.2f} us  {change:+6.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', dest='keyword', help='only run cases whose name contains this text')
+    parser.add_argument('--min-time', type=float, default=0.3, help='seconds of rounds per case')
+    parser.add_argument('--save', help='write results as a baseline JSON file')
+    parser.add_argument('--compare', help='baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=15.0,
+                        help='percent slowdown of a median that counts as a regression')
+    parser.add_argument('--list', action='store_true', help='list case names and exit')
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    selected = [entry for entry in CASES if not args.keyword or args.keyword in entry[0]]
+    if args.list:
+        print('\n'.join(name for name, _, _ in selected))
+        return
+
+    results = run_cases(selected, args.min_time)
+    commit, dirty = git_commit()
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'micro', 'commit': commit, 'dirty': dirty,
+                       'timestamp': datetime.now().isoformat(timespec='seconds'), 'cases': results}, f, indent=2)
+        print(f"Baseline written to {args.save}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.threshold:g}%")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
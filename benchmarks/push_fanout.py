@@ -0,0 +1,215 @@
+"""
+Push-notification fan-out load test.
+
+Seeds N users with push subscriptions and the standard reminder schedule, starts a
+local stand-in push service, then sends one scheduled minute of reminders with
+PUSH_DELIVERY=http along one of two paths:
+
+    poll      every user's GET /check_reminders/<id> at that minute, from --clients
+              test-client threads, as the frontend's reminder check sends them (default)
+    dispatch  one app.dispatch_due_reminders call, as a once-a-minute scheduler would
+
+Both deliver through push_service.fan_out. The temporary database is removed
+afterwards.
+
+    python -m benchmarks.push_fanout --users 2000 --latency-ms 40 --error-rate 0.05
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.common import load_app, percentile, print_report, temp_database
+
+# Same schedule /setup_reminders creates for every user
+REMINDER_SCHEDULE = [
+    ('meal_breakfast', '08:00', 'Breakfast Time!'),
+    ('meal_lunch', '13:00', 'Lunch Time!'),
+    ('meal_dinner', '19:00', 'Dinner Time!'),
+] + [('water', f'{hour:02d}:00', 'Water Reminder 💧') for hour in range(8, 21, 2)] + [
+    ('doctor_monthly', '10:00', 'Health Checkup Reminder'),
+    ('doctor_quarterly', '10:00', 'Specialist Visit Reminder'),
+]
+
+
+class StandInPushService(ThreadingHTTPServer):
+    """Accepts Web Push POSTs with configurable latency and error rate and records receipts"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, latency_ms=20.0, jitter_ms=5.0, error_rate=0.0, seed=0):
+        super().__init__(('127.0.0.1', 0), _PushHandler)
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.deliveries = {}  # (path, title) -> first successful receipt time
+        self.posts = 0
+        self.errors = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address
+        return f"http://{host}:{port}"
+
+
+class _PushHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with server.lock:
+            delay = max(0.0, server.latency + server.random.uniform(-server.jitter, server.jitter))
+            fail = server.random.random() < server.error_rate
+        time.sleep(delay)
+        received = time.perf_counter()
+
+        with server.lock:
+            server.posts += 1
+            if fail:
+                server.errors += 1
+            else:
+                key = (self.path, json.loads(body).get('title'))
+                server.deliveries.setdefault(key, received)
+
+        self.send_response(503 if fail else 201)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def seed(db_path, users, endpoint_base):
+    """Bulk-insert users, push subscriptions and their reminder schedule"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.executemany('''
+        INSERT INTO users (id, name, age, weight, height, health_conditions, diet_preference, password)
+        VALUES (?, ?, 30, 70, 170, 'normal', 'veg', 'x')
+    ''', [(user_id, f'push_user_{user_id}') for user_id in range(1, users + 1)])
+    cursor.executemany('''
+        INSERT INTO push_subscriptions (user_id, endpoint, p256dh, auth)
+        VALUES (?, ?, 'p256dh-key', 'auth-secret')
+    ''', [(user_id, f'{endpoint_base}/push/{user_id}') for user_id in range(1, users + 1)])
+    cursor.executemany('''
+        INSERT INTO active_reminders (user_id, reminder_type, reminder_time, message, push_title, push_body, action_data)
+        VALUES (?, ?, ?, ?, ?, ?, '{}')
+    ''', [
+        (user_id, reminder_type, reminder_time, title, title, title)
+        for user_id in range(1, users + 1)
+        for reminder_type, reminder_time, title in REMINDER_SCHEDULE
+    ])
+    conn.commit()
+    conn.close()
+
+
+def poll_reminders(app_module, users, minute, clients):
+    """GET /check_reminders for every user from client threads; returns reminders sent"""
+    current_date = datetime.now().strftime('%Y-%m-%d')
+    user_ids = iter(range(1, users + 1))
+    lock = threading.Lock()
+    sent = [0]
+
+    def client():
+        test_client = app_module.app.test_client()
+        while True:
+            with lock:
+                user_id = next(user_ids, None)
+            if user_id is None:
+                return
+            response = test_client.get(f'/check_reminders/{user_id}',
+                                       query_string={'current_time': minute, 'current_date': current_date})
+            with lock:
+                sent[0] += response.get_json()['push_notifications_sent']
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sent[0]
+
+
+def run(users, minute, latency_ms, jitter_ms, error_rate, workers, retries, backoff, path='poll', clients=8):
+    db_path = temp_database('push_fanout_')
+    service = StandInPushService(latency_ms, jitter_ms, error_rate)
+    threading.Thread(target=service.serve_forever, daemon=True).start()
+    try:
+        app_module = load_app(
+            db_path,
+            PUSH_DELIVERY='http',
+            PUSH_WORKERS=workers,
+            PUSH_MAX_RETRIES=retries,
+            PUSH_RETRY_BACKOFF=backoff,
+            RATE_LIMIT=0
+        )
+        seed(db_path, users, service.base_url)
+
+        scheduled_at = time.perf_counter()
+        # The app prints a line per notification
+        with contextlib.redirect_stdout(io.StringIO()):
+            if path == 'dispatch':
+                notifications = len(app_module.dispatch_due_reminders(minute))
+            else:
+                notifications = poll_reminders(app_module, users, minute, clients)
+        elapsed = time.perf_counter() - scheduled_at
+    finally:
+        service.shutdown()
+        shutil.rmtree(os.path.dirname(db_path), ignore_errors=True)
+
+    delays_ms = [(received - scheduled_at) * 1000 for received in service.deliveries.values()]
+    delivered = len(service.deliveries)
+    return {
+        'users': users,
+        'minute': minute,
+        'path': path,
+        'notifications': notifications,
+        'delivered': delivered,
+        'failed': notifications - delivered,
+        'elapsed_s': elapsed,
+        'sends_per_sec': delivered / elapsed if elapsed else 0.0,
+        'dispatch_delay_p50_ms': percentile(delays_ms, 50),
+        'dispatch_delay_p99_ms': percentile(delays_ms, 99),
+        'retries': service.posts - notifications,
+        'push_service_posts': service.posts,
+        'push_service_errors': service.errors,
+        'push_workers': workers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--minute', default='08:00', help='Scheduled HH:MM to dispatch')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Stand-in push service latency')
+    parser.add_argument('--jitter-ms', type=float, default=5.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of POSTs answered with 503')
+    parser.add_argument('--workers', type=int, default=16, help='PUSH_WORKERS for the fan-out pool')
+    parser.add_argument('--retries', type=int, default=2, help='PUSH_MAX_RETRIES')
+    parser.add_argument('--backoff', type=float, default=0.05, help='PUSH_RETRY_BACKOFF in seconds')
+    parser.add_argument('--path', choices=('poll', 'dispatch'), default='poll',
+                        help='per-user /check_reminders requests or one scheduler dispatch')
+    parser.add_argument('--clients', type=int, default=8, help='client threads for --path poll')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    report = run(args.users, args.minute, args.latency_ms, args.jitter_ms, args.error_rate,
+                 args.workers, args.retries, args.backoff, args.path, args.clients)
+    print_report('Push fan-out', report, args.json)
+
+
+if __name__ == '__main__':
+    main()
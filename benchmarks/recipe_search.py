@@ -0,0 +1,69 @@
+"""
+Free-text recipe search latency.
+
+Builds the BM25 recipe index into a temporary directory and times top-k queries
+with and without a health condition and a meal-plan filter.
+
+    python -m benchmarks.recipe_search --queries 20000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+
+from benchmarks.common import percentile, print_report
+
+QUERIES = [
+    'what helps with blood pressure',
+    'high fiber snack',
+    'something rich in protein for dinner',
+    'low calorie foods for weight loss',
+    'good for cholesterol and heart',
+    'foods with potassium',
+    'vitamin c and antioxidants',
+    'quick snack to keep me full',
+    'omega 3 sources',
+    'iron rich vegetables',
+]
+CONDITIONS = [None, 'bp', 'diabetes', 'heart', 'obesity']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--k', type=int, default=3)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    from recipe_index import RECIPES_PATH, load_or_build
+
+    index_dir = tempfile.mkdtemp(prefix='recipe_index_')
+    start = time.perf_counter()
+    index = load_or_build(RECIPES_PATH, index_dir)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(3)
+    plan_keys = set(rng.sample(sorted(index.doc_by_key), min(9, len(index.doc_by_key))))
+    timings = []
+    for n in range(args.queries):
+        query = rng.choice(QUERIES)
+        condition = rng.choice(CONDITIONS)
+        food_keys = plan_keys if n % 2 else None
+        start = time.perf_counter()
+        index.search(query, args.k, condition, food_keys)
+        timings.append((time.perf_counter() - start) * 1e6)
+
+    print_report('Recipe search', {
+        'foods': len(index.names),
+        'terms': len(index.vocab),
+        'build_ms': build_ms,
+        'queries': len(timings),
+        'p50_us': percentile(timings, 50),
+        'p99_us': percentile(timings, 99),
+        'max_us': max(timings),
+    }, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""
+Synthetic database at configurable scale.
+
+Creates the schema through app.init_db, then bulk-loads users (password
+BENCH_PASSWORD), a few weeks of saved plans per user generated by the real
+planner, months of consumption and water history, the standard reminder
+schedule and push subscriptions. Rows are inserted with executemany in large
+batches inside one transaction with journaling and syncing relaxed for the load.
+
+    python -m benchmarks.seed --db /tmp/bench.db --users 5000 --months 3
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sqlite3
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import islice
+
+from benchmarks.common import load_app, print_report, temp_database
+from benchmarks.push_fanout import REMINDER_SCHEDULE
+
+BENCH_PASSWORD = 'bench-password'
+CONDITIONS = ['normal', 'diabetes', 'bp', 'obesity', 'heart']
+DIETS = ['veg', 'non-veg']
+BATCH_SIZE = 20000
+
+
+def bench_user_name(user_id):
+    return f'bench_user_{user_id}'
+
+
+def _batched(rows, size=BATCH_SIZE):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _insert(cursor, sql, rows):
+    count = 0
+    for batch in _batched(rows):
+        cursor.executemany(sql, batch)
+        count += len(batch)
+    return count
+
+
+def seed_database(db_path, users=1000, months=3, plans_per_user=4, water_taps_per_day=6,
+                  raw_water_taps=True, subscription_rate=0.5, seed=7):
+    """Fill db_path (schema created by app.init_db) and return row counts and load time"""
+    app_module = load_app(db_path, CHAT_PRECOMPUTE=0)
+    import planner
+    from water_counters import pack_hourly
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    today = datetime.now().date()
+    days = max(1, months * 30)
+    password_hash = hashlib.sha256(BENCH_PASSWORD.encode()).hexdigest()
+
+    profiles = [(user_id, CONDITIONS[user_id % len(CONDITIONS)], DIETS[(user_id // len(CONDITIONS)) % 2])
+                for user_id in range(1, users + 1)]
+    candidates = {}
+    for _, condition, diet in profiles:
+        if (condition, diet) not in candidates:
+            candidates[(condition, diet)] = planner.plan_candidates(
+                app_module.dataset, planner.new_plan_state(), condition, diet)
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('PRAGMA synchronous = OFF')
+    cursor.execute('PRAGMA journal_mode = MEMORY')
+    counts = Counter()
+
+    counts['users'] = _insert(cursor, '''
+        INSERT INTO users (id, name, age, weight, height, health_conditions, diet_preference, password)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', ((user_id, bench_user_name(user_id), rng.randint(18, 75), round(rng.uniform(45, 110), 1),
+           round(rng.uniform(150, 195), 1), condition, diet, password_hash)
+          for user_id, condition, diet in profiles))
+
+    # Each user's plan history: plans_per_user weekly plans, the newest active
+    plans = {}
+    plan_rows = []
+    for user_id, condition, diet in profiles:
+        state = planner.new_plan_state(weeks=plans_per_user)
+        for week in range(plans_per_user):
+            plan = planner.generate_week(candidates[(condition, diet)], state)
+            week_start = today - timedelta(days=today.weekday() + 7 * (plans_per_user - 1 - week))
+            created = datetime.combine(week_start, datetime.min.time()) + timedelta(hours=9)
+            is_active = week == plans_per_user - 1
+            if is_active:
+                plans[user_id] = plan
+                created = datetime.now().replace(microsecond=0)
+            plan_rows.append((user_id, json.dumps(plan), '{}', week_start.isoformat(),
+                              (week_start + timedelta(days=6)).isoformat(), int(is_active),
+                              created.strftime('%Y-%m-%d %H:%M:%S')))
+    counts['saved_meal_plans'] = _insert(cursor, '''
+        INSERT INTO saved_meal_plans
+        (user_id, plan_data, selected_foods, week_start_date, week_end_date, is_active, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', plan_rows)
+    del plan_rows
+
+    def consumption_rows():
+        for user_id, _, _ in profiles:
+            plan = plans[user_id]
+            for offset in range(days):
+                date = today - timedelta(days=offset)
+                day_plan = plan[planner.DAYS[(date.weekday() + 1) % 7]]
+                for meal_type in planner.MEAL_TYPES:
+                    if rng.random() < 0.8:
+                        for food in day_plan[meal_type]:
+                            yield (user_id, meal_type, food['food'], food.get('calories', 0), food.get('protein', 0),
+                                   food.get('carbs', 0), food.get('fat', 0), date.isoformat())
+
+    counts['consumption_log'] = _insert(cursor, '''
+        INSERT OR IGNORE INTO consumption_log (user_id, meal_type, food_name, calories, protein, carbs, fat, date)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', consumption_rows())
+
+    water_daily = []
+
+    def water_taps():
+        for user_id, _, _ in profiles:
+            for offset in range(days):
+                date = (today - timedelta(days=offset)).isoformat()
+                hourly = [0] * 24
+                taps = max(0, int(rng.gauss(water_taps_per_day, 2)))
+                for _ in range(taps):
+                    hour = rng.randint(7, 22)
+                    hourly[hour] += 1
+                    yield (user_id, 1, f'{hour:02d}:{rng.randint(0, 59):02d}', date)
+                if taps:
+                    water_daily.append((user_id, date, taps, taps, pack_hourly(hourly)))
+
+    if raw_water_taps:
+        counts['water_consumption'] = _insert(cursor, '''
+            INSERT INTO water_consumption (user_id, glasses, consumed_time, consumed_date) VALUES (?, ?, ?, ?)
+        ''', water_taps())
+    else:
+        for _ in water_taps():
+            pass
+    counts['water_daily'] = _insert(cursor, '''
+        INSERT INTO water_daily (user_id, consumed_date, total, taps, hourly) VALUES (?, ?, ?, ?, ?)
+    ''', water_daily)
+    del water_daily
+
+    counts['active_reminders'] = _insert(cursor, '''
+        INSERT INTO active_reminders (user_id, reminder_type, reminder_time, message, push_title, push_body, action_data)
+        VALUES (?, ?, ?, ?, ?, ?, '{}')
+    ''', ((user_id, reminder_type, reminder_time, title, title, title)
+          for user_id, _, _ in profiles for reminder_type, reminder_time, title in REMINDER_SCHEDULE))
+
+    counts['push_subscriptions'] = _insert(cursor, '''
+        INSERT INTO push_subscriptions (user_id, endpoint, p256dh, auth) VALUES (?, ?, 'p256dh-key', 'auth-secret')
+    ''', ((user_id, f'http://127.0.0.1:9/push/{user_id}')
+          for user_id, _, _ in profiles if rng.random() < subscription_rate))
+
+    conn.commit()
+    cursor.execute('PRAGMA journal_mode = DELETE')
+    cursor.execute('ANALYZE')
+    conn.close()
+
+    report = dict(counts)
+    report['months'] = months
+    report['load_s'] = time.perf_counter() - started
+    report['db_path'] = db_path
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', help='database file to create (default: a temporary file)')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--months', type=int, default=3)
+    parser.add_argument('--plans-per-user', type=int, default=4)
+    parser.add_argument('--water-taps-per-day', type=int, default=6)
+    parser.add_argument('--no-raw-water-taps', action='store_true', help='only write water_daily rows')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    report = seed_database(args.db or temp_database('diet_seed_'), args.users, args.months, args.plans_per_user,
+                           args.water_taps_per_day, not args.no_raw_water_taps)
+    print_report('Seeded database', report, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+JSON encoding and compression cost of the largest responses.
+
+Captures real payloads from a seeded database through the test client - a
+generated one-week and 12-week plan, the saved plan, available foods and the
+weekly dashboard - then times Flask's stdlib JSON provider against the orjson
+provider (json_provider.py) building the response, and reports the encoded size
+with the time to gzip and brotli it at a few levels.
+
+    python -m benchmarks.serialization --users 50
+"""
+
+import argparse
+import time
+
+from benchmarks.common import load_app, temp_database
+from benchmarks.seed import seed_database
+
+GZIP_LEVELS = (1, 6, 9)
+BROTLI_QUALITIES = (1, 4, 5, 6)
+
+
+def per_call_us(func, min_time=0.3):
+    func()
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / calls * 1e6
+
+
+def capture_payloads(app_module, user_id=1):
+    client = app_module.app.test_client()
+    return {
+        'generate_weekly_meal_plan': client.post('/generate_weekly_meal_plan', json={'user_id': user_id}).get_json(),
+        'generate_weekly_meal_plan(12w)': client.post('/generate_weekly_meal_plan',
+                                                      json={'user_id': user_id, 'weeks': 12}).get_json(),
+        'get_saved_meal_plan': client.get(f'/get_saved_meal_plan/{user_id}').get_json(),
+        'available_foods': client.get(f'/available_foods/{user_id}').get_json(),
+        'get_weekly_dashboard': client.get(f'/get_weekly_dashboard/{user_id}').get_json(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--min-time', type=float, default=0.3, help='seconds of calls per measurement')
+    args = parser.parse_args()
+
+    db_path = temp_database('diet_serialization_')
+    seed_database(db_path, users=args.users, months=1)
+    app_module = load_app(db_path, CHAT_PRECOMPUTE=0)
+    import compression
+    from flask.json.provider import DefaultJSONProvider
+    from json_provider import OrjsonProvider, orjson
+
+    app = app_module.app
+    providers = {'stdlib': DefaultJSONProvider(app)}
+    if orjson is not None:
+        providers['orjson'] = OrjsonProvider(app)
+    brotli_qualities = BROTLI_QUALITIES if compression.brotli else ()
+
+    payloads = capture_payloads(app_module)
+    with app.app_context():
+        for name, payload in payloads.items():
+            print(name)
+            for provider_name, provider in providers.items():
+                body = provider.response(payload).get_data()
+                us = per_call_us(lambda: provider.response(payload).get_data(), args.min_time)
+                print(f"  {provider_name:<8} encode {us:>9.1f} us  {len(body):>8} bytes")
+            for level in GZIP_LEVELS:
+                compression.GZIP_LEVEL = level
+                size = len(compression.compress(body, 'gzip'))
+                us = per_call_us(lambda: compression.compress(body, 'gzip'), args.min_time)
+                print(f"  gzip-{level:<3} {us:>9.1f} us  {size:>8} bytes ({size / len(body):.0%})")
+            for quality in brotli_qualities:
+                compression.BROTLI_QUALITY = quality
+                size = len(compression.compress(body, 'br'))
+                us = per_call_us(lambda: compression.compress(body, 'br'), args.min_time)
+                print(f"  br-{quality:<5} {us:>9.1f} us  {size:>8} bytes ({size / len(body):.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Throughput of the production server against the development server.
+
+Seeds a temporary database with users and saved weekly plans, starts the app
+as a subprocess and drives a mix of read and write routes from client threads
+for a fixed time, once per server mode:
+
+    dev    app.run(debug=True), as at the bottom of app.py (without the reloader)
+    serve  python serve.py with --workers/--threads
+
+    python -m benchmarks.serving --users 200 --clients 16 --seconds 20 --workers 3
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+from benchmarks.common import load_app, percentile, print_report, running_server, temp_database
+
+
+def seed(db_path, users):
+    """Users with a saved weekly plan each, created through the app itself"""
+    app_module = load_app(db_path, CHAT_PRECOMPUTE=0, RATE_LIMIT=0)
+    conn = app_module.get_db()
+    conn.executemany(
+        "INSERT INTO users (name, age, weight, height, health_conditions, diet_preference, password) "
+        "VALUES (?, 30, 70, 170, ?, ?, 'x')",
+        [(f'user{n}', ['normal', 'diabetes', 'bp', 'obesity'][n % 4], ['veg', 'non-veg'][n % 2])
+         for n in range(users)])
+    conn.commit()
+    conn.close()
+
+    client = app_module.app.test_client()
+    for user_id in range(1, users + 1):
+        plan = client.post('/generate_weekly_meal_plan', json={'user_id': user_id}).get_json()
+        client.post('/save_meal_plan', json={'user_id': user_id, 'meal_plan': plan['meal_plan']})
+    return app_module.dataset['food'].tolist()
+
+
+def request_mix(users, foods, rng):
+    """(method, path, body) for one request of the benchmark's route mix"""
+    user_id = rng.randint(1, users)
+    roll = rng.random()
+    if roll < 0.30:
+        return 'POST', '/chat', {'user_id': user_id, 'current_day': 'Monday',
+                                 'message': rng.choice(['help', 'what is for dinner', 'recipe for lunch on friday'])}
+    if roll < 0.50:
+        return 'GET', f'/get_water_progress/{user_id}', None
+    if roll < 0.65:
+        return 'POST', '/mark_water_consumed', {'user_id': user_id, 'glasses': 1,
+                                                'consumed_date': datetime.now().strftime('%Y-%m-%d')}
+    if roll < 0.80:
+        return 'GET', f'/available_foods/{user_id}', None
+    if roll < 0.90:
+        return 'POST', '/substitute', {'user_id': user_id, 'food': rng.choice(foods)}
+    return 'GET', f'/get_saved_meal_plan/{user_id}', None
+
+
+def drive(base_url, users, foods, clients, seconds):
+    """Run client threads for the given time; returns (latencies in ms, error count)"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client(n):
+        rng = random.Random(n)
+        local = []
+        failed = 0
+        while time.monotonic() < deadline:
+            method, path, body = request_mix(users, foods, rng)
+            data = json.dumps(body).encode() if body is not None else None
+            req = urllib.request.Request(base_url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=30) as resp:
+                    resp.read()
+            except (urllib.error.URLError, OSError):
+                failed += 1
+                continue
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+
+def run_mode(mode, args, db_path, foods):
+    with running_server(mode, db_path, args.workers, args.threads, env={'CHAT_PRECOMPUTE': '0', 'RATE_LIMIT': '0'}) as base_url:
+        drive(base_url, args.users, foods, args.clients, min(args.seconds, 3))  # warm-up
+        latencies, errors = drive(base_url, args.users, foods, args.clients, args.seconds)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'req_per_s': len(latencies) / args.seconds,
+        'p50_ms': percentile(latencies, 50),
+        'p99_ms': percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--workers', type=int, default=(os.cpu_count() or 1) * 2 + 1)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--modes', default='dev,serve')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    db_path = temp_database()
+    foods = seed(db_path, args.users)
+
+    report = {'users': args.users, 'clients': args.clients, 'seconds': args.seconds,
+              'workers': args.workers, 'threads': args.threads, 'cpus': os.cpu_count()}
+    for mode in args.modes.split(','):
+        for key, value in run_mode(mode, args, db_path, foods).items():
+            report[f'{mode}_{key}'] = value
+    print_report('Serving throughput', report, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Food substitution query latency on a large synthetic catalog.
+
+Scales training_dataset.csv up to --foods rows by jittering its nutrient values,
+builds the per-partition KD-trees and times /substitute-style queries with a
+mix of conditions, diets and constraints.
+
+    python -m benchmarks.substitutes --foods 50000
+    python -m benchmarks.substitutes --foods 50000 --no-tree   # NumPy scan fallback
+"""
+
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import REPO_ROOT, percentile, print_report
+
+
+def synthetic_catalog(size, seed=5):
+    base = pd.read_csv(os.path.join(REPO_ROOT, 'training_dataset.csv'))
+    rng = np.random.default_rng(seed)
+    catalog = base.sample(n=size, replace=True, random_state=seed).reset_index(drop=True)
+    catalog['food'] = [f"{name} #{n}" for n, name in enumerate(catalog['food'])]
+    for column in ('calories', 'protein', 'carbs', 'fat', 'price'):
+        catalog[column] = (catalog[column] * rng.uniform(0.7, 1.3, size)).round(1)
+    return catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--foods', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--no-tree', action='store_true', help='use the NumPy scan instead of KD-trees')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    import substitutes
+    if args.no_tree:
+        substitutes.KDTree = None
+
+    catalog = synthetic_catalog(args.foods)
+    start = time.perf_counter()
+    index = substitutes.SubstituteIndex(catalog)
+    build_s = time.perf_counter() - start
+
+    rng = random.Random(9)
+    names = catalog['food'].tolist()
+    choices = [
+        ([], 'any', None),
+        (['diabetes'], 'any', None),
+        (['heart'], 'veg', None),
+        (['bp'], 'veg', {'max_fat': 5}),
+        (['obesity'], 'any', {'max_calories': 150, 'min_protein': 5}),
+    ]
+    timings = []
+    found = 0
+    for _ in range(args.queries):
+        conditions, diet, constraints = rng.choice(choices)
+        start = time.perf_counter()
+        results = index.substitutes(rng.choice(names), args.k, None, conditions, diet, constraints)
+        timings.append((time.perf_counter() - start) * 1e6)
+        found += len(results)
+
+    print_report('Food substitution', {
+        'foods': args.foods,
+        'partitions': len(index.partitions),
+        'kd_trees': substitutes.KDTree is not None,
+        'build_s': build_s,
+        'queries': len(timings),
+        'avg_results': found / len(timings),
+        'p50_us': percentile(timings, 50),
+        'p99_us': percentile(timings, 99),
+    }, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,320 @@
+"""
+SQLite write-contention stress test.
+
+Hammers the write routes - /mark_consumed_for_date, /mark_water_consumed,
+/save_meal_plan and /setup_reminders - from --processes forked workers running
+--threads test-client threads each, all against one database file, the way
+serve.py workers share it. Water taps are written through
+(WATER_FLUSH_INTERVAL=0) so every route waits on SQLite.
+
+Per route it reports throughput, the error rate ("database is locked" counted
+separately), request latency and lock-wait time. Python's sqlite3 does not
+expose the busy handler, so lock wait is the time a request spent in SQLite
+calls (execute, fetch and commit) beyond that route's median in an uncontended
+single-thread pass that runs first. With fewer cores than client threads this
+also includes time a thread was descheduled inside SQLite, so compare runs
+made on the same machine.
+
+    python -m benchmarks.write_contention --processes 4 --threads 8 --seconds 20
+    python -m benchmarks.write_contention --journal-mode wal --out benchmarks/results/contention-baseline.json
+    python -m benchmarks.write_contention --compare benchmarks/results/contention-baseline.json --max-error-rate 0
+
+With --compare the exit status is 1 when total throughput drops, or p95 lock
+wait grows, by more than --threshold percent against the baseline;
+--max-error-rate fails the run on its own.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.common import git_commit, load_app, percentile, temp_database
+from benchmarks.e2e import Workload
+from benchmarks.seed import seed_database
+
+WRITE_MIX = {
+    'mark_consumed_for_date': 4,
+    'mark_water_consumed': 6,
+    'save_meal_plan': 1,
+    'setup_reminders': 1,
+}
+LOCKED = 'database is locked'
+# p95 lock waits below this are noise and never count as a regression
+LOCK_WAIT_FLOOR_MS = 1.0
+
+_sql_time = threading.local()
+
+
+# ---------------- SQL timing ----------------
+def _timed(call, *args):
+    start = time.perf_counter()
+    try:
+        return call(*args)
+    finally:
+        _sql_time.seconds = getattr(_sql_time, 'seconds', 0.0) + time.perf_counter() - start
+
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        return _timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return _timed(super().executemany, sql, seq_of_parameters)
+
+    def fetchone(self):
+        return _timed(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return _timed(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return _timed(super().fetchall)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection that adds the time spent in SQLite, commits included, to the calling thread"""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        return _timed(super().commit)
+
+
+# ---------------- Load ----------------
+class WriteWorkload(Workload):
+    """The e2e request mix narrowed to the routes that write"""
+
+    def __init__(self, users, foods_by_meal, sample_plan, mix=WRITE_MIX):
+        super().__init__(users, foods_by_meal, sample_plan)
+        builders = {name: build for name, _, build in self.routes}
+        builders['setup_reminders'] = lambda rng, u: ('POST', '/setup_reminders', {'user_id': u})
+        self.routes = [(name, weight, builders[name]) for name, weight in mix.items()]
+        self.names = [name for name, _, _ in self.routes]
+        self.weights = [weight for _, weight, _ in self.routes]
+
+
+def hammer(app_module, workload, deadline, seed):
+    """Send requests until deadline; returns {route: [(latency ms, sql ms, outcome)]}"""
+    client = app_module.app.test_client()
+    rng = random.Random(seed)
+    samples = {name: [] for name in workload.names}
+    while time.monotonic() < deadline:
+        name, method, path, body = workload.next_request(rng)
+        _sql_time.seconds = 0.0
+        start = time.perf_counter()
+        response = client.open(path, method=method, json=body)
+        text = response.get_data(as_text=True)
+        latency_ms = (time.perf_counter() - start) * 1000
+        if response.status_code < 400:
+            outcome = 'ok'
+        elif LOCKED in text:
+            outcome = 'locked'
+        else:
+            outcome = 'error'
+        samples[name].append((latency_ms, _sql_time.seconds * 1000, outcome))
+    return samples
+
+
+def _merge(into, samples):
+    for name, items in samples.items():
+        into.setdefault(name, []).extend(items)
+
+
+def _worker(app_module, workload, threads, seconds, seed, go, results):
+    go.wait()
+    deadline = time.monotonic() + seconds
+    merged = {}
+    lock = threading.Lock()
+
+    def run(n):
+        samples = hammer(app_module, workload, deadline, seed * 1000 + n)
+        with lock:
+            _merge(merged, samples)
+
+    pool = [threading.Thread(target=run, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put(merged)
+
+
+def stress(app_module, workload, processes, threads, seconds, seed=0):
+    """Run the workload from forked processes at once; returns merged samples"""
+    context = multiprocessing.get_context('fork')
+    go = context.Event()
+    results = context.Queue()
+    workers = [context.Process(target=_worker, args=(app_module, workload, threads, seconds, seed + n, go, results))
+               for n in range(processes)]
+    for worker in workers:
+        worker.start()
+    go.set()
+    merged = {}
+    for _ in workers:
+        _merge(merged, results.get())
+    for worker in workers:
+        worker.join()
+    return merged
+
+
+# ---------------- Report ----------------
+def summarize(samples, uncontended, seconds):
+    """Per-route and total stats; lock wait is SQL time above the uncontended median"""
+    def stats(items, baselines):
+        latencies = [latency for latency, _, outcome in items if outcome == 'ok']
+        waits = [max(0.0, sql_ms - baseline) for (_, sql_ms, _), baseline in zip(items, baselines)]
+        locked = sum(1 for _, _, outcome in items if outcome == 'locked')
+        errors = sum(1 for _, _, outcome in items if outcome == 'error')
+        return {
+            'requests': len(items),
+            'locked': locked,
+            'errors': errors,
+            'error_rate': round((locked + errors) / len(items), 4) if items else 0.0,
+            'req_per_s': round(len(latencies) / seconds, 2),
+            'p50_ms': round(percentile(latencies, 50), 3) if latencies else None,
+            'p99_ms': round(percentile(latencies, 99), 3) if latencies else None,
+            'lock_wait_mean_ms': round(statistics.fmean(waits), 3) if waits else None,
+            'lock_wait_p95_ms': round(percentile(waits, 95), 3) if waits else None,
+            'lock_wait_p99_ms': round(percentile(waits, 99), 3) if waits else None,
+            'lock_wait_total_s': round(sum(waits) / 1000, 3),
+        }
+    routes = {name: stats(items, [uncontended.get(name, 0.0)] * len(items)) for name, items in samples.items()}
+    all_items = [item for items in samples.values() for item in items]
+    all_baselines = [uncontended.get(name, 0.0) for name, items in samples.items() for _ in items]
+    return routes, stats(all_items, all_baselines)
+
+
+def print_table(routes, total):
+    columns = ('requests', 'locked', 'errors', 'req_per_s', 'p50_ms', 'p99_ms',
+               'lock_wait_mean_ms', 'lock_wait_p95_ms', 'lock_wait_p99_ms')
+    width = max(len(name) for name in list(routes) + ['total'])
+    print('route'.ljust(width) + ''.join(column.replace('lock_wait_', 'wait_').rjust(13) for column in columns))
+    for name, stats in list(routes.items()) + [('total', total)]:
+        print(name.ljust(width) + ''.join(('-' if stats[column] is None else f'{stats[column]:g}').rjust(13)
+                                          for column in columns))
+
+
+def compare(total, baseline, threshold):
+    """Describe regressions of total throughput and p95 lock wait against a baseline report"""
+    old = baseline['total']
+    problems = []
+    if old['req_per_s'] and total['req_per_s'] < old['req_per_s'] * (1 - threshold / 100):
+        problems.append(f"throughput {old['req_per_s']:g} -> {total['req_per_s']:g} req/s")
+    old_wait = max(old['lock_wait_p95_ms'] or 0.0, LOCK_WAIT_FLOOR_MS)
+    if (total['lock_wait_p95_ms'] or 0.0) > old_wait * (1 + threshold / 100):
+        problems.append(f"p95 lock wait {old['lock_wait_p95_ms']:g} -> {total['lock_wait_p95_ms']:g} ms")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', help='reuse a database seeded by benchmarks.seed instead of seeding one')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--months', type=int, default=1)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--calibrate-seconds', type=float, default=3,
+                        help='length of the uncontended single-thread pass')
+    parser.add_argument('--journal-mode', choices=('delete', 'truncate', 'persist', 'wal'),
+                        help='switch the database file to this journal mode first (default: leave it)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='write the report as JSON to this file (e.g. a baseline)')
+    parser.add_argument('--compare', help='baseline report to gate against')
+    parser.add_argument('--threshold', type=float, default=20.0,
+                        help='percent throughput drop or p95 lock-wait growth that counts as a regression')
+    parser.add_argument('--max-error-rate', type=float, help='fail when more than this fraction of requests fail')
+    args = parser.parse_args()
+
+    # Read by the app at import time: taps go straight to SQLite, no precompute, metrics work or rate limits
+    settings = {'WATER_FLUSH_INTERVAL': '0', 'CHAT_PRECOMPUTE': '0', 'METRICS_SAMPLE_RATE': '0', 'RATE_LIMIT': '0'}
+    os.environ.update(settings)
+    if args.db:
+        app_module = load_app(args.db)
+        conn = app_module.get_db()
+        users = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+        conn.close()
+        db_path = args.db
+    else:
+        seed_report = seed_database(temp_database('diet_contention_'), args.users, args.months)
+        users, db_path = seed_report['users'], seed_report['db_path']
+    import app as app_module
+    import metrics
+    import planner
+
+    conn = sqlite3.connect(db_path)
+    if args.journal_mode:
+        conn.execute(f'PRAGMA journal_mode={args.journal_mode}')
+    journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+    conn.close()
+    # get_db() opens connections with factory=metrics.Connection
+    metrics.Connection = TimedConnection
+
+    dataset = app_module.dataset
+    foods_by_meal = {
+        meal_type: [planner.plan_item(food) for food in dataset[dataset['meal'] == meal_type].to_dict('records')]
+        for meal_type in planner.MEAL_TYPES
+    }
+    sample_plan = planner.generate_week(planner.plan_candidates(dataset, planner.new_plan_state(), 'normal', 'veg'),
+                                        planner.new_plan_state())
+    workload = WriteWorkload(users, foods_by_meal, sample_plan)
+
+    calibration = hammer(app_module, workload, time.monotonic() + args.calibrate_seconds, args.seed + 1)
+    uncontended = {name: statistics.median(sql_ms for _, sql_ms, _ in items) if items else 0.0
+                   for name, items in calibration.items()}
+    samples = stress(app_module, workload, args.processes, args.threads, args.seconds, args.seed)
+    routes, total = summarize(samples, uncontended, args.seconds)
+
+    print(f"{args.processes} processes x {args.threads} threads for {args.seconds:g}s, journal_mode={journal_mode}")
+    print('uncontended SQL ms: ' + ', '.join(f'{name} {ms:.3f}' for name, ms in uncontended.items()))
+    print_table(routes, total)
+
+    commit, dirty = git_commit()
+    report = {
+        'benchmark': 'write_contention',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'dirty': dirty,
+        'config': {key: getattr(args, key) for key in ('processes', 'threads', 'seconds', 'users', 'months', 'seed')},
+        'journal_mode': journal_mode,
+        'cpus': os.cpu_count(),
+        'uncontended_sql_ms': uncontended,
+        'routes': routes,
+        'total': total,
+    }
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.out}")
+
+    problems = []
+    if args.max_error_rate is not None and total['error_rate'] > args.max_error_rate:
+        problems.append(f"error rate {total['error_rate']:g} above {args.max_error_rate:g}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.compare} (commit {str(baseline.get('commit'))[:10]}, threshold {args.threshold:g}%)")
+        problems += compare(total, baseline, args.threshold)
+    if problems:
+        print('FAILED: ' + '; '.join(problems))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Precomputed chat answers.
+
+Meal answers and default suggestions depend only on the plan, the day, the meal
+type and the user's condition. When a plan is saved, a background job renders
+all of them (3 meals + suggestions per day, 28 for a weekly plan) and stores
+them in chat_answers keyed by plan id, so /chat serves them with one primary-key
+lookup and only generates live answers for other questions. Rows carry the
+recipe store signature they were rendered with and are ignored once
+food_recipes.json changes. Editing a plan cell in place deletes that day's rows
+in the same transaction, so /chat never serves an answer for the old cell.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+PRECOMPUTE = os.environ.get('CHAT_PRECOMPUTE', '1') != '0'
+MEAL_TYPES = ('morning', 'afternoon', 'dinner')
+HELP = 'help'
+
+_executor = None
+_executor_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'jobs': 0, 'answers_stored': 0}
+
+
+def ensure_chat_answers_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS chat_answers (
+            plan_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            intent TEXT NOT NULL,
+            user_condition TEXT NOT NULL,
+            recipes_signature TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (plan_id, day, intent, user_condition)
+        ) WITHOUT ROWID
+    ''')
+
+
+def answer_slot(intent, current_day, user_condition):
+    """(day, intent, condition) of a precomputable answer for a message, or None"""
+    if intent['is_help']:
+        return (current_day, HELP, '')
+    if intent['meal_type'] and intent['condition'] in (None, user_condition):
+        return (intent['day'] or current_day, intent['meal_type'], user_condition)
+    return None
+
+
+def fetch_answer(conn, plan_id, slot, signature):
+    """Stored answer for a plan and slot, or None"""
+    day, intent, condition = slot
+    row = conn.execute('''
+        SELECT response FROM chat_answers
+        WHERE plan_id = ? AND day = ? AND intent = ? AND user_condition = ? AND recipes_signature = ?
+    ''', (plan_id, day, intent, condition, signature)).fetchone()
+    with _stats_lock:
+        _stats['hits' if row else 'misses'] += 1
+    return row[0] if row else None
+
+
+def delete_day_answers(cursor, plan_id, day):
+    """Drop a plan day's stored answers; call in the transaction that edits that day in place"""
+    cursor.execute('DELETE FROM chat_answers WHERE plan_id = ? AND day = ?', (plan_id, day))
+
+
+def store_answers(conn, user_id, plan_id, answers, signature):
+    """Replace a user's stored answers with [(day, intent, condition, response)] for plan_id"""
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        # Answers for the user's replaced plans are never served again
+        cursor.execute('''
+            DELETE FROM chat_answers WHERE plan_id IN (
+                SELECT id FROM saved_meal_plans WHERE user_id = ? AND id != ?
+            )
+        ''', (user_id, plan_id))
+        cursor.executemany('''
+            INSERT OR REPLACE INTO chat_answers (plan_id, day, intent, user_condition, recipes_signature, response)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(plan_id, day, intent, condition, signature, response) for day, intent, condition, response in answers])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    with _stats_lock:
+        _stats['jobs'] += 1
+        _stats['answers_stored'] += len(answers)
+
+
+def submit(job, *args):
+    """Run job(*args) on the single background precompute thread"""
+    global _executor
+    if not PRECOMPUTE:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chat-precompute')
+    return _executor.submit(job, *args)
+
+
+def stats():
+    with _stats_lock:
+        lookups = _stats['hits'] + _stats['misses']
+        return dict(_stats, enabled=PRECOMPUTE, hit_rate=round(_stats['hits'] / lookups, 4) if lookups else 0.0)
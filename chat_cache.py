@@ -0,0 +1,146 @@
+"""
+Chat response cache.
+
+Chat responses are pure functions of the active meal plan, the day being viewed,
+the detected intent and the user's health condition, so they are cached in an
+LRU keyed by (plan content hash, day, intent, condition). Keys use the plan's
+content rather than the user, so a replaced plan can never serve a stale answer
+and users with identical plans share entries. Each user's chat context (health
+condition and parsed active plan) is cached for CONTEXT_TTL seconds, so most
+chats skip the database entirely; /save_meal_plan drops that entry.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from recipe_store import normalize_name
+
+CACHE_SIZE = int(os.environ.get('CHAT_CACHE_SIZE', '2048'))
+CONTEXT_CACHE_SIZE = int(os.environ.get('CHAT_CONTEXT_CACHE_SIZE', '1024'))
+CONTEXT_TTL = float(os.environ.get('CHAT_CONTEXT_TTL', '30'))
+
+
+def plan_fingerprint(meal_plan):
+    """Stable content hash of a meal plan, or None when there is no plan"""
+    if not meal_plan:
+        return None
+    blob = json.dumps(meal_plan, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(blob.encode('utf-8')).hexdigest()
+
+
+def response_key(plan_key, current_day, user_condition, intent, version=0, message=''):
+    """Cache key for a chat response; help answers don't depend on the condition"""
+    if intent['is_help']:
+        return (plan_key, current_day, None, 'help', version)
+    # Answers without a meal or food come from a free-text search, so the wording matters
+    query = normalize_name(message) if not (intent['meal_type'] or intent['foods']) else None
+    # A day named in the message replaces the current one, so "monday breakfast" shares Monday's key
+    return (plan_key, intent['day'] or current_day, user_condition,
+            (intent['meal_type'], intent['condition'], tuple(intent['foods']), query), version)
+
+
+class _LRU:
+    def __init__(self, max_size, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            deadline, value = self.items[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        if deadline is not None and deadline <= time.monotonic():
+            del self.items[key]
+            self.misses += 1
+            raise KeyError(key)
+        self.items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        deadline = time.monotonic() + self.ttl if self.ttl is not None else None
+        self.items[key] = (deadline, value)
+        self.items.move_to_end(key)
+        while len(self.items) > self.max_size:
+            self.items.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.items),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class ResponseCache:
+    """LRU of chat responses plus a short-lived cache of each user's chat context"""
+
+    def __init__(self, max_size=CACHE_SIZE, context_cache_size=CONTEXT_CACHE_SIZE, context_ttl=CONTEXT_TTL):
+        self._lock = threading.Lock()
+        self._responses = _LRU(max_size)
+        self._contexts = _LRU(context_cache_size, context_ttl)
+
+    def get_or_build(self, key, build):
+        """Cached response for key, calling build() on a miss"""
+        with self._lock:
+            try:
+                return self._responses.get(key)
+            except KeyError:
+                pass
+        response = build()
+        with self._lock:
+            self._responses.put(key, response)
+        return response
+
+    def get(self, key):
+        """Cached response for key, or None"""
+        with self._lock:
+            try:
+                return self._responses.get(key)
+            except KeyError:
+                return None
+
+    def put(self, key, response):
+        with self._lock:
+            self._responses.put(key, response)
+
+    def user_context(self, user_id, load):
+        """The user's chat context, calling load() when it is missing or older than the TTL"""
+        with self._lock:
+            try:
+                return self._contexts.get(user_id)
+            except KeyError:
+                pass
+        context = load()
+        with self._lock:
+            self._contexts.put(user_id, context)
+        return context
+
+    def invalidate_user(self, user_id):
+        """Forget a user's cached context, e.g. after their active plan changes"""
+        with self._lock:
+            self._contexts.items.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._responses.items.clear()
+            self._contexts.items.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'responses': self._responses.stats(), 'contexts': self._contexts.stats()}
+
+
+response_cache = ResponseCache()
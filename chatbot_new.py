@@ -1,495 +1,721 @@
-#!/usr/bin/env python3
-"""
-New AI Recipe Assistant Chatbot - Fixed Version
-Addresses:
-1. Wrong day detection (should use current meal plan page day)
-2. Missing default suggestions when chat opens
-3. Should use actual foods from user's meal plan
-4. Should consider user's health condition
-"""
-
-from flask import jsonify
-from datetime import datetime
-import json
-
-def chat_with_ai_fixed(data, get_db_func):
-    """Fixed AI Recipe Assistant - Provides cooking instructions based on user's meal plan"""
-    try:
-        user_message = data.get("message", "").strip()
-        user_id = data.get("user_id")
-        current_day = data.get("current_day")  # Get day from frontend (Sunday, Monday, etc.)
-        
-        if not user_message:
-            return jsonify({"error": "Message is required"}), 400
-        
-        # If no current_day provided, determine from today's date
-        if not current_day:
-            today = datetime.now()
-            days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
-            current_day = days[today.weekday() + 1 if today.weekday() != 6 else 0]
-        
-        # Get user's health condition
-        user_condition = "normal"
-        if user_id:
-            try:
-                conn = get_db_func()
-                cur = conn.cursor()
-                cur.execute("SELECT health_conditions FROM users WHERE id=?", (user_id,))
-                user = cur.fetchone()
-                if user and user[0]:
-                    user_condition = user[0].split(",")[0].strip().lower()
-                conn.close()
-            except Exception as e:
-                print(f"Error fetching user condition: {e}")
-        
-        # Get user's meal plan from request data (sent by frontend) or database
-        meal_plan = data.get('meal_plan')  # First try to get from frontend
-        if not meal_plan and user_id:
-            try:
-                conn = get_db_func()
-                cur = conn.cursor()
-                cur.execute("""
-                    SELECT plan_data FROM saved_meal_plans 
-                    WHERE user_id=? AND is_active=1
-                    ORDER BY created_at DESC
-                    LIMIT 1
-                """, (user_id,))
-                plan_row = cur.fetchone()
-                if plan_row:
-                    meal_plan = json.loads(plan_row[0])
-                conn.close()
-            except Exception as e:
-                print(f"Error fetching meal plan: {e}")
-        
-        print(f"DEBUG: Meal plan source: {'frontend' if data.get('meal_plan') else 'database'}")
-        print(f"DEBUG: Meal plan keys: {list(meal_plan.keys()) if meal_plan else 'None'}")
-        
-        # Check if this is a default questions request or first time opening
-        if user_message.lower() in ['default', 'help', 'suggestions', 'what can you do', 'hello']:
-            return jsonify({
-                "response": get_default_suggestions(current_day, meal_plan),
-                "current_day": current_day,
-                "user_condition": user_condition,
-                "timestamp": datetime.now().isoformat()
-            })
-        
-        # Generate response based on user message
-        response = generate_recipe_response_fixed(user_message, current_day, meal_plan, user_condition)
-        
-        return jsonify({
-            "response": response,
-            "current_day": current_day,
-            "user_condition": user_condition,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-    except Exception as e:
-        print(f"Chat error: {e}")
-        return jsonify({
-            "response": get_default_suggestions(current_day if 'current_day' in locals() else 'Today', None),
-            "timestamp": datetime.now().isoformat()
-        })
-
-def get_default_suggestions(current_day, meal_plan):
-    """Get default suggested questions based on current day and meal plan"""
-    
-    # Get available meals for the current day
-    available_meals = []
-    day_foods = {}
-    
-    if meal_plan and current_day in meal_plan:
-        day_plan = meal_plan[current_day]
-        if 'morning' in day_plan and day_plan['morning']:
-            available_meals.append('breakfast')
-            day_foods['breakfast'] = [item.get('food', '') for item in day_plan['morning'] if isinstance(item, dict)]
-        if 'afternoon' in day_plan and day_plan['afternoon']:
-            available_meals.append('lunch')
-            day_foods['lunch'] = [item.get('food', '') for item in day_plan['afternoon'] if isinstance(item, dict)]
-        if 'dinner' in day_plan and day_plan['dinner']:
-            available_meals.append('dinner')
-            day_foods['dinner'] = [item.get('food', '') for item in day_plan['dinner'] if isinstance(item, dict)]
-    
-    if not available_meals:
-        available_meals = ['breakfast', 'lunch', 'dinner']
-        day_foods = {
-            'breakfast': ['Watermelon', 'Oats', 'Boiled Egg'],
-            'lunch': ['Chicken', 'Rice', 'Vegetables'],
-            'dinner': ['Fish', 'Quinoa', 'Spinach']
-        }
-    
-    response = f"🍳 AI Recipe Assistant\n"
-    response += f"Ask me how to prepare your foods!\n"
-    response += f"📅 Today is {current_day} - Here are some questions you can ask:\n"
-    
-    # Generate meal-specific suggestions with actual foods
-    meal_emojis = {'breakfast': '🌅', 'lunch': '🌞', 'dinner': '🌙'}
-    
-    for meal in available_meals:
-        emoji = meal_emojis.get(meal, '🍽️')
-        foods = day_foods.get(meal, [])
-        food_list = ', '.join(foods[:3]) if foods else f"{meal} foods"
-        response += f"\n{emoji} {meal.title()}: '{food_list}'\n   Try: 'Help me cook {current_day} {meal} foods'\n"
-    
-    response += f"\nOther questions you can ask:\n"
-    response += f"• 'How to cook [food name]?'\n"
-    response += f"• 'Recipe for [specific food]'\n"
-    response += f"• 'Healthy cooking tips for [condition]'"
-    
-    return response
-
-def generate_recipe_response_fixed(message, current_day, meal_plan, user_condition):
-    """Generate recipe response based on user message and meal plan - matching reference image format"""
-    message_lower = message.lower()
-    
-    # Detect meal type from user message
-    meal_type = None
-    if any(word in message_lower for word in ['breakfast', 'morning']):
-        meal_type = 'morning'
-    elif any(word in message_lower for word in ['lunch', 'afternoon']):
-        meal_type = 'afternoon'  
-    elif any(word in message_lower for word in ['dinner', 'evening']):
-        meal_type = 'dinner'
-    
-    # Get foods for the detected meal type from the CURRENT DAY
-    foods = []
-    
-    if meal_type and meal_plan and current_day in meal_plan:
-        day_plan = meal_plan[current_day]
-        if meal_type in day_plan:
-            meal_items = day_plan[meal_type]
-            foods = [item.get('food', '') for item in meal_items if isinstance(item, dict)]
-    
-    # If no foods found, use defaults based on the day shown in UI
-    if not foods:
-        # For Sunday (as shown in the image), use appropriate defaults
-        sunday_defaults = {
-            'morning': ['Banana', 'Apple', 'Watermelon'],  # From the UI image
-            'afternoon': ['Mixed Steamed Vegetables', 'Steamed Broccoli', 'Steamed Spinach'],
-            'dinner': ['Sautéed Spinach', 'Tofu Curry', 'Steamed Asparagus']
-        }
-        
-        general_defaults = {
-            'morning': ['Watermelon', 'Oats', 'Boiled Egg'],
-            'afternoon': ['Chicken', 'Rice', 'Vegetables'], 
-            'dinner': ['Fish', 'Quinoa', 'Spinach']
-        }
-        
-        # Use Sunday-specific defaults if it's Sunday, otherwise general
-        defaults = sunday_defaults if current_day == 'Sunday' else general_defaults
-        foods = defaults.get(meal_type, ['Oats', 'Banana', 'Milk'])
-    
-    # Build response exactly like the reference image
-    if meal_type:
-        meal_name = {'morning': 'Breakfast', 'afternoon': 'Lunch', 'dinner': 'Dinner'}[meal_type]
-        
-        # Format with minimal gaps - more compact
-        response = f"🍳 How to Prepare Your {current_day} {meal_name}\n"
-        response += f"Today is {current_day} and your {meal_name.lower()} includes: {', '.join(foods)}\n"
-        response += f"Let me guide you through preparing each item:\n"
-        
-        # Add cooking instructions for each food with emojis (like reference image)
-        food_instructions = {
-            'watermelon': {
-                'emoji': '🍉',
-                'instruction': 'Cut into wedges, remove seeds if desired. The red flesh is hydrating and refreshing. Perfect for hot days!'
-            },
-            'banana': {
-                'emoji': '🍌', 
-                'instruction': 'Peel and eat fresh, or slice into oatmeal. Rich in potassium for heart health and natural energy!'
-            },
-            'apple': {
-                'emoji': '🍎',
-                'instruction': 'Wash and eat with skin for maximum fiber, or slice thinly. Great source of antioxidants and vitamin C!'
-            },
-            'oats': {
-                'emoji': '🥣',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 1/2 cup rolled oats (40g)\n2. Boil 1 cup water or milk in saucepan\n3. Add oats to boiling liquid, stir well\n4. Reduce heat to medium-low\n5. Cook for 5-7 minutes, stirring occasionally\n6. Oats should be creamy and tender\n7. Add pinch of salt if desired\n8. Top with sliced banana, berries, or nuts\n9. Drizzle with honey if needed\n10. Serve hot in bowl\nHeart-healthy, high in fiber, and provides sustained energy!'
-            },
-            'boiled egg': {
-                'emoji': '🥚',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 2-3 fresh eggs from refrigerator\n2. Place eggs in saucepan, cover with cold water\n3. Water should be 1 inch above eggs\n4. Bring water to rolling boil on high heat\n5. Once boiling, reduce heat to medium\n6. Cook for 7-8 minutes for hard-boiled\n7. Prepare ice water bath in bowl\n8. Remove eggs with spoon, place in ice water\n9. Let cool for 2-3 minutes\n10. Gently tap and peel shell under running water\n11. Cut in half or slice as desired\n12. Season with salt and pepper\nPerfect protein source with all essential amino acids!'
-            },
-            'papaya': {
-                'emoji': '🥭',
-                'instruction': 'COMPLETE RECIPE:\n1. Choose ripe papaya (yellow-orange skin)\n2. Wash papaya thoroughly under running water\n3. Cut papaya in half lengthwise with sharp knife\n4. Scoop out black seeds with spoon\n5. Peel skin using vegetable peeler or knife\n6. Cut flesh into bite-sized cubes or slices\n7. Arrange on plate or in bowl\n8. Optional: squeeze fresh lime juice on top\n9. Serve immediately for best taste\n10. Store leftovers in refrigerator\nRich in vitamin C, digestive enzymes, and antioxidants!'
-            },
-            'idli': {
-                'emoji': '🍚',
-                'instruction': 'COMPLETE RECIPE:\n1. Prepare idli batter (or use store-bought)\n2. Grease idli plates with oil or ghee\n3. Fill idli molds 3/4 full with batter\n4. Boil water in idli steamer or pressure cooker\n5. Place filled idli plates in steamer\n6. Cover and steam for 10-12 minutes\n7. Check doneness with toothpick (should come out clean)\n8. Turn off heat, let cool for 2 minutes\n9. Remove idlis gently with spoon\n10. Serve hot with coconut chutney\n11. Garnish with curry leaves if desired\nLight, fluffy, and easily digestible South Indian staple!'
-            },
-            'greek yogurt': {
-                'emoji': '🥛',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 1 cup plain Greek yogurt from refrigerator\n2. Let it come to room temperature for 5 minutes\n3. Transfer to serving bowl\n4. Optional: add 1 tsp honey for sweetness\n5. Top with fresh berries or sliced fruits\n6. Sprinkle chopped nuts or granola if desired\n7. Add a pinch of cinnamon for flavor\n8. Mix gently to combine toppings\n9. Serve immediately while fresh\n10. Store remaining yogurt in refrigerator\nHigh in protein, probiotics, and calcium for gut health!'
-            },
-            'steamed carrots': {
-                'emoji': '🥕',
-                'instruction': 'COMPLETE RECIPE:\n1. Wash 300g fresh carrots under cold water\n2. Peel carrots with vegetable peeler\n3. Cut into uniform 1-inch pieces or sticks\n4. Fill steamer pot with 2 inches of water\n5. Bring water to boil over high heat\n6. Place carrots in steamer basket\n7. Cover and steam for 8-10 minutes\n8. Test doneness with fork (should be tender)\n9. Remove from heat immediately\n10. Season with pinch of salt and herbs\n11. Drizzle with 1 tsp olive oil\n12. Serve hot as nutritious side dish\nRich in beta-carotene, fiber, and vitamin A!'
-            },
-            'quinoa': {
-                'emoji': '🌾',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 1 cup quinoa, rinse in fine mesh strainer\n2. Rinse until water runs clear (removes bitterness)\n3. In saucepan, bring 2 cups water to boil\n4. Add pinch of salt to boiling water\n5. Add rinsed quinoa to boiling water\n6. Reduce heat to low, cover pot\n7. Simmer for 15 minutes without lifting lid\n8. Turn off heat, let stand 5 minutes\n9. Fluff with fork to separate grains\n10. Taste and adjust seasoning\n11. Serve hot or let cool for salads\n12. Store leftovers in refrigerator\nComplete protein with all essential amino acids!'
-            },
-            'whole wheat roti': {
-                'emoji': '🫓',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 2 cups whole wheat flour in bowl\n2. Add pinch of salt and mix\n3. Gradually add water while mixing\n4. Knead into soft, smooth dough\n5. Cover and rest dough for 20 minutes\n6. Divide into 8-10 small balls\n7. Roll each ball into thin circle\n8. Heat tawa or griddle on medium heat\n9. Cook roti for 1-2 minutes until bubbles form\n10. Flip and cook other side for 1 minute\n11. Optional: roast directly on flame for puffing\n12. Serve hot with vegetables or curry\nWhole grain goodness with fiber and nutrients!'
-            },
-            'baked sweet potato': {
-                'emoji': '🍠',
-                'instruction': 'COMPLETE RECIPE:\n1. Preheat oven to 400°F (200°C)\n2. Wash 2-3 medium sweet potatoes thoroughly\n3. Pat dry and pierce skin with fork 8-10 times\n4. Rub skin lightly with olive oil and salt\n5. Place on baking sheet lined with foil\n6. Bake for 45-60 minutes until tender\n7. Test doneness by gently squeezing\n8. Remove from oven, let cool 5 minutes\n9. Cut open lengthwise with knife\n10. Fluff flesh with fork\n11. Season with cinnamon or herbs\n12. Serve hot as healthy side dish\nRich in vitamin A, fiber, and natural sweetness!'
-            },
-            'tofu stir-fry with rice': {
-                'emoji': '🍛',
-                'instruction': 'COMPLETE RECIPE:\n1. Press 200g firm tofu to remove excess water\n2. Cut tofu into 1-inch cubes\n3. Heat 2 tbsp oil in large wok or pan\n4. Add tofu cubes, cook 3-4 minutes until golden\n5. Remove tofu, set aside\n6. Add mixed vegetables to same pan\n7. Stir-fry vegetables for 5-6 minutes\n8. Return tofu to pan with vegetables\n9. Add soy sauce, garlic, and ginger\n10. Stir-fry for 2 more minutes\n11. Serve hot over steamed rice\n12. Garnish with green onions\nPlant-based protein with complete amino acids!'
-            },
-            'chicken': {
-                'emoji': '🍗',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 200g boneless chicken breast\n2. Wash and pat dry with paper towels\n3. Remove skin for healthier option\n4. Season with salt, pepper, and herbs\n5. Heat 1 tsp oil in non-stick pan\n6. Cook chicken on medium heat 6-7 minutes per side\n7. Internal temperature should reach 165°F (74°C)\n8. Let rest for 2-3 minutes before slicing\n9. Alternative: Boil in water with ginger for 20-25 minutes\n10. Slice and serve with vegetables\n11. Garnish with fresh herbs\nLean protein source, low in saturated fat!'
-            },
-            'rice': {
-                'emoji': '🍚',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 1 cup basmati or brown rice\n2. Rinse rice in cold water until water runs clear\n3. Soak rice for 15-20 minutes (optional)\n4. In heavy-bottomed pot, add 2 cups water\n5. Add pinch of salt and bring to boil\n6. Add drained rice to boiling water\n7. Stir once, reduce heat to low\n8. Cover and cook 18-20 minutes (25-30 for brown rice)\n9. Do not lift lid during cooking\n10. Turn off heat, let stand 5 minutes\n11. Fluff with fork before serving\n12. Serve hot as base for curries\nBrown rice preferred for more fiber and nutrients!'
-            },
-            'fish': {
-                'emoji': '🐟',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 200g fresh fish fillet (salmon, cod, or tilapia)\n2. Wash fish under cold water, pat dry\n3. Season with salt, pepper, and lemon juice\n4. Let marinate for 10 minutes\n5. Heat 1 tbsp oil in non-stick pan\n6. Cook fish 4-5 minutes per side\n7. Fish should flake easily when done\n8. Alternative: Steam with ginger and herbs for 10-12 minutes\n9. Garnish with fresh herbs and lemon\n10. Serve hot with vegetables\n11. Internal temperature should reach 145°F\n12. Avoid overcooking to maintain moisture\nRich in omega-3 fatty acids and lean protein!'
-            },
-            'mixed steamed vegetables': {
-                'emoji': '🥬',
-                'instruction': 'COMPLETE RECIPE:\n1. Prepare 400g mixed vegetables (broccoli, carrots, bell peppers)\n2. Wash and cut into uniform pieces\n3. Fill steamer pot with 2 inches water\n4. Bring water to boil over high heat\n5. Place vegetables in steamer basket\n6. Steam harder vegetables first (carrots 8 minutes)\n7. Add softer vegetables (broccoli 5 minutes)\n8. Test doneness with fork (tender-crisp)\n9. Remove immediately to prevent overcooking\n10. Season with herbs, salt, and pepper\n11. Drizzle with olive oil or lemon juice\n12. Serve hot as colorful side dish\nRich in vitamins, minerals, and fiber!'
-            },
-            'steamed broccoli': {
-                'emoji': '🥦',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 300g fresh broccoli head\n2. Wash thoroughly under cold water\n3. Cut into uniform bite-sized florets\n4. Trim and peel stem, cut into pieces\n5. Fill steamer with 2 inches water, bring to boil\n6. Place broccoli in steamer basket\n7. Cover and steam for 5-7 minutes\n8. Test with fork (should be tender-crisp)\n9. Remove immediately to retain color\n10. Season with salt, pepper, and garlic\n11. Optional: drizzle with lemon juice\n12. Serve hot as nutritious side\nRich in vitamin C, K, folate, and fiber!'
-            },
-            'steamed spinach': {
-                'emoji': '🥬',
-                'instruction': 'COMPLETE RECIPE:\n1. Wash 200g fresh spinach leaves thoroughly\n2. Remove thick stems and chop roughly\n3. Heat water in steamer pot until boiling\n4. Place spinach in steamer basket for 2-3 minutes\n5. Remove and drain excess water\n6. Heat 1 tsp oil in pan, add 2 minced garlic cloves\n7. Add steamed spinach, sauté for 1 minute\n8. Season with pinch of salt and black pepper\n9. Serve hot as a nutritious side dish\nExcellent source of iron, folate, and vitamins A, C, K!'
-            },
-            'sautéed spinach': {
-                'emoji': '🥬',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 300g fresh spinach leaves\n2. Wash thoroughly in cold water 2-3 times\n3. Remove thick stems and chop roughly\n4. Heat 1 tbsp olive oil in large pan\n5. Add 3-4 minced garlic cloves\n6. Sauté garlic for 30 seconds until fragrant\n7. Add wet spinach leaves to pan\n8. Cook on medium heat for 2-3 minutes\n9. Stir frequently until wilted\n10. Season with salt and black pepper\n11. Add squeeze of lemon juice\n12. Serve immediately while hot\nRich in iron, vitamins A, C, K, and folate!'
-            },
-            'tofu curry': {
-                'emoji': '🍛',
-                'instruction': 'COMPLETE RECIPE:\n1. Press 250g firm tofu to remove water\n2. Cut tofu into 1-inch cubes\n3. Heat 2 tbsp oil in heavy-bottomed pan\n4. Sauté 1 diced onion until golden\n5. Add 2 minced garlic cloves, 1 tsp ginger\n6. Add 1 tsp turmeric, 1 tsp cumin powder\n7. Add 2 diced tomatoes, cook until soft\n8. Add tofu cubes gently to avoid breaking\n9. Add 1 cup coconut milk or water\n10. Simmer for 10-15 minutes\n11. Season with salt and garam masala\n12. Garnish with fresh cilantro\nHigh protein vegetarian curry with complete amino acids!'
-            },
-            'steamed asparagus': {
-                'emoji': '🌿',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 300g fresh asparagus spears\n2. Wash thoroughly under cold water\n3. Snap off tough woody ends (bottom 1-2 inches)\n4. Arrange spears in single layer\n5. Fill steamer with 2 inches water, boil\n6. Place asparagus in steamer basket\n7. Cover and steam for 4-5 minutes\n8. Test with fork (should be tender but crisp)\n9. Remove immediately to prevent overcooking\n10. Season with salt, pepper, and lemon zest\n11. Drizzle with olive oil if desired\n12. Serve hot as elegant side dish\nRich in folate, vitamin K, and antioxidants!'
-            },
-            'vegetables': {
-                'emoji': '🥬',
-                'instruction': 'COMPLETE RECIPE:\n1. Choose 400g mixed seasonal vegetables\n2. Wash and cut into uniform pieces\n3. Heat 2 tbsp oil in large pan or wok\n4. Add harder vegetables first (carrots, potatoes)\n5. Sauté for 3-4 minutes\n6. Add medium vegetables (bell peppers, onions)\n7. Cook for 2-3 minutes more\n8. Add softer vegetables last (spinach, tomatoes)\n9. Season with salt, pepper, and herbs\n10. Cook until tender-crisp (5-7 minutes total)\n11. Garnish with fresh herbs\n12. Serve hot as colorful side\nVaried nutrients from different colored vegetables!'
-            },
-            'spinach': {
-                'emoji': '🥬',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 250g fresh spinach leaves\n2. Wash thoroughly in cold water 3 times\n3. Remove thick stems and chop roughly\n4. Heat 1 tbsp oil in large pan\n5. Add 2-3 minced garlic cloves\n6. Sauté garlic for 30 seconds until fragrant\n7. Add wet spinach leaves to pan\n8. Cook on medium heat for 2-3 minutes\n9. Stir frequently until wilted\n10. Season with salt and black pepper\n11. Add squeeze of lemon juice\n12. Serve immediately while hot\nRich in iron, vitamins A, C, K, and folate!'
-            },
-            'milk': {
-                'emoji': '🥛',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 1 cup fresh milk (dairy or plant-based)\n2. For warm milk: heat in saucepan on low heat\n3. Stir occasionally to prevent skin formation\n4. Heat until warm but not boiling (160°F)\n5. Optional: add pinch of turmeric for golden milk\n6. Add honey or dates for natural sweetness\n7. Stir well to dissolve sweeteners\n8. Pour into glass or mug\n9. Serve immediately while warm\n10. For cold milk: serve chilled from refrigerator\n11. Can be used in cereals, smoothies, or coffee\n12. Store opened milk in refrigerator\nRich in calcium, protein, and vitamin D!'
-            },
-            'upma': {
-                'emoji': '🍚',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 1 cup semolina (rava/sooji)\n2. Dry roast semolina in pan for 3-4 minutes until fragrant\n3. Set aside roasted semolina\n4. Heat 2 tbsp oil in same pan\n5. Add 1 tsp mustard seeds, let them splutter\n6. Add curry leaves, 1 chopped onion\n7. Sauté onion until translucent\n8. Add mixed vegetables (carrots, peas, beans)\n9. Cook vegetables for 3-4 minutes\n10. Add 2.5 cups hot water carefully\n11. Add salt and bring to boil\n12. Gradually add roasted semolina while stirring\n13. Cook for 5-8 minutes until water is absorbed\n14. Garnish with cilantro and serve hot\nHealthy South Indian breakfast rich in fiber!'
-            },
-            'poha': {
-                'emoji': '🍚',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 2 cups thick poha (flattened rice)\n2. Rinse poha gently in water, drain immediately\n3. Sprinkle salt and turmeric, mix gently\n4. Let it rest for 5 minutes to soften\n5. Heat 2 tbsp oil in large pan\n6. Add 1 tsp mustard seeds, let splutter\n7. Add curry leaves, 1 chopped onion\n8. Sauté onion until golden\n9. Add chopped green chilies and ginger\n10. Add soaked poha to pan\n11. Mix gently to avoid breaking\n12. Cook for 3-4 minutes on low heat\n13. Garnish with cilantro, coconut, and lemon juice\n14. Serve hot as light breakfast\nLight, nutritious, and easily digestible meal!'
-            },
-            'berry smoothie': {
-                'emoji': '🫐',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 1 cup mixed berries (strawberries, blueberries, raspberries)\n2. Wash berries thoroughly under cold water\n3. Add 1/2 cup Greek yogurt to blender\n4. Add 1/2 cup milk (dairy or almond)\n5. Add 1 tbsp honey or maple syrup\n6. Add berries to blender\n7. Add handful of ice cubes\n8. Blend on high speed for 60-90 seconds\n9. Check consistency, add more liquid if needed\n10. Taste and adjust sweetness\n11. Pour into tall glass\n12. Garnish with fresh berries on top\nRich in antioxidants, vitamin C, and probiotics!'
-            },
-            'oatmeal bowl': {
-                'emoji': '🥣',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 1/2 cup rolled oats\n2. Bring 1 cup milk or water to boil\n3. Add oats to boiling liquid\n4. Reduce heat to medium-low\n5. Cook for 5-7 minutes, stirring occasionally\n6. Add pinch of salt and cinnamon\n7. Cook until creamy and tender\n8. Remove from heat\n9. Top with sliced banana, berries, or nuts\n10. Drizzle with honey or maple syrup\n11. Add chia seeds or flax seeds for extra nutrition\n12. Serve hot in bowl\nHeart-healthy breakfast with sustained energy!'
-            },
-            'whole wheat pancakes': {
-                'emoji': '🥞',
-                'instruction': 'COMPLETE RECIPE:\n1. Mix 1 cup whole wheat flour with 1 tsp baking powder\n2. Add pinch of salt and 1 tbsp sugar\n3. In separate bowl, whisk 1 egg\n4. Add 1 cup milk and 2 tbsp melted butter to egg\n5. Pour wet ingredients into dry ingredients\n6. Mix until just combined (lumps are okay)\n7. Let batter rest for 5 minutes\n8. Heat griddle or pan over medium heat\n9. Pour 1/4 cup batter per pancake\n10. Cook until bubbles form on surface\n11. Flip and cook 1-2 minutes more\n12. Serve hot with fresh fruits and honey\nFiber-rich breakfast with whole grain goodness!'
-            },
-            'muesli': {
-                'emoji': '🥣',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 1/2 cup rolled oats\n2. Add 2 tbsp mixed nuts (almonds, walnuts)\n3. Add 1 tbsp dried fruits (raisins, dates)\n4. Add 1 tbsp seeds (sunflower, pumpkin)\n5. Mix all dry ingredients in bowl\n6. Add 1/2 cup milk or yogurt\n7. Stir well to combine\n8. Let soak for 5-10 minutes to soften\n9. Add fresh fruits on top (apple, banana)\n10. Drizzle with honey if desired\n11. Sprinkle cinnamon for extra flavor\n12. Serve immediately or chill overnight\nNutritious breakfast with fiber, protein, and healthy fats!'
-            },
-            'roasted bell peppers': {
-                'emoji': '🫑',
-                'instruction': 'COMPLETE RECIPE:\n1. Preheat oven to 400°F (200°C)\n2. Take 3-4 bell peppers (red, yellow, green)\n3. Wash and pat dry peppers\n4. Cut peppers in half, remove seeds and stems\n5. Cut into 1-inch strips\n6. Toss with 2 tbsp olive oil\n7. Season with salt and black pepper\n8. Arrange on baking sheet in single layer\n9. Roast for 20-25 minutes until edges are charred\n10. Turn once halfway through cooking\n11. Remove when tender and slightly caramelized\n12. Serve hot or at room temperature\nGreat for salads, sandwiches, or as colorful side dish!'
-            },
-            'chapati': {
-                'emoji': '🫓',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 2 cups whole wheat flour in bowl\n2. Add pinch of salt and mix well\n3. Gradually add water while mixing to form dough\n4. Knead into soft, smooth dough for 5 minutes\n5. Cover and rest dough for 20-30 minutes\n6. Divide into 8-10 small equal balls\n7. Roll each ball into thin 6-7 inch circle\n8. Heat tawa or griddle on medium-high heat\n9. Cook chapati for 1-2 minutes until bubbles form\n10. Flip and cook other side for 1 minute\n11. Optional: roast directly on flame for puffing\n12. Serve hot with vegetables, curry, or dal\nWhole grain flatbread rich in fiber and nutrients!'
-            },
-            'salad': {
-                'emoji': '🥗',
-                'instruction': 'COMPLETE RECIPE:\n1. Take mixed fresh vegetables (lettuce, tomatoes, cucumbers)\n2. Wash all vegetables thoroughly under cold water\n3. Pat dry with clean kitchen towel\n4. Chop lettuce into bite-sized pieces\n5. Dice tomatoes and cucumbers uniformly\n6. Add colorful vegetables (carrots, bell peppers)\n7. Toss all vegetables in large bowl\n8. Prepare dressing: mix olive oil, lemon juice, salt\n9. Add herbs like mint, cilantro, or parsley\n10. Pour dressing over salad just before serving\n11. Toss gently to coat all ingredients\n12. Serve immediately for best crispness\nFresh, hydrating, and packed with vitamins and minerals!'
-            },
-            'dal': {
-                'emoji': '🍲',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 1 cup lentils (moong, masoor, or toor dal)\n2. Wash and rinse dal until water runs clear\n3. Soak dal for 15-20 minutes\n4. Boil 3 cups water in heavy-bottomed pot\n5. Add dal to boiling water with pinch of turmeric\n6. Cook for 15-20 minutes until soft and mushy\n7. In separate pan, heat 1 tbsp oil\n8. Add cumin seeds, let them splutter\n9. Add chopped onions, garlic, ginger\n10. Sauté until onions are golden\n11. Add cooked dal to the tempering\n12. Simmer for 5 minutes, garnish with cilantro\nProtein-rich comfort food, easy to digest!'
-            },
-            'brown rice': {
-                'emoji': '🍚',
-                'instruction': 'COMPLETE RECIPE:\n1. Take 1 cup brown rice, rinse until water runs clear\n2. Soak rice for 30 minutes for better texture\n3. In heavy-bottomed pot, add 2.5 cups water\n4. Add pinch of salt and bring to boil\n5. Add drained brown rice to boiling water\n6. Stir once, reduce heat to lowest setting\n7. Cover tightly and cook for 25-30 minutes\n8. Do not lift lid during cooking process\n9. Turn off heat, let stand 10 minutes\n10. Fluff with fork before serving\n11. Check that grains are tender but not mushy\n12. Serve hot as healthy whole grain base\nMore nutritious than white rice with fiber and B vitamins!'
-            }
-        }
-        
-        # Format each food instruction with very minimal gaps
-        for food in foods:
-            food_key = food.lower()
-            if food_key in food_instructions:
-                instruction = food_instructions[food_key]
-                response += f"{instruction['emoji']} {food}:\n{instruction['instruction']}\n"
-            else:
-                response += f"🔸 {food}:\nFresh and nutritious addition to your meal!\n"
-        
-        # Add health tips section with minimal gap
-        response += f"💡 {current_day} {meal_name} Tips for {get_condition_name(user_condition)}:\n"
-        
-        # Get condition-specific tips
-        tips = get_condition_tips(user_condition)
-        for tip in tips:
-            response += f"• {tip}\n"
-        
-        # Add creative meal combinations and suggestions
-        response += f"\n🍽️ Creative {meal_name} Ideas:\n"
-        meal_suggestions = get_creative_meal_suggestions(foods, meal_type)
-        for suggestion in meal_suggestions:
-            response += f"• {suggestion}\n"
-        
-        # Closing message
-        response += f"\n✨ Enjoy your healthy {current_day} {meal_name.lower()}! Have a wonderful day and let me know if you need help with other meals!"
-        
-        return response
-    
-    # Default response for general queries
-    return get_default_suggestions(current_day, meal_plan)
-
-def get_creative_meal_suggestions(foods, meal_type):
-    """Generate creative meal combination suggestions based on available foods"""
-    
-    suggestions = []
-    food_names = [food.lower() for food in foods]
-    
-    # Breakfast creative suggestions
-    if meal_type == 'morning':
-        if any(fruit in food_names for fruit in ['banana', 'apple', 'berries', 'papaya']):
-            suggestions.append("Make a colorful fruit bowl by combining all your fruits with a drizzle of honey")
-        
-        if 'oats' in food_names or 'muesli' in food_names:
-            suggestions.append("Create overnight oats by soaking with milk and adding your fruits on top")
-        
-        if any(grain in food_names for grain in ['upma', 'poha', 'idli']):
-            suggestions.append("Prepare a South Indian breakfast platter with coconut chutney and sambar")
-        
-        if 'greek yogurt' in food_names:
-            suggestions.append("Make a protein parfait by layering yogurt with fruits and nuts")
-        
-        # General breakfast suggestions
-        suggestions.append("Start your day with warm lemon water 30 minutes before eating")
-        suggestions.append("Combine protein and fiber foods for sustained energy throughout the morning")
-    
-    # Lunch creative suggestions  
-    elif meal_type == 'afternoon':
-        if any(veg in food_names for veg in ['steamed carrots', 'steamed broccoli', 'mixed vegetables']):
-            suggestions.append("Make a colorful veggie soup by blending steamed vegetables with herbs")
-        
-        if 'quinoa' in food_names:
-            suggestions.append("Create a quinoa power bowl with all your vegetables mixed in")
-        
-        if any(grain in food_names for grain in ['rice', 'roti', 'quinoa']):
-            suggestions.append("Make a balanced plate: 1/2 vegetables, 1/4 grains, 1/4 protein")
-        
-        if any(veg in food_names for veg in ['bell peppers', 'carrots', 'broccoli']):
-            suggestions.append("Stir-fry all vegetables together with minimal oil and fresh herbs")
-        
-        # General lunch suggestions
-        suggestions.append("Eat slowly and chew thoroughly for better digestion")
-        suggestions.append("Include a variety of colors on your plate for maximum nutrients")
-    
-    # Dinner creative suggestions
-    elif meal_type == 'dinner':
-        if any(veg in food_names for veg in ['roasted bell peppers', 'sautéed spinach', 'steamed asparagus']):
-            suggestions.append("Make a hearty vegetable soup by combining roasted vegetables with broth")
-        
-        if 'tofu' in food_names:
-            suggestions.append("Create a tofu veggie stir-fry by combining with all your vegetables")
-        
-        if 'baked sweet potato' in food_names:
-            suggestions.append("Stuff sweet potato with sautéed vegetables for a complete meal")
-        
-        if any(veg in food_names for veg in ['spinach', 'bell peppers', 'zucchini']):
-            suggestions.append("Make a light vegetable curry with coconut milk and spices")
-        
-        # General dinner suggestions
-        suggestions.append("Keep dinner light and finish eating 2-3 hours before bedtime")
-        suggestions.append("Focus on vegetables and lean proteins for better sleep")
-    
-    # Add meal-specific combination suggestions based on actual foods
-    if len(foods) >= 2:
-        if meal_type == 'morning':
-            suggestions.append(f"Combine {foods[0]} and {foods[1]} for a balanced breakfast with protein and fiber")
-        elif meal_type == 'afternoon':
-            suggestions.append(f"Mix {foods[0]} with {foods[1]} for a nutritious and filling lunch")
-        elif meal_type == 'dinner':
-            suggestions.append(f"Pair {foods[0]} and {foods[1]} for a light yet satisfying dinner")
-    
-    # Limit to 3-4 suggestions to keep response concise
-    return suggestions[:4]
-
-def get_condition_name(condition):
-    """Get proper condition name for display"""
-    condition_names = {
-        'normal': 'bp',  # Like in reference image
-        'diabetes': 'Diabetes',
-        'heart': 'Heart Health',
-        'bp': 'bp',
-        'hypertension': 'bp',
-        'obesity': 'Weight Management'
-    }
-    return condition_names.get(condition, 'bp')
-
-def get_condition_tips(condition):
-    """Get condition-specific tips like in reference image"""
-    condition_tips = {
-        'normal': [
-            'Use minimal salt - flavor with herbs',
-            'Include potassium-rich foods', 
-            'Avoid processed foods',
-            'Stay hydrated with water'
-        ],
-        'diabetes': [
-            'Control portion sizes',
-            'Pair carbs with protein', 
-            'Choose high-fiber foods',
-            'Monitor blood sugar levels'
-        ],
-        'heart': [
-            'Use minimal salt',
-            'Choose lean proteins',
-            'Include omega-3 rich foods', 
-            'Limit saturated fats'
-        ],
-        'bp': [
-            'Use minimal salt - flavor with herbs',
-            'Include potassium-rich foods',
-            'Avoid processed foods', 
-            'Stay hydrated with water'
-        ],
-        'hypertension': [
-            'Use minimal salt - flavor with herbs',
-            'Include potassium-rich foods',
-            'Avoid processed foods',
-            'Stay hydrated with water'
-        ],
-        'obesity': [
-            'Control portion sizes',
-            'Choose high-fiber foods',
-            'Limit calorie-dense foods',
-            'Stay active after meals'
-        ]
-    }
-    
-    return condition_tips.get(condition, condition_tips['normal'])
-
+#!/usr/bin/env python3
+"""
+New AI Recipe Assistant Chatbot - Fixed Version
+Addresses:
+1. Wrong day detection (should use current meal plan page day)
+2. Missing default suggestions when chat opens
+3. Should use actual foods from user's meal plan
+4. Should consider user's health condition
+"""
+
+from flask import Response, jsonify
+from datetime import datetime
+import json
+import logging
+import os
+import threading
+from recipe_store import CONDITION_NOTES, RecipeStore, food_key
+from recipe_index import load_or_build
+from intent_matcher import match_intent
+from chat_cache import plan_fingerprint, response_cache, response_key
+from chat_answers import (
+    HELP as ANSWER_HELP, MEAL_TYPES as ANSWER_MEAL_TYPES, answer_slot, fetch_answer, store_answers,
+    submit as submit_precompute
+)
+
+logger = logging.getLogger(__name__)
+
+# Per-thread database connection for chat context reads
+_local = threading.local()
+
+# Built-in cooking instructions with emojis (like reference image)
+FOOD_INSTRUCTIONS = {
+    'watermelon': {
+        'emoji': '🍉',
+        'instruction': 'Cut into wedges, remove seeds if desired. The red flesh is hydrating and refreshing. Perfect for hot days!'
+    },
+    'banana': {
+        'emoji': '🍌', 
+        'instruction': 'Peel and eat fresh, or slice into oatmeal. Rich in potassium for heart health and natural energy!'
+    },
+    'apple': {
+        'emoji': '🍎',
+        'instruction': 'Wash and eat with skin for maximum fiber, or slice thinly. Great source of antioxidants and vitamin C!'
+    },
+    'oats': {
+        'emoji': '🥣',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 1/2 cup rolled oats (40g)\n2. Boil 1 cup water or milk in saucepan\n3. Add oats to boiling liquid, stir well\n4. Reduce heat to medium-low\n5. Cook for 5-7 minutes, stirring occasionally\n6. Oats should be creamy and tender\n7. Add pinch of salt if desired\n8. Top with sliced banana, berries, or nuts\n9. Drizzle with honey if needed\n10. Serve hot in bowl\nHeart-healthy, high in fiber, and provides sustained energy!'
+    },
+    'boiled egg': {
+        'emoji': '🥚',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 2-3 fresh eggs from refrigerator\n2. Place eggs in saucepan, cover with cold water\n3. Water should be 1 inch above eggs\n4. Bring water to rolling boil on high heat\n5. Once boiling, reduce heat to medium\n6. Cook for 7-8 minutes for hard-boiled\n7. Prepare ice water bath in bowl\n8. Remove eggs with spoon, place in ice water\n9. Let cool for 2-3 minutes\n10. Gently tap and peel shell under running water\n11. Cut in half or slice as desired\n12. Season with salt and pepper\nPerfect protein source with all essential amino acids!'
+    },
+    'papaya': {
+        'emoji': '🥭',
+        'instruction': 'COMPLETE RECIPE:\n1. Choose ripe papaya (yellow-orange skin)\n2. Wash papaya thoroughly under running water\n3. Cut papaya in half lengthwise with sharp knife\n4. Scoop out black seeds with spoon\n5. Peel skin using vegetable peeler or knife\n6. Cut flesh into bite-sized cubes or slices\n7. Arrange on plate or in bowl\n8. Optional: squeeze fresh lime juice on top\n9. Serve immediately for best taste\n10. Store leftovers in refrigerator\nRich in vitamin C, digestive enzymes, and antioxidants!'
+    },
+    'idli': {
+        'emoji': '🍚',
+        'instruction': 'COMPLETE RECIPE:\n1. Prepare idli batter (or use store-bought)\n2. Grease idli plates with oil or ghee\n3. Fill idli molds 3/4 full with batter\n4. Boil water in idli steamer or pressure cooker\n5. Place filled idli plates in steamer\n6. Cover and steam for 10-12 minutes\n7. Check doneness with toothpick (should come out clean)\n8. Turn off heat, let cool for 2 minutes\n9. Remove idlis gently with spoon\n10. Serve hot with coconut chutney\n11. Garnish with curry leaves if desired\nLight, fluffy, and easily digestible South Indian staple!'
+    },
+    'greek yogurt': {
+        'emoji': '🥛',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 1 cup plain Greek yogurt from refrigerator\n2. Let it come to room temperature for 5 minutes\n3. Transfer to serving bowl\n4. Optional: add 1 tsp honey for sweetness\n5. Top with fresh berries or sliced fruits\n6. Sprinkle chopped nuts or granola if desired\n7. Add a pinch of cinnamon for flavor\n8. Mix gently to combine toppings\n9. Serve immediately while fresh\n10. Store remaining yogurt in refrigerator\nHigh in protein, probiotics, and calcium for gut health!'
+    },
+    'steamed carrots': {
+        'emoji': '🥕',
+        'instruction': 'COMPLETE RECIPE:\n1. Wash 300g fresh carrots under cold water\n2. Peel carrots with vegetable peeler\n3. Cut into uniform 1-inch pieces or sticks\n4. Fill steamer pot with 2 inches of water\n5. Bring water to boil over high heat\n6. Place carrots in steamer basket\n7. Cover and steam for 8-10 minutes\n8. Test doneness with fork (should be tender)\n9. Remove from heat immediately\n10. Season with pinch of salt and herbs\n11. Drizzle with 1 tsp olive oil\n12. Serve hot as nutritious side dish\nRich in beta-carotene, fiber, and vitamin A!'
+    },
+    'quinoa': {
+        'emoji': '🌾',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 1 cup quinoa, rinse in fine mesh strainer\n2. Rinse until water runs clear (removes bitterness)\n3. In saucepan, bring 2 cups water to boil\n4. Add pinch of salt to boiling water\n5. Add rinsed quinoa to boiling water\n6. Reduce heat to low, cover pot\n7. Simmer for 15 minutes without lifting lid\n8. Turn off heat, let stand 5 minutes\n9. Fluff with fork to separate grains\n10. Taste and adjust seasoning\n11. Serve hot or let cool for salads\n12. Store leftovers in refrigerator\nComplete protein with all essential amino acids!'
+    },
+    'whole wheat roti': {
+        'emoji': '🫓',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 2 cups whole wheat flour in bowl\n2. Add pinch of salt and mix\n3. Gradually add water while mixing\n4. Knead into soft, smooth dough\n5. Cover and rest dough for 20 minutes\n6. Divide into 8-10 small balls\n7. Roll each ball into thin circle\n8. Heat tawa or griddle on medium heat\n9. Cook roti for 1-2 minutes until bubbles form\n10. Flip and cook other side for 1 minute\n11. Optional: roast directly on flame for puffing\n12. Serve hot with vegetables or curry\nWhole grain goodness with fiber and nutrients!'
+    },
+    'baked sweet potato': {
+        'emoji': '🍠',
+        'instruction': 'COMPLETE RECIPE:\n1. Preheat oven to 400°F (200°C)\n2. Wash 2-3 medium sweet potatoes thoroughly\n3. Pat dry and pierce skin with fork 8-10 times\n4. Rub skin lightly with olive oil and salt\n5. Place on baking sheet lined with foil\n6. Bake for 45-60 minutes until tender\n7. Test doneness by gently squeezing\n8. Remove from oven, let cool 5 minutes\n9. Cut open lengthwise with knife\n10. Fluff flesh with fork\n11. Season with cinnamon or herbs\n12. Serve hot as healthy side dish\nRich in vitamin A, fiber, and natural sweetness!'
+    },
+    'tofu stir-fry with rice': {
+        'emoji': '🍛',
+        'instruction': 'COMPLETE RECIPE:\n1. Press 200g firm tofu to remove excess water\n2. Cut tofu into 1-inch cubes\n3. Heat 2 tbsp oil in large wok or pan\n4. Add tofu cubes, cook 3-4 minutes until golden\n5. Remove tofu, set aside\n6. Add mixed vegetables to same pan\n7. Stir-fry vegetables for 5-6 minutes\n8. Return tofu to pan with vegetables\n9. Add soy sauce, garlic, and ginger\n10. Stir-fry for 2 more minutes\n11. Serve hot over steamed rice\n12. Garnish with green onions\nPlant-based protein with complete amino acids!'
+    },
+    'chicken': {
+        'emoji': '🍗',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 200g boneless chicken breast\n2. Wash and pat dry with paper towels\n3. Remove skin for healthier option\n4. Season with salt, pepper, and herbs\n5. Heat 1 tsp oil in non-stick pan\n6. Cook chicken on medium heat 6-7 minutes per side\n7. Internal temperature should reach 165°F (74°C)\n8. Let rest for 2-3 minutes before slicing\n9. Alternative: Boil in water with ginger for 20-25 minutes\n10. Slice and serve with vegetables\n11. Garnish with fresh herbs\nLean protein source, low in saturated fat!'
+    },
+    'rice': {
+        'emoji': '🍚',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 1 cup basmati or brown rice\n2. Rinse rice in cold water until water runs clear\n3. Soak rice for 15-20 minutes (optional)\n4. In heavy-bottomed pot, add 2 cups water\n5. Add pinch of salt and bring to boil\n6. Add drained rice to boiling water\n7. Stir once, reduce heat to low\n8. Cover and cook 18-20 minutes (25-30 for brown rice)\n9. Do not lift lid during cooking\n10. Turn off heat, let stand 5 minutes\n11. Fluff with fork before serving\n12. Serve hot as base for curries\nBrown rice preferred for more fiber and nutrients!'
+    },
+    'fish': {
+        'emoji': '🐟',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 200g fresh fish fillet (salmon, cod, or tilapia)\n2. Wash fish under cold water, pat dry\n3. Season with salt, pepper, and lemon juice\n4. Let marinate for 10 minutes\n5. Heat 1 tbsp oil in non-stick pan\n6. Cook fish 4-5 minutes per side\n7. Fish should flake easily when done\n8. Alternative: Steam with ginger and herbs for 10-12 minutes\n9. Garnish with fresh herbs and lemon\n10. Serve hot with vegetables\n11. Internal temperature should reach 145°F\n12. Avoid overcooking to maintain moisture\nRich in omega-3 fatty acids and lean protein!'
+    },
+    'mixed steamed vegetables': {
+        'emoji': '🥬',
+        'instruction': 'COMPLETE RECIPE:\n1. Prepare 400g mixed vegetables (broccoli, carrots, bell peppers)\n2. Wash and cut into uniform pieces\n3. Fill steamer pot with 2 inches water\n4. Bring water to boil over high heat\n5. Place vegetables in steamer basket\n6. Steam harder vegetables first (carrots 8 minutes)\n7. Add softer vegetables (broccoli 5 minutes)\n8. Test doneness with fork (tender-crisp)\n9. Remove immediately to prevent overcooking\n10. Season with herbs, salt, and pepper\n11. Drizzle with olive oil or lemon juice\n12. Serve hot as colorful side dish\nRich in vitamins, minerals, and fiber!'
+    },
+    'steamed broccoli': {
+        'emoji': '🥦',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 300g fresh broccoli head\n2. Wash thoroughly under cold water\n3. Cut into uniform bite-sized florets\n4. Trim and peel stem, cut into pieces\n5. Fill steamer with 2 inches water, bring to boil\n6. Place broccoli in steamer basket\n7. Cover and steam for 5-7 minutes\n8. Test with fork (should be tender-crisp)\n9. Remove immediately to retain color\n10. Season with salt, pepper, and garlic\n11. Optional: drizzle with lemon juice\n12. Serve hot as nutritious side\nRich in vitamin C, K, folate, and fiber!'
+    },
+    'steamed spinach': {
+        'emoji': '🥬',
+        'instruction': 'COMPLETE RECIPE:\n1. Wash 200g fresh spinach leaves thoroughly\n2. Remove thick stems and chop roughly\n3. Heat water in steamer pot until boiling\n4. Place spinach in steamer basket for 2-3 minutes\n5. Remove and drain excess water\n6. Heat 1 tsp oil in pan, add 2 minced garlic cloves\n7. Add steamed spinach, sauté for 1 minute\n8. Season with pinch of salt and black pepper\n9. Serve hot as a nutritious side dish\nExcellent source of iron, folate, and vitamins A, C, K!'
+    },
+    'sautéed spinach': {
+        'emoji': '🥬',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 300g fresh spinach leaves\n2. Wash thoroughly in cold water 2-3 times\n3. Remove thick stems and chop roughly\n4. Heat 1 tbsp olive oil in large pan\n5. Add 3-4 minced garlic cloves\n6. Sauté garlic for 30 seconds until fragrant\n7. Add wet spinach leaves to pan\n8. Cook on medium heat for 2-3 minutes\n9. Stir frequently until wilted\n10. Season with salt and black pepper\n11. Add squeeze of lemon juice\n12. Serve immediately while hot\nRich in iron, vitamins A, C, K, and folate!'
+    },
+    'tofu curry': {
+        'emoji': '🍛',
+        'instruction': 'COMPLETE RECIPE:\n1. Press 250g firm tofu to remove water\n2. Cut tofu into 1-inch cubes\n3. Heat 2 tbsp oil in heavy-bottomed pan\n4. Sauté 1 diced onion until golden\n5. Add 2 minced garlic cloves, 1 tsp ginger\n6. Add 1 tsp turmeric, 1 tsp cumin powder\n7. Add 2 diced tomatoes, cook until soft\n8. Add tofu cubes gently to avoid breaking\n9. Add 1 cup coconut milk or water\n10. Simmer for 10-15 minutes\n11. Season with salt and garam masala\n12. Garnish with fresh cilantro\nHigh protein vegetarian curry with complete amino acids!'
+    },
+    'steamed asparagus': {
+        'emoji': '🌿',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 300g fresh asparagus spears\n2. Wash thoroughly under cold water\n3. Snap off tough woody ends (bottom 1-2 inches)\n4. Arrange spears in single layer\n5. Fill steamer with 2 inches water, boil\n6. Place asparagus in steamer basket\n7. Cover and steam for 4-5 minutes\n8. Test with fork (should be tender but crisp)\n9. Remove immediately to prevent overcooking\n10. Season with salt, pepper, and lemon zest\n11. Drizzle with olive oil if desired\n12. Serve hot as elegant side dish\nRich in folate, vitamin K, and antioxidants!'
+    },
+    'vegetables': {
+        'emoji': '🥬',
+        'instruction': 'COMPLETE RECIPE:\n1. Choose 400g mixed seasonal vegetables\n2. Wash and cut into uniform pieces\n3. Heat 2 tbsp oil in large pan or wok\n4. Add harder vegetables first (carrots, potatoes)\n5. Sauté for 3-4 minutes\n6. Add medium vegetables (bell peppers, onions)\n7. Cook for 2-3 minutes more\n8. Add softer vegetables last (spinach, tomatoes)\n9. Season with salt, pepper, and herbs\n10. Cook until tender-crisp (5-7 minutes total)\n11. Garnish with fresh herbs\n12. Serve hot as colorful side\nVaried nutrients from different colored vegetables!'
+    },
+    'spinach': {
+        'emoji': '🥬',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 250g fresh spinach leaves\n2. Wash thoroughly in cold water 3 times\n3. Remove thick stems and chop roughly\n4. Heat 1 tbsp oil in large pan\n5. Add 2-3 minced garlic cloves\n6. Sauté garlic for 30 seconds until fragrant\n7. Add wet spinach leaves to pan\n8. Cook on medium heat for 2-3 minutes\n9. Stir frequently until wilted\n10. Season with salt and black pepper\n11. Add squeeze of lemon juice\n12. Serve immediately while hot\nRich in iron, vitamins A, C, K, and folate!'
+    },
+    'milk': {
+        'emoji': '🥛',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 1 cup fresh milk (dairy or plant-based)\n2. For warm milk: heat in saucepan on low heat\n3. Stir occasionally to prevent skin formation\n4. Heat until warm but not boiling (160°F)\n5. Optional: add pinch of turmeric for golden milk\n6. Add honey or dates for natural sweetness\n7. Stir well to dissolve sweeteners\n8. Pour into glass or mug\n9. Serve immediately while warm\n10. For cold milk: serve chilled from refrigerator\n11. Can be used in cereals, smoothies, or coffee\n12. Store opened milk in refrigerator\nRich in calcium, protein, and vitamin D!'
+    },
+    'upma': {
+        'emoji': '🍚',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 1 cup semolina (rava/sooji)\n2. Dry roast semolina in pan for 3-4 minutes until fragrant\n3. Set aside roasted semolina\n4. Heat 2 tbsp oil in same pan\n5. Add 1 tsp mustard seeds, let them splutter\n6. Add curry leaves, 1 chopped onion\n7. Sauté onion until translucent\n8. Add mixed vegetables (carrots, peas, beans)\n9. Cook vegetables for 3-4 minutes\n10. Add 2.5 cups hot water carefully\n11. Add salt and bring to boil\n12. Gradually add roasted semolina while stirring\n13. Cook for 5-8 minutes until water is absorbed\n14. Garnish with cilantro and serve hot\nHealthy South Indian breakfast rich in fiber!'
+    },
+    'poha': {
+        'emoji': '🍚',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 2 cups thick poha (flattened rice)\n2. Rinse poha gently in water, drain immediately\n3. Sprinkle salt and turmeric, mix gently\n4. Let it rest for 5 minutes to soften\n5. Heat 2 tbsp oil in large pan\n6. Add 1 tsp mustard seeds, let splutter\n7. Add curry leaves, 1 chopped onion\n8. Sauté onion until golden\n9. Add chopped green chilies and ginger\n10. Add soaked poha to pan\n11. Mix gently to avoid breaking\n12. Cook for 3-4 minutes on low heat\n13. Garnish with cilantro, coconut, and lemon juice\n14. Serve hot as light breakfast\nLight, nutritious, and easily digestible meal!'
+    },
+    'berry smoothie': {
+        'emoji': '🫐',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 1 cup mixed berries (strawberries, blueberries, raspberries)\n2. Wash berries thoroughly under cold water\n3. Add 1/2 cup Greek yogurt to blender\n4. Add 1/2 cup milk (dairy or almond)\n5. Add 1 tbsp honey or maple syrup\n6. Add berries to blender\n7. Add handful of ice cubes\n8. Blend on high speed for 60-90 seconds\n9. Check consistency, add more liquid if needed\n10. Taste and adjust sweetness\n11. Pour into tall glass\n12. Garnish with fresh berries on top\nRich in antioxidants, vitamin C, and probiotics!'
+    },
+    'oatmeal bowl': {
+        'emoji': '🥣',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 1/2 cup rolled oats\n2. Bring 1 cup milk or water to boil\n3. Add oats to boiling liquid\n4. Reduce heat to medium-low\n5. Cook for 5-7 minutes, stirring occasionally\n6. Add pinch of salt and cinnamon\n7. Cook until creamy and tender\n8. Remove from heat\n9. Top with sliced banana, berries, or nuts\n10. Drizzle with honey or maple syrup\n11. Add chia seeds or flax seeds for extra nutrition\n12. Serve hot in bowl\nHeart-healthy breakfast with sustained energy!'
+    },
+    'whole wheat pancakes': {
+        'emoji': '🥞',
+        'instruction': 'COMPLETE RECIPE:\n1. Mix 1 cup whole wheat flour with 1 tsp baking powder\n2. Add pinch of salt and 1 tbsp sugar\n3. In separate bowl, whisk 1 egg\n4. Add 1 cup milk and 2 tbsp melted butter to egg\n5. Pour wet ingredients into dry ingredients\n6. Mix until just combined (lumps are okay)\n7. Let batter rest for 5 minutes\n8. Heat griddle or pan over medium heat\n9. Pour 1/4 cup batter per pancake\n10. Cook until bubbles form on surface\n11. Flip and cook 1-2 minutes more\n12. Serve hot with fresh fruits and honey\nFiber-rich breakfast with whole grain goodness!'
+    },
+    'muesli': {
+        'emoji': '🥣',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 1/2 cup rolled oats\n2. Add 2 tbsp mixed nuts (almonds, walnuts)\n3. Add 1 tbsp dried fruits (raisins, dates)\n4. Add 1 tbsp seeds (sunflower, pumpkin)\n5. Mix all dry ingredients in bowl\n6. Add 1/2 cup milk or yogurt\n7. Stir well to combine\n8. Let soak for 5-10 minutes to soften\n9. Add fresh fruits on top (apple, banana)\n10. Drizzle with honey if desired\n11. Sprinkle cinnamon for extra flavor\n12. Serve immediately or chill overnight\nNutritious breakfast with fiber, protein, and healthy fats!'
+    },
+    'roasted bell peppers': {
+        'emoji': '🫑',
+        'instruction': 'COMPLETE RECIPE:\n1. Preheat oven to 400°F (200°C)\n2. Take 3-4 bell peppers (red, yellow, green)\n3. Wash and pat dry peppers\n4. Cut peppers in half, remove seeds and stems\n5. Cut into 1-inch strips\n6. Toss with 2 tbsp olive oil\n7. Season with salt and black pepper\n8. Arrange on baking sheet in single layer\n9. Roast for 20-25 minutes until edges are charred\n10. Turn once halfway through cooking\n11. Remove when tender and slightly caramelized\n12. Serve hot or at room temperature\nGreat for salads, sandwiches, or as colorful side dish!'
+    },
+    'chapati': {
+        'emoji': '🫓',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 2 cups whole wheat flour in bowl\n2. Add pinch of salt and mix well\n3. Gradually add water while mixing to form dough\n4. Knead into soft, smooth dough for 5 minutes\n5. Cover and rest dough for 20-30 minutes\n6. Divide into 8-10 small equal balls\n7. Roll each ball into thin 6-7 inch circle\n8. Heat tawa or griddle on medium-high heat\n9. Cook chapati for 1-2 minutes until bubbles form\n10. Flip and cook other side for 1 minute\n11. Optional: roast directly on flame for puffing\n12. Serve hot with vegetables, curry, or dal\nWhole grain flatbread rich in fiber and nutrients!'
+    },
+    'salad': {
+        'emoji': '🥗',
+        'instruction': 'COMPLETE RECIPE:\n1. Take mixed fresh vegetables (lettuce, tomatoes, cucumbers)\n2. Wash all vegetables thoroughly under cold water\n3. Pat dry with clean kitchen towel\n4. Chop lettuce into bite-sized pieces\n5. Dice tomatoes and cucumbers uniformly\n6. Add colorful vegetables (carrots, bell peppers)\n7. Toss all vegetables in large bowl\n8. Prepare dressing: mix olive oil, lemon juice, salt\n9. Add herbs like mint, cilantro, or parsley\n10. Pour dressing over salad just before serving\n11. Toss gently to coat all ingredients\n12. Serve immediately for best crispness\nFresh, hydrating, and packed with vitamins and minerals!'
+    },
+    'dal': {
+        'emoji': '🍲',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 1 cup lentils (moong, masoor, or toor dal)\n2. Wash and rinse dal until water runs clear\n3. Soak dal for 15-20 minutes\n4. Boil 3 cups water in heavy-bottomed pot\n5. Add dal to boiling water with pinch of turmeric\n6. Cook for 15-20 minutes until soft and mushy\n7. In separate pan, heat 1 tbsp oil\n8. Add cumin seeds, let them splutter\n9. Add chopped onions, garlic, ginger\n10. Sauté until onions are golden\n11. Add cooked dal to the tempering\n12. Simmer for 5 minutes, garnish with cilantro\nProtein-rich comfort food, easy to digest!'
+    },
+    'brown rice': {
+        'emoji': '🍚',
+        'instruction': 'COMPLETE RECIPE:\n1. Take 1 cup brown rice, rinse until water runs clear\n2. Soak rice for 30 minutes for better texture\n3. In heavy-bottomed pot, add 2.5 cups water\n4. Add pinch of salt and bring to boil\n5. Add drained brown rice to boiling water\n6. Stir once, reduce heat to lowest setting\n7. Cover tightly and cook for 25-30 minutes\n8. Do not lift lid during cooking process\n9. Turn off heat, let stand 10 minutes\n10. Fluff with fork before serving\n11. Check that grains are tender but not mushy\n12. Serve hot as healthy whole grain base\nMore nutritious than white rice with fiber and B vitamins!'
+    }
+}
+
+RECIPES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'food_recipes.json')
+
+# Loaded once at import; food_recipes.json is re-read when it changes on disk
+recipe_store = RecipeStore(FOOD_INSTRUCTIONS, RECIPES_PATH)
+
+# Free-text search over food_recipes.json, opened on first use
+SEARCH_RESULTS = 3
+_recipe_index = None
+_recipe_index_version = None
+_recipe_index_lock = threading.Lock()
+# Condition note field -> keys of foods the catalog lists but not as safe for that condition
+_unsafe_foods = {}
+
+def chat_with_ai_fixed(data, get_db_func):
+    """Fixed AI Recipe Assistant - Provides cooking instructions based on user's meal plan"""
+    try:
+        user_message = data.get("message", "").strip()
+        user_id = data.get("user_id")
+        current_day = data.get("current_day")  # Get day from frontend (Sunday, Monday, etc.)
+        
+        if not user_message:
+            return jsonify({"error": "Message is required"}), 400
+        
+        # If no current_day provided, determine from today's date
+        if not current_day:
+            today = datetime.now()
+            days = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+            current_day = days[today.weekday() + 1 if today.weekday() != 6 else 0]
+        
+        # Get user's health condition and saved meal plan (one query, cached briefly)
+        user_condition = "normal"
+        saved_plan_key, saved_plan, saved_plan_id = None, None, None
+        if user_id:
+            try:
+                user_condition, saved_plan_key, saved_plan, saved_plan_id = response_cache.user_context(
+                    user_id, lambda: load_chat_context(get_db_func, user_id))
+            except Exception as e:
+                print(f"Error fetching chat context: {e}")
+        
+        # Use the meal plan sent by the frontend, falling back to the saved one
+        meal_plan = data.get('meal_plan')
+        if meal_plan:
+            plan_key = plan_fingerprint(meal_plan)
+        else:
+            plan_key, meal_plan = saved_plan_key, saved_plan
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Meal plan source: %s", 'frontend' if data.get('meal_plan') else 'database')
+            logger.debug("Meal plan keys: %s", list(meal_plan.keys()) if meal_plan else 'None')
+        
+        intent = match_intent(user_message, recipe_store)
+        
+        # Check if this is a default questions request or first time opening
+        if intent['is_help']:
+            chunks = lambda: iter([get_default_suggestions(current_day, meal_plan)])
+        else:
+            # Generate response based on user message
+            chunks = lambda: iter_recipe_response(user_message, current_day, meal_plan, user_condition, intent)
+        
+        # Meal answers and suggestions for the saved plan were rendered when it was saved
+        slot = answer_slot(intent, current_day, user_condition) if saved_plan_id and plan_key == saved_plan_key else None
+        if slot:
+            chunks = precomputed_or(chunks, get_db_func, saved_plan_id, slot)
+        
+        key = response_key(plan_key, current_day, user_condition, intent, recipe_store.version, user_message)
+        envelope = {"current_day": current_day, "user_condition": user_condition}
+        if data.get('stream'):
+            return stream_chat_response(key, chunks, envelope)
+        
+        response = response_cache.get_or_build(key, lambda: ''.join(chunks()))
+        
+        return jsonify(dict(envelope, response=response, timestamp=datetime.now().isoformat()))
+        
+    except Exception as e:
+        print(f"Chat error: {e}")
+        return jsonify({
+            "response": get_default_suggestions(current_day if 'current_day' in locals() else 'Today', None),
+            "timestamp": datetime.now().isoformat()
+        })
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def stream_chat_response(key, chunks, envelope):
+    """Server-sent events: one 'chunk' event per piece of the answer, then 'done' with the envelope"""
+    def events():
+        try:
+            response = response_cache.get(key)
+            if response is not None:
+                yield _sse('chunk', {'text': response})
+            else:
+                parts = []
+                for part in chunks():
+                    parts.append(part)
+                    yield _sse('chunk', {'text': part})
+                response_cache.put(key, ''.join(parts))
+        except Exception as e:
+            print(f"Chat stream error: {e}")
+            yield _sse('error', {'error': str(e)})
+            return
+        yield _sse('done', dict(envelope, timestamp=datetime.now().isoformat()))
+    
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def _thread_connection(get_db_func):
+    """One connection per thread and connection factory, reused across chat messages"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.factory is not get_db_func:
+        if conn is not None:
+            conn.close()
+        conn = _local.conn = get_db_func()
+        _local.factory = get_db_func
+    return conn
+
+def load_chat_context(get_db_func, user_id):
+    """(user_condition, plan fingerprint, meal_plan, plan_id) for a user from one joined query"""
+    conn = _thread_connection(get_db_func)
+    try:
+        row = conn.execute("""
+            SELECT u.health_conditions, p.plan_data, p.id
+            FROM users u
+            LEFT JOIN saved_meal_plans p ON p.id = (
+                SELECT id FROM saved_meal_plans
+                WHERE user_id = u.id AND is_active = 1
+                ORDER BY created_at DESC
+                LIMIT 1
+            )
+            WHERE u.id = ?
+        """, (user_id,)).fetchone()
+    except Exception:
+        # Drop a connection that may be broken so the next message reconnects
+        _local.conn = None
+        conn.close()
+        raise
+    
+    user_condition = "normal"
+    meal_plan = None
+    plan_id = None
+    if row:
+        if row[0]:
+            user_condition = row[0].split(",")[0].strip().lower()
+        if row[1]:
+            meal_plan = json.loads(row[1])
+            plan_id = row[2]
+    return user_condition, plan_fingerprint(meal_plan), meal_plan, plan_id
+
+def precomputed_or(chunks, get_db_func, plan_id, slot):
+    """Wrap a live answer generator so a precomputed answer is served instead when stored"""
+    def lookup():
+        try:
+            answer = fetch_answer(_thread_connection(get_db_func), plan_id, slot, recipe_store.signature)
+        except Exception as e:
+            print(f"Error reading precomputed answer: {e}")
+            answer = None
+        return iter([answer]) if answer is not None else chunks()
+    return lookup
+
+def render_plan_answers(meal_plan, user_condition, days=None):
+    """Every plan-only answer: [(day, intent, condition, response)] for each day's meals and suggestions"""
+    answers = []
+    for day in (days if days is not None else meal_plan):
+        answers.append((day, ANSWER_HELP, '', get_default_suggestions(day, meal_plan)))
+        for meal_type in ANSWER_MEAL_TYPES:
+            intent = {'meal_type': meal_type, 'day': None, 'condition': None, 'foods': [], 'is_help': False}
+            response = generate_recipe_response_fixed('', day, meal_plan, user_condition, intent)
+            answers.append((day, meal_type, user_condition, response))
+    return answers
+
+def precompute_plan_answers(get_db_func, user_id, plan_id, days=None):
+    """Render and store a saved plan's answers (all days, or only the given ones); skipped if a newer plan replaced it"""
+    try:
+        user_condition, plan_key, meal_plan, active_plan_id = load_chat_context(get_db_func, user_id)
+        if active_plan_id != plan_id or not meal_plan:
+            return 0
+        answers = render_plan_answers(meal_plan, user_condition, days)
+        store_answers(_thread_connection(get_db_func), user_id, plan_id, answers, recipe_store.signature)
+        
+        # Warm this process's cache too
+        for day, intent_name, condition, response in answers:
+            if intent_name == ANSWER_HELP:
+                intent = {'is_help': True}
+            else:
+                intent = {'meal_type': intent_name, 'day': None, 'condition': None, 'foods': [], 'is_help': False}
+            response_cache.put(response_key(plan_key, day, condition or None, intent, recipe_store.version), response)
+        return len(answers)
+    except Exception as e:
+        print(f"Error precomputing chat answers for plan {plan_id}: {e}")
+        return 0
+
+def schedule_plan_answers(get_db_func, user_id, plan_id, days=None):
+    """Precompute a newly saved or edited plan's answers in the background"""
+    return submit_precompute(precompute_plan_answers, get_db_func, user_id, plan_id, days)
+
+def get_default_suggestions(current_day, meal_plan):
+    """Get default suggested questions based on current day and meal plan"""
+    
+    # Get available meals for the current day
+    available_meals = []
+    day_foods = {}
+    
+    if meal_plan and current_day in meal_plan:
+        day_plan = meal_plan[current_day]
+        if 'morning' in day_plan and day_plan['morning']:
+            available_meals.append('breakfast')
+            day_foods['breakfast'] = [item.get('food', '') for item in day_plan['morning'] if isinstance(item, dict)]
+        if 'afternoon' in day_plan and day_plan['afternoon']:
+            available_meals.append('lunch')
+            day_foods['lunch'] = [item.get('food', '') for item in day_plan['afternoon'] if isinstance(item, dict)]
+        if 'dinner' in day_plan and day_plan['dinner']:
+            available_meals.append('dinner')
+            day_foods['dinner'] = [item.get('food', '') for item in day_plan['dinner'] if isinstance(item, dict)]
+    
+    if not available_meals:
+        available_meals = ['breakfast', 'lunch', 'dinner']
+        day_foods = {
+            'breakfast': ['Watermelon', 'Oats', 'Boiled Egg'],
+            'lunch': ['Chicken', 'Rice', 'Vegetables'],
+            'dinner': ['Fish', 'Quinoa', 'Spinach']
+        }
+    
+    response = f"🍳 AI Recipe Assistant\n"
+    response += f"Ask me how to prepare your foods!\n"
+    response += f"📅 Today is {current_day} - Here are some questions you can ask:\n"
+    
+    # Generate meal-specific suggestions with actual foods
+    meal_emojis = {'breakfast': '🌅', 'lunch': '🌞', 'dinner': '🌙'}
+    
+    for meal in available_meals:
+        emoji = meal_emojis.get(meal, '🍽️')
+        foods = day_foods.get(meal, [])
+        food_list = ', '.join(foods[:3]) if foods else f"{meal} foods"
+        response += f"\n{emoji} {meal.title()}: '{food_list}'\n   Try: 'Help me cook {current_day} {meal} foods'\n"
+    
+    response += f"\nOther questions you can ask:\n"
+    response += f"• 'How to cook [food name]?'\n"
+    response += f"• 'Recipe for [specific food]'\n"
+    response += f"• 'Healthy cooking tips for [condition]'"
+    
+    return response
+
+def generate_recipe_response_fixed(message, current_day, meal_plan, user_condition, intent=None):
+    """Generate recipe response based on user message and meal plan - matching reference image format"""
+    return ''.join(iter_recipe_response(message, current_day, meal_plan, user_condition, intent))
+
+def iter_recipe_response(message, current_day, meal_plan, user_condition, intent=None):
+    """Recipe response in pieces (header, each food, tips, ideas) so it can be streamed"""
+    if intent is None:
+        intent = match_intent(message, recipe_store)
+    
+    # Detect meal type, day and condition from user message
+    meal_type = intent['meal_type']
+    if intent['day']:
+        current_day = intent['day']
+    if intent['condition']:
+        user_condition = intent['condition']
+    
+    # Get foods for the detected meal type from the CURRENT DAY
+    foods = []
+    
+    if meal_type and meal_plan and current_day in meal_plan:
+        day_plan = meal_plan[current_day]
+        if meal_type in day_plan:
+            meal_items = day_plan[meal_type]
+            foods = [item.get('food', '') for item in meal_items if isinstance(item, dict)]
+    
+    # If no foods found, use defaults based on the day shown in UI
+    if not foods:
+        # For Sunday (as shown in the image), use appropriate defaults
+        sunday_defaults = {
+            'morning': ['Banana', 'Apple', 'Watermelon'],  # From the UI image
+            'afternoon': ['Mixed Steamed Vegetables', 'Steamed Broccoli', 'Steamed Spinach'],
+            'dinner': ['Sautéed Spinach', 'Tofu Curry', 'Steamed Asparagus']
+        }
+        
+        general_defaults = {
+            'morning': ['Watermelon', 'Oats', 'Boiled Egg'],
+            'afternoon': ['Chicken', 'Rice', 'Vegetables'], 
+            'dinner': ['Fish', 'Quinoa', 'Spinach']
+        }
+        
+        # Use Sunday-specific defaults if it's Sunday, otherwise general
+        defaults = sunday_defaults if current_day == 'Sunday' else general_defaults
+        foods = defaults.get(meal_type, ['Oats', 'Banana', 'Milk'])
+    
+    # Build response exactly like the reference image
+    if meal_type:
+        meal_name = {'morning': 'Breakfast', 'afternoon': 'Lunch', 'dinner': 'Dinner'}[meal_type]
+        
+        # Format with minimal gaps - more compact
+        yield (f"🍳 How to Prepare Your {current_day} {meal_name}\n"
+               f"Today is {current_day} and your {meal_name.lower()} includes: {', '.join(foods)}\n"
+               f"Let me guide you through preparing each item:\n")
+        
+        # Format each food instruction with very minimal gaps
+        for food in foods:
+            yield format_food_instruction(food, user_condition)
+        
+        # Add health tips section with minimal gap
+        yield tips_section(f"{current_day} {meal_name} Tips", user_condition)
+        
+        # Add creative meal combinations and suggestions
+        ideas = [f"\n🍽️ Creative {meal_name} Ideas:\n"]
+        ideas.extend(f"• {suggestion}\n" for suggestion in get_creative_meal_suggestions(foods, meal_type))
+        
+        # Closing message
+        ideas.append(f"\n✨ Enjoy your healthy {current_day} {meal_name.lower()}! Have a wonderful day and let me know if you need help with other meals!")
+        yield ''.join(ideas)
+        return
+    
+    # Specific foods asked about: "How to cook quinoa?"
+    if intent['foods']:
+        yield from iter_food_response(intent['foods'], user_condition)
+        return
+    
+    # Free-text questions ("what helps with blood pressure") are answered from the recipe index
+    found = search_section(message, user_condition, meal_plan)
+    
+    # Condition questions: "Healthy cooking tips for diabetes"
+    if intent['condition']:
+        yield tips_section("Healthy Cooking Tips", user_condition)
+        if found:
+            yield "\n" + found
+        return
+    
+    if found:
+        yield found
+        return
+    
+    # Default response for general queries
+    yield get_default_suggestions(current_day, meal_plan)
+
+def generate_food_response(foods, user_condition):
+    """Recipe response for foods named directly in the message"""
+    return ''.join(iter_food_response(foods, user_condition))
+
+def iter_food_response(foods, user_condition):
+    yield f"🍳 How to Prepare {', '.join(foods)}\n"
+    for food in foods:
+        yield format_food_instruction(food, user_condition)
+    yield tips_section("Tips", user_condition)
+
+def get_recipe_index():
+    """BM25 index over food_recipes.json, reopened whenever the recipe store reloads"""
+    global _recipe_index, _recipe_index_version
+    if _recipe_index_version != recipe_store.version:
+        with _recipe_index_lock:
+            if _recipe_index_version != recipe_store.version:
+                try:
+                    _recipe_index = load_or_build(RECIPES_PATH)
+                except Exception as e:
+                    print(f"Warning: Could not load recipe index: {e}")
+                    _recipe_index = None
+                _recipe_index_version = recipe_store.version
+    return _recipe_index
+
+def set_catalog(dataset):
+    """Remember which catalog foods are not safe for each condition (from safe_for), for recipe search"""
+    global _unsafe_foods
+    safe_for = {}
+    if not dataset.empty and 'safe_for' in dataset:
+        for name, conditions in zip(dataset['food'], dataset['safe_for'].fillna('')):
+            safe_for.setdefault(food_key(name), set()).update(c.strip() for c in str(conditions).split(','))
+    unsafe = {}
+    for condition, field in CONDITION_NOTES.items():
+        keys = {key for key, conditions in safe_for.items() if condition not in conditions}
+        # 'hypertension' and 'bp' share a note; a food counts as safe under either name
+        unsafe[field] = unsafe[field] & keys if field in unsafe else keys
+    _unsafe_foods = unsafe
+
+def plan_food_keys(meal_plan):
+    """Index keys of every food in a meal plan that the recipe store knows"""
+    keys = set()
+    for day_plan in (meal_plan or {}).values():
+        if not isinstance(day_plan, dict):
+            continue
+        for items in day_plan.values():
+            for item in items or []:
+                entry = recipe_store.lookup(item.get('food', '')) if isinstance(item, dict) else None
+                if entry:
+                    keys.add(food_key(entry['name']))
+    return keys
+
+def search_section(message, user_condition, meal_plan, k=SEARCH_RESULTS):
+    """Foods from food_recipes.json matching a free-text question, preferring foods in the plan
+    and leaving out foods the catalog marks unsafe for the user's condition"""
+    index = get_recipe_index()
+    if index is None:
+        return None
+    
+    # Foods the catalog marks unsafe for the condition are left out; foods it does not list stay
+    unsafe = _unsafe_foods.get(CONDITION_NOTES.get(user_condition))
+    hits = index.search(message, k, user_condition, plan_food_keys(meal_plan), unsafe) if meal_plan else []
+    source = " in your plan"
+    if not hits:
+        hits = index.search(message, k, user_condition, exclude_keys=unsafe)
+        source = ""
+    if not hits:
+        return None
+    
+    lines = [f"🔎 Foods{source} that match your question:\n"]
+    for name, _ in hits:
+        entry = recipe_store.lookup(name) or {'emoji': '🔸', 'benefits': None, 'notes': {}}
+        lines.append(f"{entry['emoji']} {name.title()}: {entry['benefits'] or 'No details yet'}\n")
+        note = recipe_store.condition_note(entry, user_condition)
+        if note:
+            lines.append(f"   💡 {note}\n")
+    return ''.join(lines)
+
+def tips_section(title, user_condition):
+    """'💡 <title> for <condition>:' followed by one bullet per tip"""
+    lines = [f"💡 {title} for {get_condition_name(user_condition)}:\n"]
+    lines.extend(f"• {tip}\n" for tip in get_condition_tips(user_condition))
+    return ''.join(lines)
+
+def format_food_instruction(food, user_condition):
+    """Cooking instructions for one food from the recipe store"""
+    entry = recipe_store.lookup(food)
+    if entry and entry['instruction']:
+        return f"{entry['emoji']} {food}:\n{entry['instruction']}\n"
+    if entry and entry['recipe']:
+        text = f"{entry['emoji']} {food}:\n{entry['recipe']}\n"
+        if entry['benefits']:
+            text += f"{entry['benefits']}\n"
+        note = recipe_store.condition_note(entry, user_condition)
+        if note:
+            text += f"{note}\n"
+        return text
+    return f"🔸 {food}:\nFresh and nutritious addition to your meal!\n"
+
+# (foods that trigger the idea, idea) per meal, checked in order, then the general ideas
+CREATIVE_SUGGESTION_RULES = {
+    'morning': [
+        (frozenset(['banana', 'apple', 'berries', 'papaya']), "Make a colorful fruit bowl by combining all your fruits with a drizzle of honey"),
+        (frozenset(['oats', 'muesli']), "Create overnight oats by soaking with milk and adding your fruits on top"),
+        (frozenset(['upma', 'poha', 'idli']), "Prepare a South Indian breakfast platter with coconut chutney and sambar"),
+        (frozenset(['greek yogurt']), "Make a protein parfait by layering yogurt with fruits and nuts")
+    ],
+    'afternoon': [
+        (frozenset(['steamed carrots', 'steamed broccoli', 'mixed vegetables']), "Make a colorful veggie soup by blending steamed vegetables with herbs"),
+        (frozenset(['quinoa']), "Create a quinoa power bowl with all your vegetables mixed in"),
+        (frozenset(['rice', 'roti', 'quinoa']), "Make a balanced plate: 1/2 vegetables, 1/4 grains, 1/4 protein"),
+        (frozenset(['bell peppers', 'carrots', 'broccoli']), "Stir-fry all vegetables together with minimal oil and fresh herbs")
+    ],
+    'dinner': [
+        (frozenset(['roasted bell peppers', 'sautéed spinach', 'steamed asparagus']), "Make a hearty vegetable soup by combining roasted vegetables with broth"),
+        (frozenset(['tofu']), "Create a tofu veggie stir-fry by combining with all your vegetables"),
+        (frozenset(['baked sweet potato']), "Stuff sweet potato with sautéed vegetables for a complete meal"),
+        (frozenset(['spinach', 'bell peppers', 'zucchini']), "Make a light vegetable curry with coconut milk and spices")
+    ]
+}
+
+GENERAL_MEAL_SUGGESTIONS = {
+    'morning': [
+        "Start your day with warm lemon water 30 minutes before eating",
+        "Combine protein and fiber foods for sustained energy throughout the morning"
+    ],
+    'afternoon': [
+        "Eat slowly and chew thoroughly for better digestion",
+        "Include a variety of colors on your plate for maximum nutrients"
+    ],
+    'dinner': [
+        "Keep dinner light and finish eating 2-3 hours before bedtime",
+        "Focus on vegetables and lean proteins for better sleep"
+    ]
+}
+
+def get_creative_meal_suggestions(foods, meal_type):
+    """Generate creative meal combination suggestions based on available foods"""
+    
+    food_names = {food.lower() for food in foods}
+    
+    # Food-specific ideas followed by general ones for the meal
+    suggestions = [idea for trigger, idea in CREATIVE_SUGGESTION_RULES.get(meal_type, []) if not food_names.isdisjoint(trigger)]
+    suggestions.extend(GENERAL_MEAL_SUGGESTIONS.get(meal_type, []))
+    
+    # Add meal-specific combination suggestions based on actual foods
+    if len(foods) >= 2:
+        if meal_type == 'morning':
+            suggestions.append(f"Combine {foods[0]} and {foods[1]} for a balanced breakfast with protein and fiber")
+        elif meal_type == 'afternoon':
+            suggestions.append(f"Mix {foods[0]} with {foods[1]} for a nutritious and filling lunch")
+        elif meal_type == 'dinner':
+            suggestions.append(f"Pair {foods[0]} and {foods[1]} for a light yet satisfying dinner")
+    
+    # Limit to 3-4 suggestions to keep response concise
+    return suggestions[:4]
+
+def get_condition_name(condition):
+    """Get proper condition name for display"""
+    condition_names = {
+        'normal': 'bp',  # Like in reference image
+        'diabetes': 'Diabetes',
+        'heart': 'Heart Health',
+        'bp': 'bp',
+        'hypertension': 'bp',
+        'obesity': 'Weight Management'
+    }
+    return condition_names.get(condition, 'bp')
+
+def get_condition_tips(condition):
+    """Get condition-specific tips like in reference image"""
+    condition_tips = {
+        'normal': [
+            'Use minimal salt - flavor with herbs',
+            'Include potassium-rich foods', 
+            'Avoid processed foods',
+            'Stay hydrated with water'
+        ],
+        'diabetes': [
+            'Control portion sizes',
+            'Pair carbs with protein', 
+            'Choose high-fiber foods',
+            'Monitor blood sugar levels'
+        ],
+        'heart': [
+            'Use minimal salt',
+            'Choose lean proteins',
+            'Include omega-3 rich foods', 
+            'Limit saturated fats'
+        ],
+        'bp': [
+            'Use minimal salt - flavor with herbs',
+            'Include potassium-rich foods',
+            'Avoid processed foods', 
+            'Stay hydrated with water'
+        ],
+        'hypertension': [
+            'Use minimal salt - flavor with herbs',
+            'Include potassium-rich foods',
+            'Avoid processed foods',
+            'Stay hydrated with water'
+        ],
+        'obesity': [
+            'Control portion sizes',
+            'Choose high-fiber foods',
+            'Limit calorie-dense foods',
+            'Stay active after meals'
+        ]
+    }
+    
+    return condition_tips.get(condition, condition_tips['normal'])
+
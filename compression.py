@@ -0,0 +1,102 @@
+"""
+Response compression.
+
+Negotiates brotli (when the brotli package is installed) or gzip from the
+request's Accept-Encoding for text and JSON responses of at least
+COMPRESS_MIN_SIZE bytes. Streamed responses, such as the chat's server-sent
+events, pass through untouched so chunks still reach the client as they are
+produced. A strong ETag gets the encoding appended, so each representation
+has its own validator.
+
+COMPRESSION=0 turns it off, e.g. behind a proxy that compresses already.
+Counts and byte totals per encoding are exported on /metrics.
+"""
+
+import gzip
+import os
+import threading
+
+from flask import request
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always offered
+    brotli = None
+
+ENABLED = os.environ.get('COMPRESSION', '1') == '1'
+MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', '5'))
+# Besides text/*; text/event-stream is always streamed
+COMPRESSIBLE = ('application/json', 'application/x-ndjson', 'application/javascript', 'image/svg+xml')
+# Offered in order of preference when the client weighs them equally
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+_lock = threading.Lock()
+_totals = {}  # encoding -> [responses, bytes in, bytes out]
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _compressible(response):
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    mimetype = response.mimetype or ''
+    return (mimetype.startswith('text/') and mimetype != 'text/event-stream') or mimetype in COMPRESSIBLE
+
+
+def _after_request(response):
+    if not _compressible(response):
+        return response
+    length = response.calculate_content_length()
+    if length is None or length < MIN_SIZE:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    if encoding is None:
+        return response
+    data = response.get_data()
+    body = compress(data, encoding)
+    if len(body) >= len(data):
+        return response
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f'{etag}-{encoding}')
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    with _lock:
+        totals = _totals.setdefault(encoding, [0, 0, 0])
+        totals[0] += 1
+        totals[1] += len(data)
+        totals[2] += len(body)
+    return response
+
+
+def _collect():
+    with _lock:
+        totals = sorted((encoding, list(values)) for encoding, values in _totals.items())
+    return (metrics.metric('diet_http_compressed_responses_total', 'counter', 'Responses compressed, by encoding.',
+                           [({'encoding': encoding}, values[0]) for encoding, values in totals])
+            + metrics.metric('diet_http_compression_input_bytes_total', 'counter',
+                             'Response bytes before compression, by encoding.',
+                             [({'encoding': encoding}, values[1]) for encoding, values in totals])
+            + metrics.metric('diet_http_compression_output_bytes_total', 'counter',
+                             'Response bytes sent after compression, by encoding.',
+                             [({'encoding': encoding}, values[2]) for encoding, values in totals]))
+
+
+def init_app(app):
+    """Install the compression hook (nothing with COMPRESSION=0)"""
+    if ENABLED:
+        app.after_request(_after_request)
+        metrics.register(_collect)
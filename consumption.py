@@ -0,0 +1,126 @@
+"""
+Meal consumption writes.
+
+A meal is marked consumed by storing one consumption_log row per food. Rows are
+unique per (user_id, date, meal_type, food_name), so setting a meal is an upsert
+and unsetting it is a single DELETE; neither needs to read the current state
+first. All helpers take a cursor and leave committing to the caller so that the
+updated day totals can be read inside the same transaction.
+"""
+
+
+def ensure_consumption_index(cursor):
+    """Create the unique (user_id, date, meal_type, food_name) index, removing old duplicates first.
+
+    A one-off migration: once the index exists this returns at once. The rows it
+    removes (all but the first of each duplicate set) are printed.
+    """
+    exists = cursor.execute('''
+        SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_consumption_log_meal_food'
+    ''').fetchone()
+    if exists:
+        return
+    duplicates = cursor.execute('''
+        SELECT id, user_id, date, meal_type, food_name FROM consumption_log WHERE id NOT IN (
+            SELECT MIN(id) FROM consumption_log GROUP BY user_id, date, meal_type, food_name
+        )
+        ORDER BY user_id, date, meal_type, id
+    ''').fetchall()
+    if duplicates:
+        print(f"Warning: removing {len(duplicates)} duplicate consumption_log rows "
+              f"before creating idx_consumption_log_meal_food (the first row of each meal food is kept):")
+        for row_id, user_id, date, meal_type, food_name in duplicates:
+            print(f"  id {row_id}: user {user_id}, {date} {meal_type}, {food_name}")
+        cursor.executemany('DELETE FROM consumption_log WHERE id = ?', [(row[0],) for row in duplicates])
+    cursor.execute('''
+        CREATE UNIQUE INDEX idx_consumption_log_meal_food
+        ON consumption_log (user_id, date, meal_type, food_name)
+    ''')
+
+
+def unique_foods(foods):
+    """One entry per food name, the last one given winning, as the upsert stores them"""
+    by_name = {}
+    for food in foods:
+        by_name[food.get('food', '')] = food
+    return list(by_name.values())
+
+
+def _food_row(user_id, meal_type, date, food):
+    return (user_id, meal_type, food.get('food', ''), food.get('calories', 0), food.get('protein', 0),
+            food.get('carbs', 0), food.get('fat', 0), date)
+
+
+def set_meals(cursor, user_id, meals):
+    """Apply {(meal_type, date): foods} where foods is a list to set or None to unset"""
+    unset = [(user_id, date, meal_type) for (meal_type, date), foods in meals.items() if foods is None]
+    if unset:
+        cursor.executemany('''
+            DELETE FROM consumption_log WHERE user_id = ? AND date = ? AND meal_type = ?
+        ''', unset)
+
+    rows = []
+    for (meal_type, date), foods in meals.items():
+        if foods is None:
+            continue
+        foods = unique_foods(foods)
+        # Foods dropped from the meal since it was last set
+        names = [food.get('food', '') for food in foods]
+        placeholders = ','.join('?' * len(names))
+        cursor.execute(f'''
+            DELETE FROM consumption_log
+            WHERE user_id = ? AND date = ? AND meal_type = ? AND food_name NOT IN ({placeholders})
+        ''', [user_id, date, meal_type] + names)
+        rows.extend(_food_row(user_id, meal_type, date, food) for food in foods)
+
+    if rows:
+        cursor.executemany('''
+            INSERT INTO consumption_log (user_id, meal_type, food_name, calories, protein, carbs, fat, date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (user_id, date, meal_type, food_name) DO UPDATE SET
+                calories = excluded.calories,
+                protein = excluded.protein,
+                carbs = excluded.carbs,
+                fat = excluded.fat
+        ''', rows)
+
+
+def set_meal_consumed(cursor, user_id, meal_type, date, foods):
+    """Mark a meal consumed with exactly these foods"""
+    set_meals(cursor, user_id, {(meal_type, date): list(foods)})
+
+
+def unset_meal_consumed(cursor, user_id, meal_type, date):
+    """Mark a meal not consumed; returns how many food rows were removed"""
+    cursor.execute('''
+        DELETE FROM consumption_log WHERE user_id = ? AND date = ? AND meal_type = ?
+    ''', (user_id, date, meal_type))
+    return cursor.rowcount
+
+
+def toggle_meal_consumed(cursor, user_id, meal_type, date, foods):
+    """Flip a meal's consumed state; the DELETE doubles as the existence check"""
+    if unset_meal_consumed(cursor, user_id, meal_type, date):
+        return False
+    set_meal_consumed(cursor, user_id, meal_type, date, foods)
+    return True
+
+
+def day_totals(cursor, user_id, date):
+    """Consumed meals and nutrient totals for one day"""
+    meals, foods, calories, protein, carbs, fat = cursor.execute('''
+        SELECT COUNT(DISTINCT meal_type), COUNT(*),
+               COALESCE(SUM(calories), 0), COALESCE(SUM(protein), 0),
+               COALESCE(SUM(carbs), 0), COALESCE(SUM(fat), 0)
+        FROM consumption_log WHERE user_id = ? AND date = ?
+    ''', (user_id, date)).fetchone()
+    return {
+        'date': date,
+        'consumed_meals': meals,
+        'total_foods': foods,
+        'is_complete': meals >= 3,
+        'calories': calories,
+        'protein': protein,
+        'carbs': carbs,
+        'fat': fat
+    }
@@ -0,0 +1,101 @@
+"""
+Weekly dashboard aggregation.
+
+Both dashboards start from the same rows, (date, meal_type, calories) per meal
+consumed in the last week, and bucket them into this week's Sunday-Saturday
+days by weekday name. The functions here are pure so they can be benchmarked
+and reused without Flask or SQLite; `today` is passed in.
+"""
+
+from datetime import date as Date, datetime, timedelta
+
+DAYS = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+MEALS_PER_DAY = 3
+TARGET_CALORIES = 6537
+
+# Last week's meals per (date, meal_type) with their calories
+WEEK_CONSUMPTION_SQL = '''
+    SELECT date, meal_type, SUM(calories) as meal_calories
+    FROM consumption_log
+    WHERE user_id = ?
+    AND date >= date('now', '-7 days')
+    GROUP BY date, meal_type
+'''
+
+
+def day_name(date):
+    """Weekday name of a YYYY-MM-DD date"""
+    try:
+        weekday = Date.fromisoformat(date).weekday()
+    except ValueError:
+        weekday = datetime.strptime(date, '%Y-%m-%d').weekday()
+    return DAYS[(weekday + 1) % 7]
+
+
+def week_dates(today):
+    """{day name: YYYY-MM-DD} for the Sunday-Saturday week containing today"""
+    week_start_sunday = today - timedelta(days=(today.weekday() + 1) % 7)
+    return {day: (week_start_sunday + timedelta(days=i)).strftime('%Y-%m-%d') for i, day in enumerate(DAYS)}
+
+
+def _meals_by_day(rows):
+    """{day name: [meals consumed, calories]} plus overall (meals, calories)"""
+    by_day = {day: [0, 0] for day in DAYS}
+    total_meals = 0
+    total_calories = 0
+    for date, meal_type, meal_calories in rows:
+        day = by_day[day_name(date)]
+        day[0] += 1  # Count each meal type as 1 meal
+        day[1] += meal_calories
+        total_meals += 1
+        total_calories += meal_calories
+    return by_day, total_meals, total_calories
+
+
+def weekly_dashboard(rows, today):
+    """Payload of /get_weekly_dashboard from last week's (date, meal_type, calories) rows"""
+    by_day, total_meals, total_calories = _meals_by_day(rows)
+    total_possible_meals = len(DAYS) * MEALS_PER_DAY
+    daily_breakdown = {
+        day: {
+            'date': day_date,
+            'meals_consumed': by_day[day][0],
+            'total_meals': MEALS_PER_DAY,
+            'calories': by_day[day][1],
+            'is_complete': by_day[day][0] >= MEALS_PER_DAY
+        }
+        for day, day_date in week_dates(today).items()
+    }
+    return {
+        'total_calories_consumed': total_calories,
+        'total_meals_consumed': total_meals,
+        'total_possible_meals': total_possible_meals,
+        'daily_breakdown': daily_breakdown,
+        'goal_percentage': round((total_meals / total_possible_meals) * 100),
+        'target_calories': TARGET_CALORIES,
+        'calorie_percentage': round((total_calories / TARGET_CALORIES) * 100)
+    }
+
+
+def health_dashboard(rows, today):
+    """Payload of /health_dashboard from last week's (date, meal_type, calories) rows"""
+    by_day, total_meals, total_calories = _meals_by_day(rows)
+    total_possible_meals = len(DAYS) * MEALS_PER_DAY
+    chart_data = [
+        {
+            'day': day[:3],  # Sun, Mon, Tue, etc.
+            'meals_consumed': by_day[day][0],
+            'completion_percentage': (by_day[day][0] / MEALS_PER_DAY) * 100 if by_day[day][0] > 0 else 0
+        }
+        for day in DAYS
+    ]
+    return {
+        'weekly': {
+            'meal_completion_percentage': (total_meals / total_possible_meals) * 100,
+            'total_calories': total_calories,
+            'total_planned_calories': TARGET_CALORIES,
+            'meals_consumed': total_meals,
+            'total_possible_meals': total_possible_meals,
+            'chart_data': chart_data
+        }
+    }
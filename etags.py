@@ -0,0 +1,122 @@
+"""
+Strong ETags from cheap version counters.
+
+user_versions keeps per-user counters that triggers bump on every insert,
+update or delete in saved_meal_plans (plan_version) and consumption_log
+(consumption_version), whichever route or job did the write. A read route can
+then build its ETag from one primary-key lookup and answer If-None-Match with
+a 304 before running its query, touching pandas or serializing anything.
+Counters live in SQLite so every serve.py worker agrees on them, and a random
+epoch stored with the schema keeps tags from a recreated database from
+matching.
+
+Tags also cover the JSON provider in use, since orjson and the stdlib encode
+the same data to different bytes. compression.py appends the content encoding
+to the tags it compresses, and those variants match here too.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+
+from flask import current_app, request
+
+import compression
+
+VERSION_COLUMNS = {'plan': 'plan_version', 'consumption': 'consumption_version'}
+# Tables whose writes bump each counter
+VERSIONED_TABLES = {'saved_meal_plans': 'plan_version', 'consumption_log': 'consumption_version'}
+CACHE_CONTROL = 'private, no-cache'
+
+_epoch = None
+
+
+def ensure_version_tables(cursor):
+    """Create user_versions, the epoch row and the triggers that bump the counters"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_versions (
+            user_id INTEGER PRIMARY KEY,
+            plan_version INTEGER NOT NULL DEFAULT 0,
+            consumption_version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS version_epoch (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            epoch TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO version_epoch (id, epoch) VALUES (1, ?)', (os.urandom(8).hex(),))
+    for table, column in VERSIONED_TABLES.items():
+        for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_version
+                AFTER {event} ON {table} WHEN {row}.user_id IS NOT NULL
+                BEGIN
+                    INSERT INTO user_versions (user_id, {column}) VALUES ({row}.user_id, 1)
+                    ON CONFLICT (user_id) DO UPDATE SET {column} = {column} + 1;
+                END
+            ''')
+
+
+def catalog_version(dataset):
+    """Digest of the food catalog's contents"""
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(','.join(map(str, dataset.columns)).encode())
+    if not dataset.empty:
+        import pandas as pd
+        digest.update(pd.util.hash_pandas_object(dataset, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def _database_epoch(cursor):
+    global _epoch
+    if _epoch is None:
+        row = cursor.execute('SELECT epoch FROM version_epoch WHERE id = 1').fetchone()
+        _epoch = row[0] if row else ''
+    return _epoch
+
+
+def make_etag(*parts):
+    """Strong ETag value for a representation identified by parts"""
+    key = '|'.join(map(str, parts + (type(current_app.json).__name__,)))
+    return hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+
+
+def user_etag(cursor, user_id, kind, *parts):
+    """ETag from a user's plan or consumption counter plus any other inputs of the response"""
+    row = cursor.execute(f'SELECT {VERSION_COLUMNS[kind]} FROM user_versions WHERE user_id = ?',
+                         (user_id,)).fetchone()
+    return make_etag(kind, user_id, row[0] if row else 0, _database_epoch(cursor), *parts)
+
+
+def day_parts():
+    """Today's local and UTC dates, for responses windowed on the current week"""
+    return datetime.now().strftime('%Y-%m-%d'), datetime.utcnow().strftime('%Y-%m-%d')
+
+
+def not_modified(etag):
+    """A 304 response when If-None-Match matches etag or a compressed variant of it, else None"""
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return None
+    if if_none_match.star_tag:
+        matched = etag
+    else:
+        tags = if_none_match.as_set(include_weak=True)
+        variants = [etag] + [f'{etag}-{encoding}' for encoding in compression.ENCODINGS]
+        matched = next((tag for tag in variants if tag in tags), None)
+        if matched is None:
+            return None
+    response = current_app.response_class(status=304)
+    response.set_etag(matched)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def with_etag(response, etag):
+    """Tag a 200 response; clients must revalidate before reusing it"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
@@ -0,0 +1,29 @@
+"""
+gunicorn settings matching serve.py:
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The app is imported once in the master (preload_app) and prepared there, so
+workers share the model, dataset and indexes copy-on-write.
+"""
+
+import serve
+
+bind = f"{serve.HOST}:{serve.PORT}"
+workers = serve.default_workers()
+threads = serve.THREADS
+worker_class = 'gthread'
+preload_app = True
+graceful_timeout = int(serve.GRACEFUL_TIMEOUT)
+timeout = 60
+
+serve.configure_environment(workers)
+
+
+def on_starting(server):
+    serve.prepare()
+
+
+def worker_exit(server, worker):
+    import app
+    app.water_store.close()
@@ -0,0 +1,138 @@
+"""
+Compiled intent matcher for chat messages.
+
+All keywords (meal types, day names, health conditions and known food names) are
+compiled into one regular expression built from a prefix trie, so a message is
+scanned once regardless of how many intents or foods exist. Each match is mapped
+back to its intent through a dict.
+"""
+
+import re
+import threading
+
+from recipe_store import food_key, normalize_name, plurals
+
+# Checked in this order; the first meal type mentioned anywhere wins
+MEAL_KEYWORDS = {
+    'morning': ('breakfast', 'morning'),
+    'afternoon': ('lunch', 'afternoon'),
+    'dinner': ('dinner', 'evening')
+}
+
+DAY_NAMES = ('Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday')
+
+CONDITION_KEYWORDS = {
+    'diabetes': ('diabetes', 'diabetic', 'blood sugar', 'sugar level'),
+    'bp': ('blood pressure', 'hypertension', 'bp'),
+    'heart': ('heart', 'cholesterol', 'cardiac'),
+    'obesity': ('obesity', 'weight loss', 'lose weight', 'overweight')
+}
+
+# A condition word right after one of these ("tips for diabetes", "I have bp") asks about that condition
+CONDITION_CUES = ('for', 'with', 'about', 'against', 'have', 'has', 'manage', 'managing', 'control', 'controlling')
+CONDITION_CUE_FILLERS = ('my', 'a', 'high', 'low')
+
+HELP_PHRASES = frozenset(['default', 'help', 'suggestions', 'what can you do', 'hello'])
+
+
+def trie_pattern(words):
+    """Regex alternation for words with shared prefixes factored out, longest match first"""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def build(node):
+        ends = '' in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if ends:
+            return '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+
+class IntentMatcher:
+    """Extracts meal type, day, condition and mentioned foods from a message in one pass"""
+
+    def __init__(self, food_names=()):
+        # Every spelling the normalized message may contain -> display name
+        self.food_names = {}
+        for name in food_names:
+            key = food_key(name)
+            if not key:
+                continue
+            display = name.title()
+            head, _, last = key.rpartition(' ')
+            forms = [normalize_name(name), key] + [(head + ' ' + plural).strip() for plural in plurals(last)]
+            for form in forms:
+                self.food_names.setdefault(form, display)
+
+        # Meal words keep the old substring semantics; everything else matches whole words
+        self.meal_lookup = {word: meal for meal, words in MEAL_KEYWORDS.items() for word in words}
+        self.day_lookup = {day.lower(): day for day in DAY_NAMES}
+        self.condition_lookup = {word: condition for condition, words in CONDITION_KEYWORDS.items() for word in words}
+
+        self.pattern = re.compile(
+            r'(?P<meal>' + trie_pattern(self.meal_lookup) + r')'
+            r'|\b(?P<day>' + trie_pattern(self.day_lookup) + r')\b'
+            r'|\b(?:(?P<cue>' + '|'.join(CONDITION_CUES) + r') (?:(?:' + '|'.join(CONDITION_CUE_FILLERS) + r') )?)?'
+            r'(?P<condition>' + trie_pattern(self.condition_lookup) + r')\b'
+            + (r'|\b(?P<food>' + trie_pattern(self.food_names) + r')\b' if self.food_names else '')
+        )
+
+    def match(self, message):
+        """Intent dict for a chat message"""
+        text = normalize_name(message)
+        meals = set()
+        day = None
+        condition = None
+        condition_cued = False
+        foods = []
+
+        for m in self.pattern.finditer(text):
+            kind = m.lastgroup
+            if kind == 'meal':
+                meals.add(self.meal_lookup[m.group('meal')])
+            elif kind == 'day':
+                day = day or self.day_lookup[m.group('day')]
+            elif kind == 'condition':
+                condition = condition or self.condition_lookup[m.group('condition')]
+                condition_cued = condition_cued or m.group('cue') is not None
+            else:
+                name = self.food_names[m.group('food')]
+                if name not in foods:
+                    foods.append(name)
+
+        # A passing mention ("heart healthy breakfast") keeps the user's own condition
+        if not condition_cued and (meals or foods):
+            condition = None
+        return {
+            'meal_type': next((meal for meal in MEAL_KEYWORDS if meal in meals), None),
+            'day': day,
+            'condition': condition,
+            'foods': foods,
+            'is_help': str(message).strip().lower() in HELP_PHRASES
+        }
+
+
+_matcher = None
+_matcher_version = None
+_matcher_lock = threading.Lock()
+
+
+def match_intent(message, store):
+    """Match a message against the shared matcher, rebuilding it when the recipe store reloads"""
+    global _matcher, _matcher_version
+    store.check_reload()
+    if _matcher_version != store.version:
+        with _matcher_lock:
+            if _matcher_version != store.version:
+                _matcher = IntentMatcher(store.names())
+                _matcher_version = store.version
+    return _matcher.match(message)
@@ -0,0 +1,78 @@
+"""
+Faster JSON for Flask responses.
+
+OrjsonProvider replaces Flask's default JSON provider with orjson when it is
+installed, so the large plan, food-list and dashboard payloads are encoded
+straight to bytes several times faster. Output keeps Flask's conventions:
+sorted keys, dates as HTTP dates through Flask's default hook, and indentation
+in debug mode. There are two differences. Non-ASCII text is sent as UTF-8
+rather than \\u escapes, and NaN becomes null instead of the invalid NaN token.
+Anything orjson cannot encode, such as integers over 64 bits, falls back to
+the standard library. So does parsing request bodies that only Python's json
+accepts.
+
+JSON_ENCODER selects the provider: auto (default; orjson when importable),
+orjson or stdlib.
+"""
+
+import json
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; Flask's stdlib provider stays in place
+    orjson = None
+
+ENCODER = os.environ.get('JSON_ENCODER', 'auto')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, with the stdlib provider as fallback"""
+
+    def _option(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj, indent=False):
+        """UTF-8 JSON bytes, compact unless indent"""
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._option(indent))
+        except TypeError:
+            dump_args = {'indent': 2} if indent else {'separators': (',', ':')}
+            return super().dumps(obj, **dump_args).encode()
+
+    def dumps(self, obj, **kwargs):
+        # Explicit json.dumps arguments keep the stdlib encoder's exact behavior
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            return json.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
+
+
+def init_app(app):
+    """Install OrjsonProvider unless JSON_ENCODER=stdlib or orjson is missing"""
+    if ENCODER == 'stdlib':
+        return
+    if orjson is None:
+        if ENCODER == 'orjson':
+            print("Warning: JSON_ENCODER=orjson but orjson is not installed; using the standard library")
+        return
+    app.json = OrjsonProvider(app)
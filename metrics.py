@@ -0,0 +1,277 @@
+"""
+Request and SQLite metrics in Prometheus text format.
+
+init_app() adds request hooks that count requests per route, method and status
+and record latency histograms. Connections opened with factory=Connection count
+statements and the time spent in SQLite (execute and fetch calls), attributed to
+the route of the request that ran them, or to 'background' for work outside a
+request. Streamed responses are recorded when the stream closes, so their
+latency and SQL cover generating the whole body. The same cursors feed the
+slow-query log (slow_queries.py). render() produces the /metrics page; other
+modules can add their own lines with register().
+
+METRICS_SAMPLE_RATE is the fraction of requests that are timed (default 1);
+request counts always cover every request. At 0 nothing is installed: no hooks
+and plain sqlite3 connections. Counters are per process, so each serve.py
+worker reports its own.
+"""
+
+import os
+import random
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+
+from flask import request
+
+import slow_queries
+
+SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', '1'))
+ENABLED = SAMPLE_RATE > 0
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+BACKGROUND = 'background'
+UNMATCHED = 'unmatched'
+
+_lock = threading.Lock()
+_local = threading.local()  # .request: [start, statements, sql seconds], False when not sampled
+_requests = {}       # (route, method, status) -> count
+_latency = {}        # (route, method) -> _Histogram of seconds
+_statements = {}     # route -> _Histogram of statements per request
+_sql = {}            # route -> [statements, seconds]
+_collectors = []
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'counts', 'total')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+
+# ---------------- SQLite ----------------
+def _record_sql(elapsed, statements):
+    state = getattr(_local, 'request', None)
+    if state:
+        state[1] += statements
+        state[2] += elapsed
+    elif state is None:
+        with _lock:
+            totals = _sql.setdefault(BACKGROUND, [0, 0.0])
+            totals[0] += statements
+            totals[1] += elapsed
+
+
+class Cursor(sqlite3.Cursor):
+    """Cursor that counts statements and times execute and fetch calls"""
+
+    # [sql, parameters, many, seconds so far, slow-query record] of the last statement
+    _statement = None
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._observe(time.perf_counter() - start, [sql, parameters, False, 0.0, None])
+
+    def executemany(self, sql, seq_of_parameters):
+        if slow_queries.ENABLED and not isinstance(seq_of_parameters, (list, tuple)):
+            seq_of_parameters = list(seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._observe(time.perf_counter() - start, [sql, seq_of_parameters, True, 0.0, None])
+
+    def fetchone(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self._observe(time.perf_counter() - start)
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            self._observe(time.perf_counter() - start)
+
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._observe(time.perf_counter() - start)
+
+    def _observe(self, elapsed, statement=None):
+        _record_sql(elapsed, 1 if statement else 0)
+        if not slow_queries.ENABLED:
+            return
+        if statement:
+            self._statement = statement
+        statement = self._statement
+        if statement is None:
+            return
+        # A statement's time includes the fetches that step through its rows
+        statement[3] += elapsed
+        if statement[3] >= slow_queries.THRESHOLD:
+            if statement[4] is None:
+                statement[4] = slow_queries.record(self.connection, statement[0], statement[1], statement[3], statement[2])
+            else:
+                statement[4]['duration_ms'] = round(statement[3] * 1000, 3)
+
+
+class _Connection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute shortcuts) are instrumented"""
+
+    def cursor(self, factory=Cursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# Pass as sqlite3.connect(..., factory=Connection)
+Connection = _Connection if ENABLED or slow_queries.ENABLED else sqlite3.Connection
+
+
+# ---------------- Requests ----------------
+def _before_request():
+    if SAMPLE_RATE >= 1 or random.random() < SAMPLE_RATE:
+        _local.request = [time.perf_counter(), 0, 0.0]
+    else:
+        _local.request = False
+
+
+def _record(route, method, status, state):
+    key = (route, method, status)
+    with _lock:
+        _requests[key] = _requests.get(key, 0) + 1
+        if state:
+            elapsed = time.perf_counter() - state[0]
+            latency = _latency.get(key[:2])
+            if latency is None:
+                latency = _latency[key[:2]] = _Histogram(LATENCY_BUCKETS)
+            latency.observe(elapsed)
+            statements = _statements.get(route)
+            if statements is None:
+                statements = _statements[route] = _Histogram(STATEMENT_BUCKETS)
+            statements.observe(state[1])
+            totals = _sql.setdefault(route, [0, 0.0])
+            totals[0] += state[1]
+            totals[1] += state[2]
+
+
+def _after_request(response):
+    state = getattr(_local, 'request', None)
+    rule = request.url_rule
+    route = rule.rule if rule is not None else UNMATCHED
+    method, status = request.method, response.status_code
+    if response.is_streamed:
+        # The body is generated after this hook, on this thread: SQL stays attributed to the
+        # request, which is recorded with its full duration when the server closes the stream
+        def finish():
+            if getattr(_local, 'request', None) is state:
+                _local.request = None
+            _record(route, method, status, state)
+        response.call_on_close(finish)
+        return response
+    _local.request = None
+    _record(route, method, status, state)
+    return response
+
+
+def init_app(app):
+    """Install the request hooks (nothing when METRICS_SAMPLE_RATE is 0)"""
+    if ENABLED:
+        app.before_request(_before_request)
+        app.after_request(_after_request)
+
+
+def register(collector):
+    """Add a callable returning extra exposition lines to /metrics"""
+    _collectors.append(collector)
+
+
+def reset():
+    with _lock:
+        _requests.clear()
+        _latency.clear()
+        _statements.clear()
+        _sql.clear()
+
+
+# ---------------- Exposition ----------------
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def labels(**values):
+    """Prometheus label set, e.g. {route="/chat",method="POST"}"""
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in values.items()) + '}'
+
+
+def _format(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def metric(name, kind, help_text, samples):
+    """Exposition lines for one metric from [(label dict, value)]"""
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+    lines.extend(f'{name}{labels(**label_values) if label_values else ""} {_format(value)}'
+                 for label_values, value in samples)
+    return lines
+
+
+def _histogram_lines(name, help_text, histograms):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for label_values, histogram in histograms:
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{labels(**label_values, le=bound)} {cumulative}')
+        lines.append(f'{name}_sum{labels(**label_values)} {_format(float(histogram.total))}')
+        lines.append(f'{name}_count{labels(**label_values)} {cumulative}')
+    return lines
+
+
+def render():
+    """All metrics as Prometheus text exposition"""
+    with _lock:
+        requests = sorted(_requests.items())
+        latency = [({'route': route, 'method': method}, histogram)
+                   for (route, method), histogram in sorted(_latency.items())]
+        statements = [({'route': route}, histogram) for route, histogram in sorted(_statements.items())]
+        sql = sorted((route, list(totals)) for route, totals in _sql.items())
+        lines = metric('diet_http_requests_total', 'counter', 'Requests handled, by route, method and status.',
+                       [({'route': route, 'method': method, 'status': status}, count)
+                        for (route, method, status), count in requests])
+        lines += _histogram_lines('diet_http_request_duration_seconds',
+                                  'Time spent in the handler, including SQL.', latency)
+        lines += _histogram_lines('diet_sql_statements_per_request',
+                                  'SQLite statements issued by one request.', statements)
+    lines += metric('diet_sql_statements_total', 'counter', 'SQLite statements executed, by route.',
+                    [({'route': route}, totals[0]) for route, totals in sql])
+    lines += metric('diet_sql_seconds_total', 'counter', 'Seconds spent in SQLite execute and fetch calls, by route.',
+                    [({'route': route}, float(totals[1])) for route, totals in sql])
+    lines += metric('diet_metrics_sample_rate', 'gauge', 'Fraction of requests timed.', [({}, SAMPLE_RATE)])
+    for collector in _collectors:
+        try:
+            lines.extend(collector())
+        except Exception as e:
+            print(f"Warning: metrics collector failed: {e}")
+    return '\n'.join(lines) + '\n'
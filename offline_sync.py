@@ -0,0 +1,173 @@
+"""
+Offline event replay for /sync_events.
+
+Mobile clients queue meal and water events while offline and send them in one
+batch when they reconnect. Every event carries a client-generated idempotency
+key; keys are remembered in sync_event_keys so a retried batch never applies an
+event twice. Meal events are explicit set/unset (not toggles), so replaying them
+in client timestamp order always converges to the same state.
+"""
+
+import json
+
+from consumption import set_meals
+from water_counters import KEEP_RAW_TAPS, apply_daily_deltas, hour_of
+
+MAX_EVENTS = 500
+KEY_RETENTION_DAYS = 30
+MEAL_TYPES = ('morning', 'afternoon', 'dinner')
+NUTRIENTS = ('calories', 'protein', 'carbs', 'fat')
+
+# SQLite limits the number of bound parameters per statement
+_IN_CHUNK = 500
+
+
+def _validate(event):
+    """Return an error message for a malformed event, or None"""
+    if not isinstance(event, dict):
+        return 'Event must be an object'
+    if not event.get('idempotency_key'):
+        return 'idempotency_key is required'
+    event_type = event.get('type')
+    if event_type == 'meal':
+        if event.get('meal_type') not in MEAL_TYPES:
+            return 'meal_type must be morning, afternoon or dinner'
+        if not event.get('date'):
+            return 'date is required'
+        if event.get('consumed', True):
+            return validate_foods(event.get('foods', []))
+    elif event_type == 'water':
+        if not (event.get('consumed_date') or event.get('client_ts')):
+            return 'consumed_date or client_ts is required'
+        try:
+            if int(event.get('glasses', 1)) < 1:
+                return 'glasses must be positive'
+        except (TypeError, ValueError):
+            return 'glasses must be a number'
+    else:
+        return 'type must be meal or water'
+    return None
+
+
+def validate_foods(foods):
+    """Error message unless foods is a list of {'food': name, nutrient: number} objects"""
+    if not isinstance(foods, list):
+        return 'foods must be a list'
+    for food in foods:
+        if not isinstance(food, dict):
+            return 'each food must be an object'
+        if not isinstance(food.get('food', ''), str):
+            return 'food name must be a string'
+        for nutrient in NUTRIENTS:
+            value = food.get(nutrient, 0)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                return f'{nutrient} must be a number'
+    return None
+
+
+def _seen_keys(cursor, user_id, keys):
+    """Map of already-applied idempotency keys to their stored results"""
+    seen = {}
+    for start in range(0, len(keys), _IN_CHUNK):
+        chunk = keys[start:start + _IN_CHUNK]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(f'''
+            SELECT idempotency_key, result FROM sync_event_keys
+            WHERE user_id = ? AND idempotency_key IN ({placeholders})
+        ''', [user_id] + chunk)
+        for key, result in cursor.fetchall():
+            seen[key] = json.loads(result) if result else {}
+    return seen
+
+
+def _water_fields(event):
+    """(consumed_date, consumed_time, glasses) for a water event, filled from client_ts if needed"""
+    client_ts = str(event.get('client_ts') or '')
+    consumed_date = event.get('consumed_date') or client_ts[:10]
+    consumed_time = event.get('consumed_time') or client_ts[11:16] or '00:00'
+    return consumed_date, consumed_time, int(event.get('glasses', 1))
+
+
+def apply_sync_events(conn, user_id, events, water_store=None):
+    """Apply a batch of offline events in one transaction and return one result per event"""
+    results = [None] * len(events)
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        valid = []
+        for index, event in enumerate(events):
+            error = _validate(event)
+            if error:
+                results[index] = {'idempotency_key': event.get('idempotency_key') if isinstance(event, dict) else None,
+                                  'status': 'error', 'error': error}
+            else:
+                valid.append(index)
+
+        seen = _seen_keys(cursor, user_id, list({str(events[i]['idempotency_key']) for i in valid}))
+
+        fresh = []
+        for index in valid:
+            key = str(events[index]['idempotency_key'])
+            if key in seen:
+                results[index] = dict(seen[key] or {}, idempotency_key=key, status='duplicate')
+            else:
+                seen[key] = None  # a repeated key later in the same batch is a duplicate too
+                fresh.append(index)
+
+        # Replay in client order; the last meal event for a (meal_type, date) wins
+        fresh.sort(key=lambda i: str(events[i].get('client_ts') or ''))
+
+        meal_state = {}
+        water_rows = []
+        water_deltas = {}
+        for index in fresh:
+            event = events[index]
+            if event['type'] == 'meal':
+                consumed = bool(event.get('consumed', True))
+                meal_state[(event['meal_type'], event['date'])] = event.get('foods', []) if consumed else None
+                results[index] = {'type': 'meal', 'meal_type': event['meal_type'], 'date': event['date'],
+                                  'consumed': consumed}
+            else:
+                consumed_date, consumed_time, glasses = _water_fields(event)
+                water_rows.append((user_id, glasses, consumed_time, consumed_date))
+                delta = water_deltas.setdefault((user_id, consumed_date), {'total': 0, 'taps': 0, 'hourly': [0] * 24})
+                delta['total'] += glasses
+                delta['taps'] += 1
+                delta['hourly'][hour_of(consumed_time)] += glasses
+                results[index] = {'type': 'water', 'consumed_date': consumed_date, 'glasses': glasses}
+
+        if meal_state:
+            set_meals(cursor, user_id, meal_state)
+
+        if water_deltas:
+            apply_daily_deltas(cursor, water_deltas)
+            if KEEP_RAW_TAPS:
+                cursor.executemany('''
+                    INSERT INTO water_consumption (user_id, glasses, consumed_time, consumed_date)
+                    VALUES (?, ?, ?, ?)
+                ''', water_rows)
+
+        cursor.executemany('''
+            INSERT INTO sync_event_keys (user_id, idempotency_key, event_type, result)
+            VALUES (?, ?, ?, ?)
+        ''', [
+            (user_id, str(events[index]['idempotency_key']), events[index]['type'], json.dumps(results[index]))
+            for index in fresh
+        ])
+        cursor.execute(f'''
+            DELETE FROM sync_event_keys
+            WHERE user_id = ? AND created_at < datetime('now', '-{KEY_RETENTION_DAYS} days')
+        ''', (user_id,))
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    if water_store is not None:
+        for user, glasses, consumed_time, consumed_date in water_rows:
+            water_store.record_persisted(user, consumed_date, consumed_time, glasses)
+
+    for index in fresh:
+        results[index] = dict(results[index], idempotency_key=str(events[index]['idempotency_key']), status='applied')
+    return results
@@ -0,0 +1,146 @@
+"""
+Meal plan generation rules shared by the weekly generator and single-meal edits.
+
+A meal holds the user's selected food for that day (rotating through their
+selections) topped up with recommended foods from the catalog. Recommendations
+are filtered by meal, health condition and diet, and picked least-used-first so
+foods don't repeat across the week.
+
+Plans are produced one day at a time by iter_plan_days from a plain-JSON state
+(day index, user selections and per-meal usage counts). A long plan can stop
+after any week, hand its state to the client and resume later with the same
+rotation, so each request only does a week's work however long the plan is.
+"""
+
+from collections import Counter
+from itertools import islice
+
+DAYS = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+MEAL_TYPES = ['morning', 'afternoon', 'dinner']
+FOODS_PER_MEAL = 3
+MAX_WEEKS = 12
+STATE_VERSION = 1
+
+
+def meal_candidates(dataset, meal_type, health_condition, diet_preference, exclude_names=()):
+    """Catalog foods allowed for a meal, in catalog order, as records"""
+    # training_dataset.csv uses 'meal' column (not meal_type)
+    filtered_foods = dataset[dataset['meal'] == meal_type]
+
+    # Apply health condition filter
+    if health_condition and health_condition != 'normal':
+        if 'safe_for' in filtered_foods.columns:
+            filtered_foods = filtered_foods[filtered_foods['safe_for'].str.contains(health_condition, na=False)]
+
+    # Apply diet preference filter
+    if diet_preference == 'veg':
+        if 'veg_type' in filtered_foods.columns:
+            filtered_foods = filtered_foods[filtered_foods['veg_type'] == 'veg']
+
+    if exclude_names:
+        filtered_foods = filtered_foods[~filtered_foods['food'].isin(list(exclude_names))]
+    return filtered_foods.to_dict('records')
+
+
+def plan_item(food):
+    """A recommended food as stored in a meal plan"""
+    return {
+        'food': food['food'],
+        'calories': float(food['calories']),
+        'protein': float(food['protein']),
+        'carbs': float(food['carbs']),
+        'fat': float(food['fat']),
+        'veg_type': food.get('veg_type', 'veg'),
+        'isUserSelected': False
+    }
+
+
+def build_meal(candidates, day_index, user_selected, usage, avoid=()):
+    """Foods for one meal: the day's rotated user selection plus least-used recommendations.
+
+    usage is a Counter of how often each food was already recommended for this
+    meal type; it is updated with the foods picked here. Among equally used
+    foods, names in avoid (e.g. the meal being regenerated) come last.
+    """
+    meal = []
+    if user_selected:
+        selected_food = dict(user_selected[day_index % len(user_selected)])
+        selected_food['isUserSelected'] = True
+        meal.append(selected_food)
+
+    needed_foods = FOODS_PER_MEAL - len(meal)
+    if len(candidates) >= needed_foods:
+        # Sort by which foods haven't been used recently (stable, so catalog order breaks ties)
+        ranked = sorted(candidates, key=lambda food: (usage[food['food']], food['food'] in avoid))
+        for food in ranked[:needed_foods]:
+            meal.append(plan_item(food))
+            usage[food['food']] += 1
+    return meal
+
+
+def meal_usage(plan_foods, skip_day=None):
+    """Counter of food names over {day: [food names]}, ignoring one day"""
+    return Counter(name for day, names in plan_foods.items() if day != skip_day for name in names if name)
+
+
+def new_plan_state(selected_foods=None, weeks=1):
+    """Generator state for a fresh plan of the given number of weeks"""
+    return {
+        'version': STATE_VERSION,
+        'day_index': 0,
+        'weeks': weeks,
+        'selected_foods': selected_foods or {},
+        'used_foods': {meal_type: {} for meal_type in MEAL_TYPES}
+    }
+
+
+def load_plan_state(state):
+    """Validate a state sent back by a client; raises ValueError"""
+    if not isinstance(state, dict) or state.get('version') != STATE_VERSION:
+        raise ValueError('Unsupported plan state')
+    day_index, weeks = state.get('day_index'), state.get('weeks')
+    if not isinstance(day_index, int) or not isinstance(weeks, int) or day_index < 0 or day_index % len(DAYS):
+        raise ValueError('Invalid plan state')
+    if not isinstance(state.get('selected_foods'), dict) or not isinstance(state.get('used_foods'), dict):
+        raise ValueError('Invalid plan state')
+    return {
+        'version': STATE_VERSION,
+        'day_index': day_index,
+        'weeks': max(1, min(weeks, MAX_WEEKS)),
+        'selected_foods': state['selected_foods'],
+        'used_foods': {meal_type: dict(state['used_foods'].get(meal_type) or {}) for meal_type in MEAL_TYPES}
+    }
+
+
+def plan_candidates(dataset, state, health_condition, diet_preference):
+    """Allowed recommendations per meal type, excluding the user's own selections"""
+    return {
+        meal_type: meal_candidates(dataset, meal_type, health_condition, diet_preference,
+                                   [f['food'] for f in state['selected_foods'].get(meal_type, [])])
+        for meal_type in MEAL_TYPES
+    }
+
+
+def iter_plan_days(candidates, state):
+    """Yield (day name, {meal_type: foods}) one day at a time, advancing state in place"""
+    usage = {meal_type: Counter(state['used_foods'].get(meal_type, {})) for meal_type in MEAL_TYPES}
+    state['used_foods'] = usage
+    while True:
+        day_index = state['day_index']
+        daily_plan = {
+            meal_type: build_meal(candidates[meal_type], day_index,
+                                  state['selected_foods'].get(meal_type, []), usage[meal_type])
+            for meal_type in MEAL_TYPES
+        }
+        state['day_index'] = day_index + 1
+        yield DAYS[day_index % len(DAYS)], daily_plan
+
+
+def generate_week(candidates, state):
+    """The next seven days as {day name: {meal_type: foods}}"""
+    return dict(islice(iter_plan_days(candidates, state), len(DAYS)))
+
+
+def week_number(state):
+    """1-based number of the last week generated from state"""
+    return state['day_index'] // len(DAYS)
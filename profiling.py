@@ -0,0 +1,272 @@
+"""
+On-demand CPU profiling of live requests and tracemalloc memory snapshots.
+
+An admin request (see admin.py) carrying X-Profile: cprofile or X-Profile: sample
+(or ?_profile=cprofile|sample) runs under cProfile or a stack sampler; anyone
+else's flag is ignored. Results are kept in a ring buffer of PROFILE_LOG_SIZE
+entries and the id is returned in an X-Profile-Id header; with X-Profile-Return: 1
+(or ?_profile_return=1) the response body is the profile itself. cProfile gives
+the pstats listing by cumulative time, and the raw stats for snakeviz or pstats;
+the sampler gives collapsed stacks, one "frame;frame;frame count" line per
+distinct stack, for flamegraph.pl or speedscope.
+
+Memory: take_snapshot() starts tracemalloc when needed and keeps the last
+MEMORY_SNAPSHOT_LIMIT snapshots, and diff() shows the growth between two of
+them. Allocations made before tracing started are not seen, so start the server
+with PYTHONTRACEMALLOC=<frames> to attribute the dataset, model and caches
+loaded at import.
+"""
+
+import cProfile
+import io
+import itertools
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from datetime import datetime
+
+from flask import Response, g, request
+
+from admin import ADMIN_TOKEN, is_admin
+
+LOG_SIZE = int(os.environ.get('PROFILE_LOG_SIZE', '50'))
+SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL_MS', '1')) / 1000.0
+MEMORY_SNAPSHOT_LIMIT = int(os.environ.get('MEMORY_SNAPSHOT_LIMIT', '8'))
+TRACEMALLOC_FRAMES = int(os.environ.get('TRACEMALLOC_FRAMES', '10'))
+MODES = ('cprofile', 'sample')
+PSTATS_LINES = 60
+GROUPS = ('lineno', 'filename', 'traceback')
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+_SITE_PACKAGES = 'site-packages' + os.sep
+
+_lock = threading.Lock()
+_profiles = OrderedDict()   # id -> (entry, output text, raw pstats bytes or None)
+_profile_ids = itertools.count(1)
+_snapshots = OrderedDict()  # id -> (taken at, tracemalloc.Snapshot)
+_snapshot_ids = itertools.count(1)
+
+
+def short_path(path):
+    """Path relative to the app directory or site-packages"""
+    if path.startswith(_ROOT + os.sep):
+        return path[len(_ROOT) + 1:]
+    if _SITE_PACKAGES in path:
+        return path.split(_SITE_PACKAGES, 1)[1]
+    return path
+
+
+# ---------------- CPU ----------------
+class StackSampler:
+    """Samples one thread's Python stack every interval into collapsed-stack counts"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({short_path(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def requested_mode():
+    mode = request.headers.get('X-Profile') or request.args.get('_profile')
+    return mode if mode in MODES else None
+
+
+def _before_request():
+    mode = requested_mode()
+    if mode is None or not is_admin():
+        return
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        profiler = StackSampler(threading.get_ident())
+        profiler.start()
+    g.profile = (mode, profiler, time.perf_counter())
+
+
+def _finish(state, status):
+    mode, profiler, start = state
+    duration = time.perf_counter() - start
+    if mode == 'cprofile':
+        profiler.disable()
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(PSTATS_LINES)
+        output, raw, size = stream.getvalue(), marshal.dumps(stats.stats), stats.total_calls
+    else:
+        profiler.stop()
+        output, raw, size = profiler.collapsed(), None, profiler.samples
+    entry = {
+        'id': next(_profile_ids),
+        'time': datetime.now().isoformat(timespec='milliseconds'),
+        'method': request.method,
+        'path': request.path,
+        'route': request.url_rule.rule if request.url_rule else None,
+        'mode': mode,
+        'status': status,
+        'duration_ms': round(duration * 1000, 3),
+        'calls' if mode == 'cprofile' else 'samples': size,
+    }
+    with _lock:
+        _profiles[entry['id']] = (entry, output, raw)
+        while len(_profiles) > LOG_SIZE:
+            _profiles.popitem(last=False)
+    return entry, output
+
+
+def _after_request(response):
+    state = g.pop('profile', None)
+    if state is None:
+        return response
+    entry, output = _finish(state, response.status_code)
+    if (request.headers.get('X-Profile-Return') or request.args.get('_profile_return')) == '1':
+        response = Response(output, mimetype='text/plain')
+    response.headers['X-Profile-Id'] = str(entry['id'])
+    return response
+
+
+def _teardown_request(exc):
+    # The handler raised past after_request; still stop the profiler
+    state = g.pop('profile', None)
+    if state is not None:
+        _finish(state, 500)
+
+
+def init_app(app):
+    """Install the profiling hooks (nothing when no ADMIN_TOKEN is configured)"""
+    if ADMIN_TOKEN:
+        app.before_request(_before_request)
+        app.after_request(_after_request)
+        app.teardown_request(_teardown_request)
+
+
+def profiles():
+    """Stored profiles without their output, newest first"""
+    with _lock:
+        return [entry for entry, _, _ in reversed(_profiles.values())]
+
+
+def get_profile(profile_id):
+    """(entry, output text, raw pstats bytes or None), or None when evicted"""
+    with _lock:
+        return _profiles.get(profile_id)
+
+
+def clear_profiles():
+    with _lock:
+        _profiles.clear()
+
+
+# ---------------- Memory ----------------
+def _filtered(snapshot):
+    return snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    ))
+
+
+def _location(traceback, group):
+    if group == 'traceback':
+        return [f'{short_path(frame.filename)}:{frame.lineno}' for frame in traceback]
+    frame = traceback[0]
+    return short_path(frame.filename) if group == 'filename' else f'{short_path(frame.filename)}:{frame.lineno}'
+
+
+def _check_group(group):
+    if group not in GROUPS:
+        raise ValueError(f"group must be one of {', '.join(GROUPS)}")
+
+
+def memory_status():
+    tracing = tracemalloc.is_tracing()
+    current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+    with _lock:
+        snapshots = [{'id': snapshot_id, 'time': taken} for snapshot_id, (taken, _) in _snapshots.items()]
+    return {
+        'tracing': tracing,
+        'frames': tracemalloc.get_traceback_limit() if tracing else None,
+        'traced_bytes': current,
+        'peak_bytes': peak,
+        'overhead_bytes': tracemalloc.get_tracemalloc_memory(),
+        'snapshots': snapshots,
+    }
+
+
+def take_snapshot():
+    """Snapshot traced allocations (starting tracemalloc if needed); returns its id"""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    snapshot = _filtered(tracemalloc.take_snapshot())
+    with _lock:
+        snapshot_id = next(_snapshot_ids)
+        _snapshots[snapshot_id] = (datetime.now().isoformat(timespec='seconds'), snapshot)
+        while len(_snapshots) > MEMORY_SNAPSHOT_LIMIT:
+            _snapshots.popitem(last=False)
+    return snapshot_id
+
+
+def _snapshot(snapshot_id):
+    with _lock:
+        if snapshot_id not in _snapshots:
+            raise KeyError(f"No memory snapshot {snapshot_id}")
+        return _snapshots[snapshot_id][1]
+
+
+def top(snapshot_id, group='lineno', limit=25):
+    """Largest allocation sites of a snapshot"""
+    _check_group(group)
+    return [{'location': _location(stat.traceback, group), 'size_bytes': stat.size, 'count': stat.count}
+            for stat in _snapshot(snapshot_id).statistics(group)[:limit]]
+
+
+def diff(base_id, target_id=None, group='lineno', limit=25):
+    """Allocation sites that changed most from base to target (default: now)"""
+    _check_group(group)
+    base = _snapshot(base_id)
+    if target_id is None:
+        if not tracemalloc.is_tracing():
+            raise KeyError("tracemalloc is not tracing")
+        target = _filtered(tracemalloc.take_snapshot())
+    else:
+        target = _snapshot(target_id)
+    return [{'location': _location(stat.traceback, group), 'size_bytes': stat.size,
+             'size_diff_bytes': stat.size_diff, 'count': stat.count, 'count_diff': stat.count_diff}
+            for stat in target.compare_to(base, group)[:limit]]
+
+
+def stop_tracing():
+    """Stop tracemalloc and drop the stored snapshots"""
+    tracemalloc.stop()
+    with _lock:
+        _snapshots.clear()
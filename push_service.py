@@ -0,0 +1,122 @@
+"""
+Web Push delivery for reminder notifications.
+
+Delivery mode is picked with the PUSH_DELIVERY environment variable:
+- simulate: log the notification and report success (default, no network)
+- http: POST the JSON payload to the subscription endpoint
+- webpush: encrypted Web Push via pywebpush, signed with VAPID_PRIVATE_KEY
+
+webpush without pywebpush or VAPID_PRIVATE_KEY reports an error at import and
+every delivery fails; it never falls back to unencrypted POSTs.
+"""
+
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from pywebpush import webpush, WebPushException
+except ImportError:
+    webpush = None
+    WebPushException = Exception
+
+DELIVERY_MODE = os.environ.get('PUSH_DELIVERY', 'simulate')
+PUSH_TIMEOUT = float(os.environ.get('PUSH_TIMEOUT', '5'))
+PUSH_TTL = int(os.environ.get('PUSH_TTL', '3600'))
+PUSH_MAX_RETRIES = int(os.environ.get('PUSH_MAX_RETRIES', '2'))
+PUSH_RETRY_BACKOFF = float(os.environ.get('PUSH_RETRY_BACKOFF', '0.05'))
+PUSH_WORKERS = int(os.environ.get('PUSH_WORKERS', '16'))
+VAPID_PRIVATE_KEY = os.environ.get('VAPID_PRIVATE_KEY')
+VAPID_SUBJECT = os.environ.get('VAPID_SUBJECT', 'mailto:admin@dietplanner.local')
+
+WEBPUSH_MISCONFIGURED = DELIVERY_MODE == 'webpush' and (webpush is None or not VAPID_PRIVATE_KEY)
+if WEBPUSH_MISCONFIGURED:
+    print("Error: PUSH_DELIVERY=webpush needs the pywebpush package and VAPID_PRIVATE_KEY; "
+          "push notifications will not be delivered")
+
+# Push services answer these when they want the sender to back off and retry
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+_executor = None
+
+
+def _post_json(endpoint, payload):
+    """POST a notification payload and return the HTTP status code"""
+    body = json.dumps(payload).encode('utf-8')
+    req = urllib.request.Request(endpoint, data=body, method='POST', headers={
+        'Content-Type': 'application/json',
+        'TTL': str(PUSH_TTL),
+        'Urgency': 'normal'
+    })
+    try:
+        with urllib.request.urlopen(req, timeout=PUSH_TIMEOUT) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def _post_webpush(subscription, payload):
+    """Send an encrypted Web Push message and return the HTTP status code"""
+    try:
+        resp = webpush(
+            subscription_info={
+                'endpoint': subscription['endpoint'],
+                'keys': {'p256dh': subscription['p256dh'], 'auth': subscription['auth']}
+            },
+            data=json.dumps(payload),
+            vapid_private_key=VAPID_PRIVATE_KEY,
+            vapid_claims={'sub': VAPID_SUBJECT},
+            ttl=PUSH_TTL,
+            timeout=PUSH_TIMEOUT
+        )
+        return resp.status_code
+    except WebPushException as e:
+        response = getattr(e, 'response', None)
+        if response is not None:
+            return response.status_code
+        raise
+
+
+def deliver(subscription, payload):
+    """Deliver one notification, retrying transient failures with exponential backoff.
+
+    Returns a dict with 'ok', 'status' and 'attempts'.
+    """
+    if DELIVERY_MODE == 'simulate':
+        return {'ok': True, 'status': None, 'attempts': 1}
+    if WEBPUSH_MISCONFIGURED:
+        return {'ok': False, 'status': None, 'attempts': 0}
+
+    attempts = 0
+    status = None
+    while True:
+        attempts += 1
+        try:
+            if DELIVERY_MODE == 'webpush':
+                status = _post_webpush(subscription, payload)
+            else:
+                status = _post_json(subscription['endpoint'], payload)
+            retryable = status in RETRYABLE_STATUS
+        except OSError:
+            # Connection refused, reset or timed out
+            status = None
+            retryable = True
+
+        if status is not None and 200 <= status < 300:
+            return {'ok': True, 'status': status, 'attempts': attempts}
+        if not retryable or attempts > PUSH_MAX_RETRIES:
+            return {'ok': False, 'status': status, 'attempts': attempts}
+        time.sleep(PUSH_RETRY_BACKOFF * (2 ** (attempts - 1)))
+
+
+def fan_out(jobs):
+    """Deliver many (subscription, payload) pairs concurrently, preserving order of results"""
+    global _executor
+    if not jobs:
+        return []
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PUSH_WORKERS, thread_name_prefix='push')
+    return list(_executor.map(lambda job: deliver(*job), jobs))
@@ -0,0 +1,200 @@
+"""
+Admission control and per-user rate limiting.
+
+Every request to a limited route class takes a token from its user's bucket
+for that class. Users are identified by the user_id in the URL, JSON body or
+query string; requests that name none (/login, /register) are not bucketed,
+since behind a reverse proxy they would all share the proxy's address.
+Buckets refill continuously at the class's rate up to its burst size; an
+empty bucket gets 429 with Retry-After. Heavy routes (plan generation,
+/trigger_all_reminders, /chat) also need one of HEAVY_CONCURRENCY slots in
+the process. When all slots stay busy for HEAVY_WAIT_MS the request gets 503
+with Retry-After rather than queueing longer, so threads stay free for cheap
+routes. A streamed response, such as the chat's
+server-sent events, holds its slot until the server closes the stream.
+
+RATE_LIMITS sets each class as class=rate:burst in requests per second, e.g.
+"heavy=0.5:10,poll=1:20,write=5:50"; classes left out are not limited and
+plain reads never are. Limits and slots are per process, so with several
+serve.py workers a user's effective rate is up to workers x rate.
+RATE_LIMIT=0 turns the limiter off. Decisions are exported on /metrics.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, jsonify, request
+
+import metrics
+
+ENABLED = os.environ.get('RATE_LIMIT', '1') == '1'
+DEFAULT_LIMITS = 'heavy=0.5:10,poll=1:20,write=5:50'
+HEAVY_CONCURRENCY = int(os.environ.get('HEAVY_CONCURRENCY', '2'))
+HEAVY_WAIT = float(os.environ.get('HEAVY_WAIT_MS', '250')) / 1000.0
+BUSY_RETRY_AFTER = 1
+MAX_BUCKETS = int(os.environ.get('RATE_LIMIT_MAX_BUCKETS', '100000'))
+
+HEAVY_ROUTES = {'/generate_weekly_meal_plan', '/generate_plan_week', '/trigger_all_reminders/<int:user_id>', '/chat'}
+POLL_ROUTES = {'/check_reminders/<int:user_id>'}
+EXEMPT_PREFIXES = ('/admin/',)
+
+
+def parse_limits(spec):
+    """{class: (tokens per second, burst)} from "class=rate:burst,..." """
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, values = item.partition('=')
+        rate, _, burst = values.partition(':')
+        limits[name.strip()] = (float(rate), float(burst or rate))
+    return limits
+
+
+LIMITS = parse_limits(os.environ.get('RATE_LIMITS', DEFAULT_LIMITS))
+
+
+def route_class(rule, method):
+    """'heavy', 'poll', 'write' or 'read' for a URL rule"""
+    if rule in HEAVY_ROUTES:
+        return 'heavy'
+    if rule in POLL_ROUTES:
+        return 'poll'
+    return 'write' if method not in ('GET', 'HEAD', 'OPTIONS') else 'read'
+
+
+class TokenBuckets:
+    """Token buckets keyed by (class, client), least recently used dropped beyond max_buckets"""
+
+    def __init__(self, limits, max_buckets=MAX_BUCKETS):
+        self.limits = limits
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()  # key -> [tokens, last refill]
+        self._lock = threading.Lock()
+
+    def take(self, route_class, client, now=None):
+        """0 when a token was taken, else seconds until one is available"""
+        rate, burst = self.limits[route_class]
+        now = time.monotonic() if now is None else now
+        key = (route_class, client)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [burst, now]
+                # A dropped bucket comes back full, which only errs on the lenient side
+                while len(self._buckets) > self.max_buckets:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0
+            return (1 - bucket[0]) / rate if rate > 0 else float('inf')
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+buckets = TokenBuckets(LIMITS)
+_heavy_slots = threading.BoundedSemaphore(max(1, HEAVY_CONCURRENCY))
+_lock = threading.Lock()
+_decisions = {}  # (class, outcome) -> count
+_in_flight = 0
+
+
+def _count(route_class, outcome):
+    with _lock:
+        _decisions[(route_class, outcome)] = _decisions.get((route_class, outcome), 0) + 1
+
+
+def client_key():
+    """The request's user_id when it names one, else None"""
+    user_id = (request.view_args or {}).get('user_id')
+    if user_id is None and request.is_json:
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            user_id = body.get('user_id')
+    if user_id is None:
+        user_id = request.args.get('user_id')
+    return f'user:{user_id}' if user_id is not None else None
+
+
+def _reject(status, error, retry_after):
+    response = jsonify({'error': error, 'retry_after': retry_after})
+    response.status_code = status
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def _before_request():
+    global _in_flight
+    rule = request.url_rule
+    if rule is None or request.method == 'OPTIONS' or request.path.startswith(EXEMPT_PREFIXES):
+        return None
+    cls = route_class(rule.rule, request.method)
+    client = client_key() if cls in LIMITS else None
+    if client is not None:
+        wait = buckets.take(cls, client)
+        if wait:
+            _count(cls, 'limited')
+            return _reject(429, 'Too many requests', max(1, math.ceil(wait)))
+    if cls == 'heavy':
+        acquired = _heavy_slots.acquire(timeout=HEAVY_WAIT) if HEAVY_WAIT > 0 else _heavy_slots.acquire(False)
+        if not acquired:
+            _count(cls, 'busy')
+            return _reject(503, 'Server busy, try again shortly', BUSY_RETRY_AFTER)
+        g.heavy_slot = True
+        with _lock:
+            _in_flight += 1
+    _count(cls, 'allowed')
+    return None
+
+
+def _release_slot():
+    global _in_flight
+    with _lock:
+        _in_flight -= 1
+    _heavy_slots.release()
+
+
+def _after_request(response):
+    # Teardown runs before a streamed body is generated, so keep the slot until it closes
+    if response.is_streamed and g.pop('heavy_slot', False):
+        response.call_on_close(_release_slot)
+    return response
+
+
+def _teardown_request(exc):
+    if g.pop('heavy_slot', False):
+        _release_slot()
+
+
+def _collect():
+    with _lock:
+        decisions = sorted(_decisions.items())
+        in_flight = _in_flight
+    return (metrics.metric('diet_rate_limit_requests_total', 'counter',
+                           'Limiter decisions by route class: allowed, limited (429) or busy (503).',
+                           [({'class': cls, 'outcome': outcome}, count) for (cls, outcome), count in decisions])
+            + metrics.metric('diet_heavy_requests_in_flight', 'gauge', 'Heavy requests holding a slot.',
+                             [({}, in_flight)])
+            + metrics.metric('diet_heavy_concurrency_limit', 'gauge', 'Heavy request slots per process.',
+                             [({}, HEAVY_CONCURRENCY)])
+            + metrics.metric('diet_rate_limit_tokens_per_second', 'gauge', 'Bucket refill rate by route class.',
+                             [({'class': cls}, rate) for cls, (rate, _) in sorted(LIMITS.items())])
+            + metrics.metric('diet_rate_limit_burst', 'gauge', 'Bucket size by route class.',
+                             [({'class': cls}, burst) for cls, (_, burst) in sorted(LIMITS.items())])
+            + metrics.metric('diet_rate_limit_buckets', 'gauge', 'Token buckets held in memory.',
+                             [({}, len(buckets))]))
+
+
+def init_app(app):
+    """Install the limiter (nothing with RATE_LIMIT=0)"""
+    if ENABLED:
+        app.before_request(_before_request)
+        app.after_request(_after_request)
+        app.teardown_request(_teardown_request)
+        metrics.register(_collect)
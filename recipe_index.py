@@ -0,0 +1,223 @@
+"""
+BM25 retrieval over food_recipes.json for free-text cooking questions.
+
+Each food is indexed as a 'text' field (name, benefits and recipe) plus one
+field per health-condition note (bp_note, diabetes_note, ...). A query is
+scored against the text field and, when the user has a condition, against that
+condition's note only. Postings are stored per field in CSR form as NumPy
+arrays (term offsets, doc ids, precomputed BM25 weights), written to
+RECIPE_INDEX_DIR and loaded with mmap, so a query is a few slice additions.
+
+The index is rebuilt when food_recipes.json changes, in a private temporary
+directory that is swapped in under a file lock, so forked workers rebuilding at
+the same time do not trip over each other. It can also be built offline with:
+
+    python recipe_index.py
+"""
+
+import json
+import math
+import os
+import shutil
+import tempfile
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no forked workers to coordinate with
+    fcntl = None
+
+from recipe_store import CONDITION_NOTES, food_key, normalize_name, singular
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RECIPES_PATH = os.path.join(BASE_DIR, 'food_recipes.json')
+INDEX_DIR = os.environ.get('RECIPE_INDEX_DIR', os.path.join(BASE_DIR, 'recipe_index'))
+
+# Bump when the tokenizer or file layout changes so old indexes are rebuilt
+FORMAT_VERSION = 1
+K1 = 1.2
+B = 0.75
+
+STOPWORDS = frozenset('''
+    a about an and any are as at be best can cook cooking do does eat food for from give good great
+    have hello hi how i idea in is it its make me my need of on or please recipe should some
+    suggest tell than thank thanks that the there this to want what when which with you your
+'''.split())
+
+# Applied to documents and queries alike so different spellings share a term
+PHRASES = [
+    ('blood pressure', 'bp'),
+    ('hypertension', 'bp'),
+    ('blood sugar', 'diabetes'),
+    ('diabetic', 'diabetes'),
+    ('weight loss', 'weight'),
+    ('lose weight', 'weight'),
+]
+
+
+def tokenize(text):
+    """Normalized, singularized terms without stopwords"""
+    text = ' ' + normalize_name(text) + ' '
+    for phrase, term in PHRASES:
+        if phrase in text:
+            text = text.replace(' ' + phrase + ' ', ' ' + term + ' ')
+    return [singular(word) for word in text.split() if word not in STOPWORDS]
+
+
+def _field_texts(name, info):
+    fields = {'text': ' '.join([name, str(info.get('benefits') or ''), str(info.get('recipe') or '')])}
+    for field, value in info.items():
+        if field.endswith('_note') and value:
+            fields[field] = str(value)
+    return fields
+
+
+def build_index(recipes, index_dir=INDEX_DIR, source_mtime=None):
+    """Write the index for a {name: info} recipe dict to index_dir"""
+    names = [name for name, info in recipes.items() if isinstance(info, dict)]
+    docs = [_field_texts(name, recipes[name]) for name in names]
+    fields = ['text'] + sorted({field for doc in docs for field in doc if field != 'text'})
+
+    vocab = {}
+    counts = {field: [] for field in fields}
+    for doc in docs:
+        for field in fields:
+            tf = Counter(tokenize(doc.get(field, '')))
+            for term in tf:
+                vocab.setdefault(term, len(vocab))
+            counts[field].append(tf)
+
+    parent, base = os.path.split(os.path.abspath(index_dir))
+    tmp_dir = tempfile.mkdtemp(prefix=f'{base}.tmp-', dir=parent)
+
+    for field in fields:
+        lengths = [sum(tf.values()) for tf in counts[field]]
+        avgdl = (sum(lengths) / len(lengths)) if lengths and sum(lengths) else 1.0
+        postings = [[] for _ in vocab]
+        for doc_id, tf in enumerate(counts[field]):
+            norm = K1 * (1 - B + B * lengths[doc_id] / avgdl)
+            for term, freq in tf.items():
+                postings[vocab[term]].append((doc_id, freq * (K1 + 1) / (freq + norm)))
+
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int32)
+        doc_ids, weights = [], []
+        for term_id, plist in enumerate(postings):
+            idf = math.log(1 + (len(names) - len(plist) + 0.5) / (len(plist) + 0.5))
+            doc_ids.extend(doc_id for doc_id, _ in plist)
+            weights.extend(idf * weight for _, weight in plist)
+            offsets[term_id + 1] = len(doc_ids)
+
+        np.save(os.path.join(tmp_dir, f'{field}.offsets.npy'), offsets)
+        np.save(os.path.join(tmp_dir, f'{field}.docs.npy'), np.array(doc_ids, dtype=np.int32))
+        np.save(os.path.join(tmp_dir, f'{field}.weights.npy'), np.array(weights, dtype=np.float32))
+
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'format': FORMAT_VERSION,
+            'source_mtime': source_mtime,
+            'names': names,
+            'fields': fields,
+            'vocab': sorted(vocab, key=vocab.get)
+        }, f)
+
+    # Swap the finished index in; readers holding the old mmaps keep working
+    with _publish_lock(index_dir):
+        old_dir = None
+        if os.path.exists(index_dir):
+            old_dir = tempfile.mkdtemp(prefix=f'{base}.old-', dir=parent)
+            os.replace(index_dir, os.path.join(old_dir, 'index'))
+        os.replace(tmp_dir, index_dir)
+    if old_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+@contextmanager
+def _publish_lock(index_dir):
+    """Exclusive lock on <index_dir>.lock across processes (a no-op without fcntl)"""
+    if fcntl is None:
+        yield
+        return
+    with open(f'{os.path.abspath(index_dir)}.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class RecipeIndex:
+    """Memory-mapped BM25 index; search() returns [(food name, score)] best first"""
+
+    def __init__(self, index_dir=INDEX_DIR):
+        with open(os.path.join(index_dir, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported recipe index format in {index_dir}")
+        self.source_mtime = meta['source_mtime']
+        self.names = meta['names']
+        self.vocab = {term: term_id for term_id, term in enumerate(meta['vocab'])}
+        self.doc_by_key = {food_key(name): doc_id for doc_id, name in enumerate(self.names)}
+        self.fields = {
+            field: tuple(np.load(os.path.join(index_dir, f'{field}.{part}.npy'), mmap_mode='r')
+                         for part in ('offsets', 'docs', 'weights'))
+            for field in meta['fields']
+        }
+
+    def search(self, query, k=5, condition=None, food_keys=None, exclude_keys=None):
+        """Top-k foods for a query, optionally scored on a condition's note, limited to
+        food_keys and without exclude_keys"""
+        term_ids = [self.vocab[term] for term in set(tokenize(query)) if term in self.vocab]
+        if not term_ids:
+            return []
+
+        fields = [self.fields['text']]
+        note_field = CONDITION_NOTES.get(condition)
+        if note_field in self.fields:
+            fields.append(self.fields[note_field])
+
+        scores = np.zeros(len(self.names), dtype=np.float32)
+        for offsets, docs, weights in fields:
+            for term_id in term_ids:
+                start, end = offsets[term_id], offsets[term_id + 1]
+                if end > start:
+                    # Doc ids are unique within one posting list, so fancy += is safe
+                    scores[docs[start:end]] += weights[start:end]
+
+        if food_keys is not None:
+            allowed = np.zeros(len(self.names), dtype=bool)
+            allowed[[self.doc_by_key[key] for key in food_keys if key in self.doc_by_key]] = True
+            scores[~allowed] = 0
+        if exclude_keys:
+            scores[[self.doc_by_key[key] for key in exclude_keys if key in self.doc_by_key]] = 0
+
+        top = np.argsort(-scores, kind='stable')[:k]
+        return [(self.names[doc_id], float(scores[doc_id])) for doc_id in top if scores[doc_id] > 0]
+
+
+def load_or_build(recipes_path=RECIPES_PATH, index_dir=INDEX_DIR):
+    """Open the on-disk index, rebuilding it first if food_recipes.json is newer"""
+    try:
+        mtime = os.path.getmtime(recipes_path)
+    except OSError:
+        mtime = None
+    try:
+        index = RecipeIndex(index_dir)
+        if index.source_mtime == mtime:
+            return index
+    except (OSError, ValueError, KeyError):
+        pass
+
+    recipes = {}
+    if mtime is not None:
+        with open(recipes_path, encoding='utf-8') as f:
+            recipes = json.load(f)
+    build_index(recipes, index_dir, mtime)
+    return RecipeIndex(index_dir)
+
+
+if __name__ == '__main__':
+    index = load_or_build()
+    print(f"Recipe index: {len(index.names)} foods, {len(index.vocab)} terms in {INDEX_DIR}")
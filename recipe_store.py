@@ -0,0 +1,183 @@
+"""
+Recipe store for the chatbot.
+
+Merges the built-in cooking instructions with food_recipes.json (recipes,
+benefits and per-condition notes) into one index keyed by normalized,
+singularized food names. Lookups resolve plurals ("Boiled Eggs") and dish names
+that contain a known food ("Brown Rice Bowl") and are memoized, so each food
+costs one dict lookup after the first time it is seen. The JSON file is
+reloaded when its modification time changes.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+
+RELOAD_CHECK_SECONDS = 2.0
+MEMO_LIMIT = 4096
+
+# health_conditions value -> food_recipes.json note field
+CONDITION_NOTES = {
+    'bp': 'bp_note',
+    'hypertension': 'bp_note',
+    'diabetes': 'diabetes_note',
+    'heart': 'heart_note',
+    'obesity': 'obesity_note'
+}
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_name(name):
+    """Lowercase, strip accents and punctuation: 'Sautéed Spinach!' -> 'sauteed spinach'"""
+    text = str(name).lower()
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD.sub(' ', text).strip()
+
+
+def singular(word):
+    """Cheap English singularization, good enough for food names"""
+    if len(word) <= 3 or word.endswith('ss'):
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith(('oes', 'ches', 'shes', 'xes', 'sses')):
+        return word[:-2]
+    if word.endswith('s'):
+        return word[:-1]
+    return word
+
+
+def plurals(word):
+    """Likely plural spellings of a singular word"""
+    if word.endswith('y') and len(word) > 1 and word[-2] not in 'aeiou':
+        return [word[:-1] + 'ies']
+    if word.endswith(('o', 'ch', 'sh', 'x', 's')):
+        return [word + 'es', word + 's']
+    return [word + 's']
+
+
+def food_key(name):
+    """Index key for a food name: normalized and singularized word by word"""
+    return ' '.join(singular(word) for word in normalize_name(name).split())
+
+
+def _empty_entry(name):
+    return {
+        'name': name,
+        'emoji': '🔸',
+        'instruction': None,
+        'recipe': None,
+        'benefits': None,
+        'notes': {}
+    }
+
+
+class RecipeStore:
+    """Food name -> recipe entry index with alias matching and hot reload"""
+
+    def __init__(self, builtin_instructions, recipes_path=None):
+        self.builtin_instructions = builtin_instructions
+        self.recipes_path = recipes_path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._next_check = 0.0
+        self._index = {}
+        self._max_words = 1
+        self._memo = {}
+        self.version = 0
+        self.signature = ''
+        self.reload()
+
+    # ---------------- Building ----------------
+    def _load_json(self):
+        if not self.recipes_path:
+            return {}, None
+        try:
+            mtime = os.path.getmtime(self.recipes_path)
+            with open(self.recipes_path, encoding='utf-8') as f:
+                return json.load(f), mtime
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not load recipes from {self.recipes_path}: {e}")
+            return {}, None
+
+    def reload(self):
+        """Rebuild the index from the built-in instructions and the JSON file"""
+        recipes, mtime = self._load_json()
+        index = {}
+
+        for name, instruction in self.builtin_instructions.items():
+            entry = index.setdefault(food_key(name), _empty_entry(name))
+            entry['emoji'] = instruction.get('emoji', entry['emoji'])
+            entry['instruction'] = instruction.get('instruction')
+
+        for name, info in recipes.items():
+            if not isinstance(info, dict):
+                continue
+            entry = index.setdefault(food_key(name), _empty_entry(name))
+            entry['recipe'] = info.get('recipe')
+            entry['benefits'] = info.get('benefits')
+            entry['notes'] = {field: value for field, value in info.items() if field.endswith('_note')}
+
+        index.pop('', None)
+        with self._lock:
+            self._index = index
+            self._max_words = max((len(key.split()) for key in index), default=1)
+            self._memo = {}
+            self._mtime = mtime
+            self.signature = str(mtime)
+            self._next_check = time.monotonic() + RELOAD_CHECK_SECONDS
+            self.version += 1
+
+    def check_reload(self):
+        """Reload the JSON if it changed on disk (checked at most every RELOAD_CHECK_SECONDS)"""
+        now = time.monotonic()
+        if not self.recipes_path or now < self._next_check:
+            return
+        self._next_check = now + RELOAD_CHECK_SECONDS
+        try:
+            mtime = os.path.getmtime(self.recipes_path)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self.reload()
+
+    # ---------------- Lookups ----------------
+    def _resolve(self, key):
+        entry = self._index.get(key)
+        if entry is not None:
+            return entry
+        # Longest run of words that names a known food: "brown rice bowl" -> "brown rice"
+        words = key.split()
+        for size in range(min(len(words), self._max_words), 0, -1):
+            for start in range(len(words) - size + 1):
+                entry = self._index.get(' '.join(words[start:start + size]))
+                if entry is not None:
+                    return entry
+        return None
+
+    def lookup(self, food):
+        """Recipe entry for a food name, or None when nothing matches"""
+        self.check_reload()
+        memo = self._memo
+        if food in memo:
+            return memo[food]
+        entry = self._resolve(food_key(food))
+        if len(memo) >= MEMO_LIMIT:
+            memo.clear()
+        memo[food] = entry
+        return entry
+
+    def condition_note(self, entry, condition):
+        """The entry's note for a health condition, if the JSON has one"""
+        field = CONDITION_NOTES.get(condition)
+        return entry['notes'].get(field) if field else None
+
+    def names(self):
+        """Display names of every indexed food"""
+        return [entry['name'] for entry in self._index.values()]
@@ -0,0 +1,201 @@
+"""
+Production server for the diet planner.
+
+    python serve.py --port 8000 --workers 4 --threads 8
+
+The parent process creates the database, loads the trained model, the training
+dataset, the substitute trees and the recipe search index once, then forks the
+workers. Workers inherit those objects and share their memory pages
+copy-on-write (gc.freeze() keeps the garbage collector from touching, and so
+copying, them). Each worker serves requests from a thread pool on the shared
+listening socket.
+
+SIGTERM or SIGINT stops the workers gracefully: they stop accepting, finish
+in-flight requests and run their exit handlers. Workers that exit unexpectedly
+are replaced. With --workers 1 (or where fork is unavailable) the server runs in
+a single process.
+
+In-memory water counters are not shared between workers, so with more than one
+worker WATER_FLUSH_INTERVAL defaults to 0 (write-through). gunicorn.conf.py runs
+the same setup under gunicorn.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer
+
+HOST = os.environ.get('HOST', '127.0.0.1')
+PORT = int(os.environ.get('PORT', '8000'))
+THREADS = int(os.environ.get('SERVE_THREADS', '4'))
+GRACEFUL_TIMEOUT = float(os.environ.get('SERVE_GRACEFUL_TIMEOUT', '30'))
+# Workers that die this soon after starting are respawned after a pause
+RESPAWN_DELAY = 1.0
+
+
+def default_workers():
+    """2 x CPUs + 1, the usual rule for workers that also wait on I/O"""
+    return int(os.environ.get('SERVE_WORKERS', (os.cpu_count() or 1) * 2 + 1))
+
+
+def configure_environment(workers):
+    """Settings that must be in place before app is imported"""
+    if workers > 1:
+        os.environ.setdefault('WATER_FLUSH_INTERVAL', '0')
+        if float(os.environ['WATER_FLUSH_INTERVAL']) > 0:
+            print("Warning: WATER_FLUSH_INTERVAL > 0 with several workers; "
+                  "water totals will differ between workers")
+
+
+def prepare():
+    """Import the app and load everything the workers share; call once before forking"""
+    import app as diet_app
+    import chatbot_new
+
+    diet_app.init_db()
+    conn = diet_app.get_db()
+    try:
+        # Lets readers in one worker run while another worker writes
+        conn.execute('PRAGMA journal_mode=WAL')
+    finally:
+        conn.close()
+    diet_app.water_store.rebuild()
+    chatbot_new.get_recipe_index()
+
+    if diet_app.model is None:
+        print("Warning: serving without a trained model")
+    gc.collect()
+    gc.freeze()
+    return diet_app.app
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug server that handles connections on a fixed pool of threads"""
+
+    multithread = True
+
+    def __init__(self, host, port, app, threads=THREADS, fd=None):
+        super().__init__(host, port, app, fd=fd)
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='http')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        # Let in-flight requests finish before the socket goes away (the
+        # base class also calls this while adopting an inherited socket)
+        pool = getattr(self, 'pool', None)
+        if pool is not None:
+            pool.shutdown(wait=True)
+        super().server_close()
+
+
+def serve(app, host, port, threads, fd=None):
+    """Run one server until SIGTERM/SIGINT, then drain it"""
+    server = PooledWSGIServer(host, port, app, threads=threads, fd=fd)
+
+    def stop(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+    return server
+
+
+def run_workers(app, host, port, workers, threads, graceful_timeout=GRACEFUL_TIMEOUT):
+    """Fork workers on one listening socket and keep them running until told to stop"""
+    # Bound here so every worker accepts on the same socket
+    listener = BaseWSGIServer(host, port, app)
+    fd = listener.socket.fileno()
+    children = {}
+    stopping = []
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            serve(app, host, port, threads, fd=fd)
+            # Normal interpreter exit runs atexit handlers (water flush, background jobs)
+            sys.exit(0)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        if not stopping:
+            stopping.append(time.monotonic())
+            for pid in children:
+                os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        spawn()
+    print(f"Serving on http://{host}:{port} with {workers} workers x {threads} threads (pid {os.getpid()})")
+
+    while children:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            if stopping and time.monotonic() - stopping[0] > graceful_timeout:
+                for child in children:
+                    os.kill(child, signal.SIGKILL)
+            time.sleep(0.2)
+            continue
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        print(f"Warning: worker {pid} exited with status {status}; starting a new one")
+        if time.monotonic() - started < RESPAWN_DELAY:
+            time.sleep(RESPAWN_DELAY)
+        spawn()
+
+    listener.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the diet planner with preloaded, forked workers")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=default_workers())
+    parser.add_argument('--threads', type=int, default=THREADS)
+    parser.add_argument('--graceful-timeout', type=float, default=GRACEFUL_TIMEOUT)
+    parser.add_argument('--access-log', action='store_true', help="log every request (slower)")
+    args = parser.parse_args(argv)
+
+    workers = max(1, args.workers)
+    if workers > 1 and not hasattr(os, 'fork'):
+        print("Warning: fork is not available; serving from a single process")
+        workers = 1
+    if not args.access_log:
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    configure_environment(workers)
+    app = prepare()
+    if workers == 1:
+        print(f"Serving on http://{args.host}:{args.port} with {args.threads} threads")
+        serve(app, args.host, args.port, args.threads)
+    else:
+        run_workers(app, args.host, args.port, workers, args.threads, args.graceful_timeout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Slow-query log for the SQLite layer.
+
+Opt-in with SLOW_QUERY_MS. Statements on instrumented connections (see
+metrics.Connection) whose execute plus fetch time exceeds the threshold are
+recorded with their normalized SQL, the shape of their parameters, the duration,
+the route that ran them and the output of EXPLAIN QUERY PLAN. Records are kept
+in a ring buffer of SLOW_QUERY_LOG_SIZE entries, shown by /admin/slow_queries
+and downloadable as NDJSON; with SLOW_QUERY_DUMP set the buffer is also
+appended to that NDJSON file at exit.
+
+Plans are cached per normalized statement, so a query that stays slow is only
+explained once.
+"""
+
+import atexit
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from flask import has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+THRESHOLD_MS = float(os.environ['SLOW_QUERY_MS']) if os.environ.get('SLOW_QUERY_MS') else None
+ENABLED = THRESHOLD_MS is not None
+THRESHOLD = THRESHOLD_MS / 1000.0 if ENABLED else None
+LOG_SIZE = int(os.environ.get('SLOW_QUERY_LOG_SIZE', '500'))
+DUMP_PATH = os.environ.get('SLOW_QUERY_DUMP')
+PLAN_CACHE_SIZE = 256
+# Only these statements can be explained; BEGIN, COMMIT, PRAGMA, DDL are not
+EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_SPACE = re.compile(r'\s+')
+
+_lock = threading.Lock()
+_records = deque(maxlen=LOG_SIZE)
+_plans = OrderedDict()  # normalized sql -> plan lines
+_recorded = 0
+
+
+def normalize_sql(sql):
+    """SQL with literals replaced by ? and whitespace collapsed"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def _type_name(value):
+    return 'null' if value is None else type(value).__name__
+
+
+def params_shape(parameters, many=False):
+    """Types of the bound parameters, never their values"""
+    if many:
+        rows = parameters if isinstance(parameters, (list, tuple)) else None
+        return {'rows': len(rows) if rows is not None else None,
+                'row': params_shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {name: _type_name(value) for name, value in parameters.items()}
+    return [_type_name(value) for value in parameters or ()]
+
+
+def explain(conn, sql, parameters):
+    """EXPLAIN QUERY PLAN lines for a statement, or None when it can't be explained"""
+    if not sql.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+    try:
+        rows = conn.cursor(sqlite3.Cursor).execute('EXPLAIN QUERY PLAN ' + sql, parameters or ()).fetchall()
+    except sqlite3.Error as e:
+        return [f'unavailable: {e}']
+    return [row[-1] for row in rows]
+
+
+def _plan_for(conn, normalized, sql, parameters):
+    with _lock:
+        if normalized in _plans:
+            _plans.move_to_end(normalized)
+            return _plans[normalized]
+    plan = explain(conn, sql, parameters)
+    with _lock:
+        _plans[normalized] = plan
+        while len(_plans) > PLAN_CACHE_SIZE:
+            _plans.popitem(last=False)
+    return plan
+
+
+def record(conn, sql, parameters, elapsed, many=False):
+    """Add a slow statement to the log and return its record"""
+    global _recorded
+    normalized = normalize_sql(sql)
+    explain_params = (parameters[0] if parameters else ()) if many else parameters
+    plan = _plan_for(conn, normalized, sql, explain_params)
+    entry = {
+        'time': datetime.now().isoformat(timespec='milliseconds'),
+        'sql': normalized,
+        'params': params_shape(parameters, many),
+        'duration_ms': round(elapsed * 1000, 3),
+        'route': request.url_rule.rule if has_request_context() and request.url_rule else None,
+        'plan': plan,
+        'full_scan': any(line.startswith('SCAN ') and ' USING ' not in line for line in plan or ())
+    }
+    with _lock:
+        _records.append(entry)
+        _recorded += 1
+    logger.warning("Slow query (%.1f ms) %s plan=%s", entry['duration_ms'], normalized, plan)
+    return entry
+
+
+def records(limit=None):
+    """Logged slow statements, newest first"""
+    with _lock:
+        items = list(_records)
+    items.reverse()
+    return items[:limit] if limit else items
+
+
+def to_ndjson(items=None):
+    """Records as newline-delimited JSON, oldest first"""
+    items = list(reversed(records())) if items is None else items
+    return ''.join(json.dumps(item, default=str) + '\n' for item in items)
+
+
+def dump(path):
+    """Append the log to an NDJSON file; returns the number of records written"""
+    items = list(reversed(records()))
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(to_ndjson(items))
+    return len(items)
+
+
+def clear():
+    with _lock:
+        _records.clear()
+        _plans.clear()
+
+
+def stats():
+    with _lock:
+        return {'enabled': ENABLED, 'threshold_ms': THRESHOLD_MS, 'size': len(_records),
+                'max_size': LOG_SIZE, 'recorded': _recorded}
+
+
+if ENABLED and DUMP_PATH:
+    atexit.register(dump, DUMP_PATH)
@@ -0,0 +1,192 @@
+"""
+Food substitution by nearest neighbours in nutrient space.
+
+Every catalog food is a point in z-score normalized (calories, protein, carbs,
+fat, price) space. When the catalog loads, one KD-tree is built per
+(condition, diet, meal) partition, matching the filters /available_foods
+applies, so a query only searches foods the user could be given for that meal.
+Constraints such as max_fat are applied to the nearest candidates; when too few
+of them pass, the partition's passing foods are scanned directly instead.
+Without scikit-learn, partitions fall back to a NumPy distance scan.
+"""
+
+import numpy as np
+
+try:
+    from sklearn.neighbors import KDTree
+except ImportError:  # scikit-learn is optional here
+    KDTree = None
+
+FEATURES = ('calories', 'protein', 'carbs', 'fat', 'price')
+DIETS = ('any', 'veg')
+LEAF_SIZE = 40
+# Neighbours fetched per requested result before falling back to a filtered scan
+FETCH_FACTOR = 4
+
+# constraint name -> (feature, True for an upper bound / False for a lower bound)
+CONSTRAINTS = {
+    'max_calories': ('calories', True),
+    'max_protein': ('protein', True),
+    'max_carbs': ('carbs', True),
+    'max_fat': ('fat', True),
+    'max_price': ('price', True),
+    'min_calories': ('calories', False),
+    'min_protein': ('protein', False),
+    'min_carbs': ('carbs', False),
+    'min_fat': ('fat', False),
+    'min_price': ('price', False),
+}
+
+
+class _Partition:
+    def __init__(self, rows, points):
+        self.rows = rows
+        self.points = points
+        self.size = len(rows)
+        self.squared_norms = (points ** 2).sum(axis=1)
+        self.tree = KDTree(points, leaf_size=LEAF_SIZE) if KDTree is not None and self.size > LEAF_SIZE else None
+
+    def query(self, point, k):
+        """Catalog rows of the k nearest foods to point, nearest first, with their distances"""
+        k = min(k, self.size)
+        if k <= 0:
+            return self.rows[:0], np.zeros(0)
+        if self.tree is not None:
+            distances, indices = self.tree.query(point.reshape(1, -1), k=k)
+            return self.rows[indices[0]], distances[0]
+        return self.scan(point, limit=k)
+
+    def scan(self, point, mask=None, limit=None):
+        """Distance scan over the partition (or the masked part of it), nearest first"""
+        # |a - b|^2 = |a|^2 - 2 a.b + |b|^2 keeps the scan to one matrix-vector product
+        squared = self.squared_norms - 2 * (self.points @ point) + point @ point
+        candidates = np.flatnonzero(mask) if mask is not None else np.arange(self.size)
+        if limit is not None and limit < len(candidates):
+            candidates = candidates[np.argpartition(squared[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(squared[candidates], kind='stable')]
+        return self.rows[candidates], np.sqrt(np.maximum(squared[candidates], 0))
+
+
+class SubstituteIndex:
+    """Nearest-neighbour substitutes for catalog foods within a (condition, diet, meal) partition"""
+
+    def __init__(self, catalog):
+        self.foods = catalog.reset_index(drop=True) if not catalog.empty else catalog
+        self.partitions = {}
+        self.by_name = {}
+        if self.foods.empty or not set(FEATURES + ('food', 'meal')) <= set(self.foods.columns):
+            return
+
+        values = self.foods[list(FEATURES)].astype(float).to_numpy()
+        std = values.std(axis=0)
+        std[std == 0] = 1.0
+        self.mean = values.mean(axis=0)
+        self.std = std
+        self.values = values
+        self.points = (values - self.mean) / std
+
+        self.names = self.foods['food'].astype(str).tolist()
+        self.meals = self.foods['meal'].astype(str).to_numpy()
+        if 'veg_type' in self.foods.columns:
+            self.veg = (self.foods['veg_type'] == 'veg').to_numpy()
+        else:
+            self.veg = np.ones(len(self.foods), dtype=bool)
+        if 'safe_for' in self.foods.columns:
+            self.safe_for = [frozenset(str(value).split(',')) for value in self.foods['safe_for'].fillna('')]
+        else:
+            self.safe_for = [frozenset()] * len(self.foods)
+
+        for row, name in enumerate(self.names):
+            self.by_name.setdefault(name.lower(), row)
+            self.by_name.setdefault((name.lower(), self.meals[row]), row)
+
+        conditions = sorted(set().union(*self.safe_for) - {''})
+        self.condition_bit = {condition: 1 << bit for bit, condition in enumerate(conditions)}
+        self.condition_bits = np.array([sum(self.condition_bit[c] for c in safe if c) for safe in self.safe_for],
+                                       dtype=np.int64)
+        for meal in sorted(set(self.meals)):
+            in_meal = self.meals == meal
+            for diet in DIETS:
+                in_diet = in_meal & self.veg if diet == 'veg' else in_meal
+                for condition in [None] + conditions:
+                    mask = in_diet
+                    if condition is not None:
+                        mask = in_diet & ((self.condition_bits & self.condition_bit[condition]) != 0)
+                    rows = np.flatnonzero(mask)
+                    self.partitions[(condition, diet, meal)] = _Partition(rows, self.points[rows])
+
+    def find(self, food, meal=None):
+        """Catalog row of a food name (preferring the given meal), or None"""
+        name = str(food).strip().lower()
+        row = self.by_name.get((name, meal)) if meal else None
+        return row if row is not None else self.by_name.get(name)
+
+    def record(self, row, distance=None):
+        values = self.values[row]
+        item = {
+            'food': self.names[row],
+            'meal': self.meals[row],
+            'calories': float(values[0]),
+            'protein': float(values[1]),
+            'carbs': float(values[2]),
+            'fat': float(values[3]),
+            'price': float(values[4]),
+            'veg_type': 'veg' if self.veg[row] else 'non-veg'
+        }
+        if distance is not None:
+            item['distance'] = round(float(distance), 4)
+        return item
+
+    def _passing(self, rows, condition_bits, bounds):
+        """Boolean mask of candidate rows that carry every condition bit and meet every bound"""
+        mask = (self.condition_bits[rows] & condition_bits) == condition_bits
+        for column, limit, upper in bounds:
+            values = self.values[rows, column]
+            mask &= (values <= limit) if upper else (values >= limit)
+        return mask
+
+    def substitutes(self, food, k=5, meal=None, conditions=(), diet='any', constraints=None, exclude=()):
+        """k nearest foods to a catalog food that fit the partition and constraints.
+
+        Raises KeyError for an unknown food and ValueError for an unknown constraint.
+        """
+        row = self.find(food, meal)
+        if row is None:
+            raise KeyError(food)
+        meal = meal or self.meals[row]
+
+        bounds = []
+        for name, limit in (constraints or {}).items():
+            if name not in CONSTRAINTS:
+                raise ValueError(f"Unknown constraint: {name}")
+            feature, upper = CONSTRAINTS[name]
+            bounds.append((FEATURES.index(feature), float(limit), upper))
+
+        conditions = [c for c in conditions if c and c != 'normal']
+        partition = self.partitions.get((conditions[0] if conditions else None, 'veg' if diet == 'veg' else 'any', meal))
+        if partition is None:
+            return []
+        condition_bits = 0
+        for condition in conditions[1:]:
+            condition_bits |= self.condition_bit.get(condition, 1 << 62)
+        exclude = {self.names[row].lower()} | {str(name).lower() for name in exclude}
+
+        # Nearest candidates first; if too few pass, scan the partition's passing foods directly
+        point = self.points[row]
+        rows, distances = partition.query(point, (k + len(exclude)) * FETCH_FACTOR)
+        results = self._collect(rows, distances, k, condition_bits, bounds, exclude)
+        if len(results) < k and len(rows) < partition.size:
+            rows, distances = partition.scan(point, self._passing(partition.rows, condition_bits, bounds),
+                                             limit=k + len(exclude))
+            results = self._collect(rows, distances, k, condition_bits, bounds, exclude)
+        return results
+
+    def _collect(self, rows, distances, k, condition_bits, bounds, exclude):
+        mask = self._passing(rows, condition_bits, bounds)
+        results = []
+        for r, d in zip(rows[mask], distances[mask]):
+            if self.names[r].lower() not in exclude:
+                results.append(self.record(r, d))
+                if len(results) == k:
+                    break
+        return results
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def diet_app(tmp_path_factory):
+    """The Flask app module on a fresh database, with background work and the limiter off"""
+    os.environ['DIET_PLANNER_DB'] = str(tmp_path_factory.mktemp('db') / 'diet_planner.db')
+    os.environ['RATE_LIMIT'] = '0'
+    os.environ['CHAT_PRECOMPUTE'] = '0'
+    os.environ['WATER_FLUSH_INTERVAL'] = '0'
+    import app
+    app.init_db()
+    return app
+
+
+@pytest.fixture
+def client(diet_app):
+    return diet_app.app.test_client()
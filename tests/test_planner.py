@@ -0,0 +1,58 @@
+import json
+from itertools import islice
+
+import pandas as pd
+import pytest
+
+from planner import (DAYS, MEAL_TYPES, generate_week, load_plan_state, new_plan_state, plan_candidates,
+                     iter_plan_days, week_number)
+
+
+def _catalog():
+    rows = []
+    for meal_type in MEAL_TYPES:
+        for n in range(8):
+            rows.append({'food': f'{meal_type}-{n}', 'meal': meal_type, 'calories': 100 + n, 'protein': n,
+                         'carbs': 10, 'fat': 1, 'veg_type': 'veg' if n % 2 else 'non-veg',
+                         'safe_for': 'diabetes,normal' if n % 3 else 'normal'})
+    return pd.DataFrame(rows)
+
+
+SELECTED = {
+    'morning': [{'food': 'Own Oats', 'calories': 150}, {'food': 'Own Toast', 'calories': 120}],
+    'dinner': [{'food': 'Own Soup', 'calories': 200}],
+}
+
+
+@pytest.mark.parametrize('condition, diet', [('normal', 'any'), ('diabetes', 'veg')])
+def test_resumed_weeks_match_an_uninterrupted_run(condition, diet):
+    weeks = 3
+    state = new_plan_state(SELECTED, weeks)
+    candidates = plan_candidates(_catalog(), state, condition, diet)
+    uninterrupted = list(islice(iter_plan_days(candidates, state), weeks * len(DAYS)))
+
+    resumed = []
+    state = new_plan_state(SELECTED, weeks)
+    for week in range(1, weeks + 1):
+        # The state travels to the client and back as JSON between weeks
+        state = load_plan_state(json.loads(json.dumps(state)))
+        candidates = plan_candidates(_catalog(), state, condition, diet)
+        resumed.extend(generate_week(candidates, state).items())
+        assert week_number(state) == week
+
+    assert resumed == uninterrupted
+
+
+def test_weeks_rotate_recommendations():
+    state = new_plan_state(SELECTED, 2)
+    candidates = plan_candidates(_catalog(), state, 'normal', 'any')
+    first, second = generate_week(candidates, state), generate_week(candidates, state)
+    # Least-used-first picks move on to other foods in the second week
+    assert first['Sunday']['afternoon'] != second['Sunday']['afternoon']
+
+
+def test_load_plan_state_rejects_a_mid_week_state():
+    state = new_plan_state(SELECTED, 2)
+    state['day_index'] = 3
+    with pytest.raises(ValueError):
+        load_plan_state(state)
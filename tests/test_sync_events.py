@@ -0,0 +1,61 @@
+import uuid
+
+EVENTS = [
+    {'idempotency_key': 'meal-1', 'type': 'meal', 'meal_type': 'morning', 'date': '2026-10-19',
+     'foods': [{'food': 'Oats', 'calories': 150, 'protein': 5}, {'food': 'Apple', 'calories': 95}]},
+    {'idempotency_key': 'water-1', 'type': 'water', 'client_ts': '2026-10-19T09:10:00', 'glasses': 2},
+    {'idempotency_key': 'bad-1', 'type': 'water', 'client_ts': '2026-10-19T09:20:00', 'glasses': 0},
+]
+
+
+def _user_id():
+    return uuid.uuid4().int % 10 ** 9
+
+
+def _stored(diet_app, user_id):
+    conn = diet_app.get_db()
+    try:
+        foods = conn.execute('SELECT food_name FROM consumption_log WHERE user_id = ? ORDER BY food_name',
+                             (user_id,)).fetchall()
+        taps = conn.execute('SELECT COUNT(*) FROM water_consumption WHERE user_id = ?', (user_id,)).fetchone()[0]
+        daily = conn.execute('SELECT total, taps FROM water_daily WHERE user_id = ?', (user_id,)).fetchall()
+    finally:
+        conn.close()
+    return [name for (name,) in foods], taps, daily
+
+
+def test_replayed_batch_is_applied_once(client, diet_app):
+    user_id = _user_id()
+    first = client.post('/sync_events', json={'user_id': user_id, 'events': EVENTS}).get_json()
+    assert [r['status'] for r in first['results']] == ['applied', 'applied', 'error']
+    assert (first['applied'], first['duplicates'], first['errors']) == (2, 0, 1)
+
+    replay = client.post('/sync_events', json={'user_id': user_id, 'events': EVENTS}).get_json()
+    assert [r['status'] for r in replay['results']] == ['duplicate', 'duplicate', 'error']
+    assert (replay['applied'], replay['duplicates'], replay['errors']) == (0, 2, 1)
+
+    assert _stored(diet_app, user_id) == (['Apple', 'Oats'], 1, [(2, 1)])
+
+
+def test_replay_returns_the_stored_results(client):
+    user_id = _user_id()
+    first = client.post('/sync_events', json={'user_id': user_id, 'events': EVENTS[:2]}).get_json()
+    replay = client.post('/sync_events', json={'user_id': user_id, 'events': EVENTS[:2]}).get_json()
+    for applied, duplicate in zip(first['results'], replay['results']):
+        assert dict(applied, status='duplicate') == duplicate
+    assert replay['results'][1]['glasses'] == 2
+
+
+def test_duplicate_key_within_a_batch(client, diet_app):
+    user_id = _user_id()
+    body = client.post('/sync_events', json={'user_id': user_id, 'events': [EVENTS[1], EVENTS[1]]}).get_json()
+    assert [r['status'] for r in body['results']] == ['applied', 'duplicate']
+    assert _stored(diet_app, user_id)[1:] == (1, [(2, 1)])
+
+
+def test_keys_are_per_user(client, diet_app):
+    first, second = _user_id(), _user_id()
+    client.post('/sync_events', json={'user_id': first, 'events': EVENTS[1:2]})
+    body = client.post('/sync_events', json={'user_id': second, 'events': EVENTS[1:2]}).get_json()
+    assert body['results'][0]['status'] == 'applied'
+    assert _stored(diet_app, second)[1:] == (1, [(2, 1)])
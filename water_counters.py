@@ -0,0 +1,419 @@
+"""
+Write-behind water counters.
+
+Keeps a per-(user, date) running total, tap count and 24-slot hourly histogram in
+memory so /mark_water_consumed and /get_water_progress never wait on SQLite.
+Taps are queued and flushed in batches every WATER_FLUSH_INTERVAL seconds and on
+shutdown. Each day is stored as one compact water_daily row holding the totals
+and the hourly histogram packed into a 48-byte blob. Raw per-tap rows in
+water_consumption are optional (WATER_KEEP_RAW_TAPS) and are purged after
+WATER_RAW_RETENTION_DAYS.
+
+With WATER_FLUSH_INTERVAL=0 the store writes each tap through and reads every
+day from the database instead; multi-process servers use this mode because
+in-memory counters are not shared between workers.
+"""
+
+import atexit
+import os
+import sqlite3
+import struct
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+FLUSH_INTERVAL = float(os.environ.get('WATER_FLUSH_INTERVAL', '5'))
+PRELOAD_DAYS = int(os.environ.get('WATER_PRELOAD_DAYS', '7'))
+KEEP_RAW_TAPS = os.environ.get('WATER_KEEP_RAW_TAPS', '1') == '1'
+RAW_RETENTION_DAYS = int(os.environ.get('WATER_RAW_RETENTION_DAYS', '90'))  # 0 keeps raw taps forever
+
+# 24 little-endian unsigned 16-bit glass counts, one per hour of the day
+HOURLY_FORMAT = struct.Struct('<24H')
+HOURLY_MAX = 0xFFFF
+
+
+def pack_hourly(hourly):
+    """Pack a 24-slot hourly list into the water_daily blob format"""
+    return HOURLY_FORMAT.pack(*(min(max(int(glasses), 0), HOURLY_MAX) for glasses in hourly))
+
+
+def unpack_hourly(blob):
+    """Unpack a water_daily blob into a 24-slot list"""
+    if not blob:
+        return [0] * 24
+    return list(HOURLY_FORMAT.unpack(blob))
+
+
+def hour_of(consumed_time):
+    """Hour slot (0-23) for an HH:MM time string; taps without a usable time count at midnight"""
+    try:
+        return int(str(consumed_time).split(':')[0]) % 24
+    except ValueError:
+        return 0
+
+
+def _empty_counter():
+    return {'total': 0, 'taps': 0, 'hourly': [0] * 24}
+
+
+class WaterCounterStore:
+    """In-memory water counters backed by batched writes to water_daily (and water_consumption)"""
+
+    def __init__(self, get_db_func, flush_interval=FLUSH_INTERVAL, preload_days=PRELOAD_DAYS):
+        self.get_db = get_db_func
+        self.flush_interval = flush_interval
+        self.write_through = flush_interval <= 0
+        self.preload_days = preload_days
+        self._counters = {}      # (user_id, date) -> counter dict
+        self._pending = []       # raw tap rows waiting to be written
+        self._loaded_since = None  # every date >= this is fully held in memory
+        self._purged_since = None  # write-through mode: window of the last retention purge
+        self._lock = threading.RLock()
+        # Held by a flush from taking the queued taps until they are committed, and by any
+        # database read that has to agree with the queue; always taken before self._lock
+        self._flush_lock = threading.RLock()
+        self._stop = threading.Event()
+        self._flusher = None
+        atexit.register(self.close)
+
+    # ---------------- Loading ----------------
+    def rebuild(self):
+        """Reload the last preload_days of counters from the database"""
+        if self.write_through:
+            return
+        since = (datetime.now() - timedelta(days=self.preload_days)).strftime('%Y-%m-%d')
+        counters = {}
+        with self._flush_lock:
+            conn = self.get_db()
+            try:
+                rows = conn.execute('''
+                    SELECT user_id, consumed_date, total, taps, hourly FROM water_daily
+                    WHERE consumed_date >= ?
+                ''', (since,)).fetchall()
+            except sqlite3.OperationalError:
+                rows = []  # table not created yet
+            finally:
+                conn.close()
+
+            for user_id, consumed_date, total, taps, hourly in rows:
+                counters[(int(user_id), consumed_date)] = {
+                    'total': total, 'taps': taps, 'hourly': unpack_hourly(hourly)
+                }
+
+            with self._lock:
+                # Taps queued before the rebuild are not in the database yet
+                for user_id, glasses, consumed_time, consumed_date in self._pending:
+                    counter = counters.setdefault((user_id, consumed_date), _empty_counter())
+                    counter['total'] += glasses
+                    counter['taps'] += 1
+                    counter['hourly'][hour_of(consumed_time)] += glasses
+                self._counters = counters
+                self._loaded_since = since
+
+    def _load_day(self, user_id, consumed_date):
+        """Load a single day from water_daily; with in-memory counters call it with self._flush_lock held"""
+        conn = self.get_db()
+        try:
+            row = conn.execute('''
+                SELECT total, taps, hourly FROM water_daily
+                WHERE user_id = ? AND consumed_date = ?
+            ''', (user_id, consumed_date)).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        finally:
+            conn.close()
+        if not row:
+            return _empty_counter()
+        return {'total': row[0], 'taps': row[1], 'hourly': unpack_hourly(row[2])}
+
+    def _held_counter(self, key):
+        """The in-memory counter for a day, or None if it has to be loaded; call with self._lock held"""
+        if self._loaded_since is None:
+            return None
+        counter = self._counters.get(key)
+        if counter is None and key[1] >= self._loaded_since:
+            counter = self._counters[key] = _empty_counter()
+        return counter
+
+    @contextmanager
+    def _day(self, user_id, consumed_date):
+        """Hold the store's lock and yield the counter for a day, loading it if needed.
+
+        A load also holds the flush lock, so it cannot read the database while a
+        flush has taken queued taps but not yet committed them.
+        """
+        key = (user_id, consumed_date)
+        with self._lock:
+            counter = self._held_counter(key)
+            if counter is not None:
+                yield counter
+                return
+        with self._flush_lock, self._lock:
+            if self._loaded_since is None:
+                self.rebuild()
+            counter = self._held_counter(key)
+            if counter is None:
+                counter = self._counters[key] = self._load_day(user_id, consumed_date)
+                # Taps still queued for a day that was evicted are not in the database yet
+                for tap_user, glasses, consumed_time, tap_date in self._pending:
+                    if (tap_user, tap_date) == key:
+                        counter['total'] += glasses
+                        counter['taps'] += 1
+                        counter['hourly'][hour_of(consumed_time)] += glasses
+            yield counter
+
+    # ---------------- Reads and writes ----------------
+    def add(self, user_id, consumed_date, consumed_time, glasses=1):
+        """Record a tap and return the updated counter for that day"""
+        user_id = int(user_id)
+        glasses = int(glasses)
+        if self.write_through:
+            return self._add_through(user_id, consumed_date, consumed_time, glasses)
+        with self._day(user_id, consumed_date) as counter:
+            counter['total'] += glasses
+            counter['taps'] += 1
+            counter['hourly'][hour_of(consumed_time)] += glasses
+            self._pending.append((user_id, glasses, consumed_time, consumed_date))
+            self._ensure_flusher()
+            return self._snapshot(counter)
+
+    def _add_through(self, user_id, consumed_date, consumed_time, glasses):
+        """Write one tap in its own transaction and return the day as the database now holds it.
+
+        Other processes may write the same day, so nothing is kept in memory and
+        the store locks are not taken.
+        """
+        delta = _empty_counter()
+        delta['total'] = glasses
+        delta['taps'] = 1
+        delta['hourly'][hour_of(consumed_time)] = glasses
+        conn = self.get_db()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            apply_daily_deltas(cursor, {(user_id, consumed_date): delta})
+            if KEEP_RAW_TAPS:
+                cursor.execute('''
+                    INSERT INTO water_consumption (user_id, glasses, consumed_time, consumed_date)
+                    VALUES (?, ?, ?, ?)
+                ''', (user_id, glasses, consumed_time, consumed_date))
+            total, taps, hourly = cursor.execute('''
+                SELECT total, taps, hourly FROM water_daily
+                WHERE user_id = ? AND consumed_date = ?
+            ''', (user_id, consumed_date)).fetchone()
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        with self._lock:
+            purge_due = self._evict_old_days()
+        if purge_due:
+            self._start_purge()
+        return {'total': total, 'taps': taps, 'hourly': unpack_hourly(hourly)}
+
+    def record_persisted(self, user_id, consumed_date, consumed_time, glasses=1):
+        """Count a tap that another writer already stored in the database"""
+        key = (int(user_id), consumed_date)
+        glasses = int(glasses)
+        with self._lock:
+            # Days not held in memory will pick the tap up when loaded from the database
+            if self.write_through or self._loaded_since is None or (key not in self._counters and consumed_date < self._loaded_since):
+                return
+            counter = self._counters.setdefault(key, _empty_counter())
+            counter['total'] += glasses
+            counter['taps'] += 1
+            counter['hourly'][hour_of(consumed_time)] += glasses
+
+    def get(self, user_id, consumed_date):
+        """Current counter for a user and date"""
+        if self.write_through:
+            return self._load_day(int(user_id), consumed_date)
+        with self._day(int(user_id), consumed_date) as counter:
+            return self._snapshot(counter)
+
+    def daily_range(self, user_id, start_date, end_date):
+        """Counters for every date in [start_date, end_date] that has any water logged.
+
+        Days inside the preloaded window come from memory, older days from the
+        compact water_daily rows with one range query.
+        """
+        user_id = int(user_id)
+        if not self.write_through and self._loaded_since is None:
+            self.rebuild()
+        with self._lock:
+            if self.write_through:
+                loaded_since = '9999-12-31'  # nothing is held in memory
+            else:
+                loaded_since = self._loaded_since
+            days = {
+                consumed_date: self._snapshot(counter)
+                for (counter_user, consumed_date), counter in self._counters.items()
+                if counter_user == user_id and start_date <= consumed_date <= end_date
+                and consumed_date >= loaded_since and counter['taps']
+            }
+
+        if start_date < loaded_since:
+            conn = self.get_db()
+            try:
+                rows = conn.execute('''
+                    SELECT consumed_date, total, taps, hourly FROM water_daily
+                    WHERE user_id = ? AND consumed_date BETWEEN ? AND ? AND consumed_date < ?
+                ''', (user_id, start_date, end_date, loaded_since)).fetchall()
+            finally:
+                conn.close()
+            for consumed_date, total, taps, hourly in rows:
+                days[consumed_date] = {'total': total, 'taps': taps, 'hourly': unpack_hourly(hourly)}
+
+        return [dict(days[consumed_date], date=consumed_date) for consumed_date in sorted(days)]
+
+    @staticmethod
+    def _snapshot(counter):
+        return {'total': counter['total'], 'taps': counter['taps'], 'hourly': list(counter['hourly'])}
+
+    # ---------------- Flushing ----------------
+    def flush(self):
+        """Write queued taps to the database in one transaction"""
+        with self._flush_lock:
+            written = self._flush()
+            with self._lock:
+                purge_due = self._evict_old_days()
+        if purge_due:
+            self._start_purge()
+        return written
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+
+        # Collapse the batch into one delta per (user, date)
+        deltas = {}
+        for user_id, glasses, consumed_time, consumed_date in pending:
+            delta = deltas.setdefault((user_id, consumed_date), _empty_counter())
+            delta['total'] += glasses
+            delta['taps'] += 1
+            delta['hourly'][hour_of(consumed_time)] += glasses
+
+        conn = self.get_db()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            apply_daily_deltas(cursor, deltas)
+            if KEEP_RAW_TAPS:
+                cursor.executemany('''
+                    INSERT INTO water_consumption (user_id, glasses, consumed_time, consumed_date)
+                    VALUES (?, ?, ?, ?)
+                ''', pending)
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            # Keep the taps for the next attempt
+            with self._lock:
+                self._pending[:0] = pending
+            print(f"Water counter flush failed: {e}")
+            return 0
+        finally:
+            conn.close()
+        return len(pending)
+
+    def _evict_old_days(self):
+        """Drop counters that fell out of the preload window to bound memory.
+
+        Returns True when the window moved to a new day, which makes the raw tap
+        retention purge due; call with self._lock held.
+        """
+        since = (datetime.now() - timedelta(days=self.preload_days)).strftime('%Y-%m-%d')
+        if self.write_through:
+            # Nothing to evict, but the daily retention purge still applies
+            if since == self._purged_since:
+                return False
+            self._purged_since = since
+            return True
+        if self._loaded_since is None or since <= self._loaded_since:
+            return False
+        self._counters = {key: counter for key, counter in self._counters.items() if key[1] >= since}
+        self._loaded_since = since
+        return True
+
+    def _start_purge(self):
+        # The DELETE takes SQLite's write lock, so keep it off the caller's thread and outside the store locks
+        threading.Thread(target=self._purge_raw_taps, name='water-purge', daemon=True).start()
+
+    def _purge_raw_taps(self):
+        """Apply the raw tap retention policy; runs at most once per day per store, after a flush"""
+        if RAW_RETENTION_DAYS <= 0:
+            return
+        cutoff = (datetime.now() - timedelta(days=RAW_RETENTION_DAYS)).strftime('%Y-%m-%d')
+        conn = self.get_db()
+        try:
+            conn.execute('DELETE FROM water_consumption WHERE consumed_date < ?', (cutoff,))
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Water tap retention purge failed: {e}")
+        finally:
+            conn.close()
+
+    def _ensure_flusher(self):
+        # Started lazily so that forked workers each run their own flusher
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._run_flusher, name='water-flush', daemon=True)
+        self._flusher.start()
+
+    def _run_flusher(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Stop the background flusher and write anything still queued"""
+        self._stop.set()
+        if self._pending:
+            self.flush()
+
+
+def apply_daily_deltas(cursor, deltas):
+    """Add {(user_id, date): counter} deltas to the compact water_daily rows.
+
+    Must run inside a write transaction so the read-modify-write of the hourly
+    blob cannot interleave with another writer.
+    """
+    for (user_id, consumed_date), delta in deltas.items():
+        row = cursor.execute('''
+            SELECT hourly FROM water_daily WHERE user_id = ? AND consumed_date = ?
+        ''', (user_id, consumed_date)).fetchone()
+        hourly = unpack_hourly(row[0] if row else None)
+        for hour, glasses in enumerate(delta['hourly']):
+            hourly[hour] += glasses
+        cursor.execute('''
+            INSERT INTO water_daily (user_id, consumed_date, total, taps, hourly)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (user_id, consumed_date) DO UPDATE SET
+                total = total + excluded.total,
+                taps = taps + excluded.taps,
+                hourly = excluded.hourly
+        ''', (user_id, consumed_date, delta['total'], delta['taps'], pack_hourly(hourly)))
+
+
+def backfill_daily_rows(cursor):
+    """Build water_daily rows for days that so far only exist as raw water_consumption taps"""
+    rows = cursor.execute('''
+        SELECT w.user_id, w.consumed_date, w.consumed_time, SUM(w.glasses), COUNT(*)
+        FROM water_consumption w
+        WHERE NOT EXISTS (
+            SELECT 1 FROM water_daily d
+            WHERE d.user_id = w.user_id AND d.consumed_date = w.consumed_date
+        )
+        GROUP BY w.user_id, w.consumed_date, w.consumed_time
+    ''').fetchall()
+    deltas = {}
+    for user_id, consumed_date, consumed_time, glasses, taps in rows:
+        delta = deltas.setdefault((user_id, consumed_date), _empty_counter())
+        delta['total'] += glasses or 0
+        delta['taps'] += taps
+        delta['hourly'][hour_of(consumed_time)] += glasses or 0
+    apply_daily_deltas(cursor, deltas)
+    return len(deltas)